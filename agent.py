@@ -1,5 +1,6 @@
 import model
 import config
+import replay_memory
 
 import torch
 import torch.optim as optim
@@ -9,17 +10,62 @@ import torch.nn as nn
 from torch.distributions import Normal
 
 import numpy as np
-import random
-from collections import deque
 import os
 
 device = config.device
 
+# StateBuffer 클래스 -> 행동 결정에 사용할 상태 배치를 device 로 옮김
+# CPU 에서는 numpy 배열을 복사 없이 tensor 로 사용하고, GPU 에서는 pinned memory 와 device 버퍼를 한번 할당하여 매 step 재사용
+# (이전 step 의 연산 결과를 .cpu() 로 받은 후에 다음 상태를 복사하므로 버퍼를 덮어써도 안전)
+class StateBuffer():
+    def __init__(self, device):
+        self.device = torch.device(device)
+        self.host = None
+        self.buffer = None
+
+    def put(self, state):
+        tensor = torch.from_numpy(np.ascontiguousarray(state))
+        if self.device.type != "cuda":
+            return tensor.to(self.device)
+        if self.buffer is None or self.buffer.shape != tensor.shape or self.buffer.dtype != tensor.dtype:
+            self.host = torch.empty(tensor.shape, dtype=tensor.dtype).pin_memory()
+            self.buffer = torch.empty(tensor.shape, dtype=tensor.dtype, device=self.device)
+        self.host.copy_(tensor)
+        self.buffer.copy_(self.host, non_blocking=True)
+        return self.buffer
+
+# TargetUpdater 클래스 -> 네트워크의 파라미터를 타겟 네트워크로 복사 (hard update) 하거나 Polyak 평균 (soft update)
+# 파라미터마다 Python 반복과 임시 tensor 를 만드는 대신 foreach 연산 (_foreach_lerp_, _foreach_copy_) 으로
+# 전체 파라미터를 몇 번의 kernel 호출로 갱신
+# (파라미터 객체는 load_state_dict 와 .to(device) 후에도 그대로이므로 목록을 한번만 만들어 둠)
+class TargetUpdater():
+    def __init__(self, model, target_model):
+        self.model = model
+        self.target_model = target_model
+        self.params = list(model.parameters())
+        self.target_params = list(target_model.parameters())
+
+    # target = target + tau * (param - target) = tau * param + (1 - tau) * target
+    def soft_update(self, tau):
+        with torch.no_grad():
+            torch._foreach_lerp_(self.target_params, self.params, tau)
+
+    # load_state_dict 처럼 파라미터와 저장되는 버퍼를 모두 복사 (버퍼는 .to(device) 에서 바뀔 수 있으므로 매번 가져옴)
+    def hard_update(self):
+        tensors = list(self.model.state_dict(keep_vars=True).values())
+        target_tensors = list(self.target_model.state_dict(keep_vars=True).values())
+        with torch.no_grad():
+            if hasattr(torch, "_foreach_copy_"):
+                torch._foreach_copy_(target_tensors, tensors)
+            else:
+                for target_tensor, tensor in zip(target_tensors, tensors):
+                    target_tensor.copy_(tensor)
+
 # DQNAgent 클래스 -> DQN 알고리즘을 위한 다양한 함수 정의
 class DQNAgent():
     def __init__(self, model, target_model, optimizer, device, algorithm):
         # 클래스의 함수들을 위한 값 설정
-        if algorithm == ("_RND" or "_ICM"):
+        if algorithm in ("_RND", "_ICM"):
             self.model = model[0]
             self.model_a = model[1]
         else:
@@ -31,16 +77,33 @@ class DQNAgent():
         self.device = device
         self.algorithm = algorithm
 
-        self.memory = deque(maxlen=config.mem_maxlen)
-        self.obs_set = deque(maxlen=config.skip_frame*config.stack_frame)
+        # Prioritized Experience Replay : beta 는 학습이 끝날 때 1 이 되도록 증가
+        sampler = None
+        if config.prioritized_memory:
+            beta_increment = (1.0 - config.per_beta) / max(1, config.run_step - config.start_train_step)
+            sampler = replay_memory.PrioritizedSampler(config.mem_maxlen, config.per_alpha, config.per_beta, beta_increment, config.per_eps)
+
+        if config.frame_memory:
+            self.memory = replay_memory.FrameReplayMemory(config.mem_maxlen, config.state_size[2], config.stack_frame, config.skip_frame, sampler, config.num_envs)
+        else:
+            self.memory = replay_memory.ReplayMemory(config.mem_maxlen, sampler)
+        self.collator = replay_memory.BatchCollator(self.device, config.pin_memory)
+        self.prefetcher = None
 
         self.epsilon = config.epsilon_init
+        # Ape-X 의 actor 처럼 actor 마다 정한 epsilon 으로 계속 탐험하는 경우 True (algorithm 의 act 에서 epsilon 을 바꾸지 않음)
+        self.fixed_epsilon = False
+
+        # Ape-X 의 actor 에서 네트워크 연산 대신 사용하는 inference server 의 client (inference_server.py)
+        self.inference = None
+        self.state_buffer = StateBuffer(device)
 
         if not config.load_model and config.train_mode:
             self.writer = SummaryWriter('{}'.format(config.save_path + self.algorithm))
         elif config.load_model and config.train_mode:
             self.writer = SummaryWriter('{}'.format(config.load_path))
 
+        self.target_updater = TargetUpdater(self.model, self.target_model)
         self.update_target()
 
         if config.load_model == True:
@@ -48,8 +111,8 @@ class DQNAgent():
                 self.model_a
 
             except:
-                self.model.load_state_dict(torch.load(config.load_path+'/model.pth'), map_location=self.device)
-                self.model.to(self.deivce)
+                self.model.load_state_dict(torch.load(config.load_path+'/model.pth', map_location=self.device))
+                self.model.to(self.device)
                 if config.train_mode: # train mode
                     self.model.train()
                 else: # evaluation mode
@@ -77,38 +140,61 @@ class DQNAgent():
 
             print("Model is loaded from {}".format(config.load_path+'/model.pth'))
 
-    # Epsilon greedy 기법에 따라 행동 결정
+    # Epsilon greedy 기법에 따라 행동 결정 (state 는 각 환경의 상태를 모은 배치, 환경마다 행동 하나씩 반환)
     def get_action(self, state):
+        num_envs = len(state)
+        # 랜덤하게 행동 결정할 환경 선택
         if config.train_mode:
-            if self.epsilon > np.random.rand():
-                # 랜덤하게 행동 결정
-                return np.random.randint(0, config.action_size)
-            else:
-                with torch.no_grad():
-                # 네트워크 연산에 따라 행동 결정
-                    Q = self.model(torch.from_numpy(state).unsqueeze(0).to(self.device))
-                    return np.argmax(Q.cpu().detach().numpy())
+            random_action = self.epsilon > np.random.rand(num_envs)
         else:
-            with torch.no_grad():
-            # 네트워크 연산에 따라 행동 결정
-                Q = self.model(torch.from_numpy(state).unsqueeze(0).to(self.device))
-                return np.argmax(Q.cpu().detach().numpy())
-
-    # 프레임을 skip하면서 설정에 맞게 stack
-    def skip_stack_frame(self, obs):
-        self.obs_set.append(obs)
+            random_action = np.zeros(num_envs, dtype=bool)
 
-        state = np.zeros([config.state_size[2]*config.stack_frame, config.state_size[0], config.state_size[1]])
-
-        # skip frame마다 한번씩 obs를 stacking
-        for i in range(config.stack_frame):
-            state[config.state_size[2]*i : config.state_size[2]*(i+1), :,:] = self.obs_set[-1 - (config.skip_frame*i)]
-
-        return np.uint8(state)
+        action = np.random.randint(0, config.action_size, size=num_envs)
+        if not random_action.all():
+            action = np.where(random_action, action, self.greedy_action(state))
+        return action
 
-    # 리플레이 메모리에 데이터 추가 (상태, 행동, 보상, 다음 상태, 게임 종료 여부)
-    def append_sample(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+    # 네트워크 연산에 따라 행동 결정 (inference server 를 사용하면 server 에서 다른 actor 의 상태와 함께 배치로 계산)
+    def greedy_action(self, state):
+        if self.inference is not None:
+            return self.inference.infer(state)
+        with torch.inference_mode():
+            Q = self.model(self.state_buffer.put(state))
+            return torch.argmax(Q, dim=1).cpu().numpy()
+
+    # 리플레이 메모리에 데이터 추가 (상태, 행동, 보상, 다음 상태, 게임 종료 여부, transition 을 만든 환경의 index)
+    def append_sample(self, state, action, reward, next_state, done, env_id=0):
+        self.memory.append(state, action, reward, next_state, done, env_id)
+
+    # 학습을 위한 미니 배치 데이터 샘플링 (prefetch 중이면 미리 준비된 미니 배치 사용)
+    def sample_batch(self):
+        if self.prefetcher is not None:
+            return self.prefetcher.get()
+        return self.collator.sample(self.memory, config.batch_size)
+
+    # 다음 미니 배치들을 미리 준비하는 prefetch thread 시작 / 종료
+    def start_prefetch(self, depth):
+        if self.prefetcher is None:
+            self.prefetcher = replay_memory.Prefetcher(self.memory, config.batch_size, self.device, config.pin_memory, depth)
+
+    def stop_prefetch(self):
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            self.prefetcher = None
+
+    # Prioritized Experience Replay 를 사용할 때 학습에 사용한 transition 의 우선순위를 TD error 로 갱신
+    def update_priority(self, index, td_error):
+        if config.prioritized_memory:
+            self.memory.update_priority(index, td_error.detach().abs().view(-1).cpu().numpy())
+
+    # actor 의 네트워크로 transition 들의 TD error 계산 (Ape-X 에서 리플레이 메모리에 저장할 초기 우선순위)
+    # state 와 next_state 를 합쳐서 네트워크 연산을 한번만 수행
+    def td_error(self, state, action, reward, next_state, done):
+        with torch.no_grad():
+            Q, next_Q = self.model(torch.from_numpy(np.concatenate([state, next_state])).float().to(self.device)).split(len(state))
+        acted_Q = Q.cpu().numpy()[np.arange(len(action)), action.astype(np.int64).reshape(-1)]
+        target_Q = reward + (1. - done) * config.discount_factor * torch.max(next_Q, dim=1).values.cpu().numpy()
+        return target_Q - acted_Q
 
     # 네트워크 모델 저장
     def save_model(self, load_model, train_mode):
@@ -142,13 +228,7 @@ class DQNAgent():
     # 학습 수행
     def train_model(self):
         # 학습을 위한 미니 배치 데이터 샘플링
-        mini_batch = random.sample(self.memory, config.batch_size)
-
-        state_batch = torch.cat([torch.tensor([mini_batch[i][0]]) for i in range(config.batch_size)]).float().to(self.device)
-        action_batch = torch.cat([torch.tensor([mini_batch[i][1]]) for i in range(config.batch_size)]).float().to(self.device)
-        reward_batch = torch.cat([torch.tensor([mini_batch[i][2]]) for i in range(config.batch_size)]).float().to(self.device)
-        next_state_batch = torch.cat([torch.tensor([mini_batch[i][3]]) for i in range(config.batch_size)]).float().to(self.device)
-        done_batch = torch.cat([torch.tensor([mini_batch[i][4]]) for i in range(config.batch_size)]).float().to(self.device)
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, weight_batch, index_batch = self.sample_batch()
 
         # 타겟값 계산
         Q = self.model(state_batch)
@@ -162,92 +242,81 @@ class DQNAgent():
 
         max_Q = torch.mean(torch.max(target_Q, axis=0).values).cpu().numpy()
 
-        loss = F.smooth_l1_loss(acted_Q, target_Q)
+        loss = torch.mean(weight_batch.view(-1, 1) * F.smooth_l1_loss(acted_Q, target_Q, reduction='none'))
         self.optimizer.zero_grad()
         loss.backward()
         self.optimizer.step()
 
+        self.update_priority(index_batch, target_Q - acted_Q)
+
         return loss.item(), max_Q
 
     # 타겟 네트워크 업데이트
     def update_target(self):
-        self.target_model.load_state_dict(self.model.state_dict())
+        self.target_updater.hard_update()
 
     def write_scalar(self, loss, reward, maxQ, episode):
         self.writer.add_scalar('Mean_Loss', loss, episode)
         self.writer.add_scalar('Mean_Reward', reward, episode)
         self.writer.add_scalar('Max_Q', maxQ, episode)
 
-    def write_scalar_ICM(self, loss, reward, maxQ, r_i, episode, loss_rl, loss_fm, loss_im):
+    # RND 는 inverse model 이 없으므로 loss_im 을 기록하지 않음
+    def write_scalar_ICM(self, loss, reward, maxQ, r_i, episode, loss_rl, loss_fm, loss_im=None):
         self.writer.add_scalar('Mean_Loss', loss, episode)
         self.writer.add_scalar('Mean_Reward', reward, episode)
         self.writer.add_scalar('Max_Q', maxQ, episode)
         self.writer.add_scalar('intrinsic_Reward', r_i, episode)
         self.writer.add_scalar('Mean_Loss_Rl', loss_rl, episode)
         self.writer.add_scalar('Mean_Loss_Fm', loss_fm, episode)
-        self.writer.add_scalar('Mean_Loss_Im', loss_im, episode)
+        if loss_im is not None:
+            self.writer.add_scalar('Mean_Loss_Im', loss_im, episode)
 
     # Epsilon greedy 기법에 따라 행동 결정
     def get_action_noisy(self, state, step, train_mode):
         if step < config.start_train_step and train_mode:
             # 랜덤하게 행동 결정
-            return np.random.randint(0, config.action_size)
+            return np.random.randint(0, config.action_size, size=len(state))
         else:
-            # 네트워크 연산에 따라 행동 결정
-            Q = self.model(torch.from_numpy(state).unsqueeze(0).to(self.device), torch.tensor(train_mode).to(self.device))
-            return np.argmax(Q.cpu().detach().numpy())
+            # 네트워크 연산에 따라 행동 결정 (evaluation 시에는 noise 없이 평균 가중치만 사용)
+            # 학습 시에는 행동 결정 step 마다 noise 를 새로 sampling
+            if train_mode:
+                self.model.reset_noise()
+            with torch.inference_mode():
+                Q = self.model(self.state_buffer.put(state), bool(train_mode))
+                return torch.argmax(Q, dim=1).cpu().numpy()
 
     # 학습 수행
     def train_model_double(self):
         # 학습을 위한 미니 배치 데이터 샘플링
-        mini_batch = random.sample(self.memory, config.batch_size)
-
-        state_batch = []
-        action_batch = []
-        reward_batch = []
-        next_state_batch = []
-        done_batch = []
-
-        for i in range(config.batch_size):
-            state_batch.append(mini_batch[i][0])
-            action_batch.append(mini_batch[i][1])
-            reward_batch.append(mini_batch[i][2])
-            next_state_batch.append(mini_batch[i][3])
-            done_batch.append(mini_batch[i][4])
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, weight_batch, index_batch = self.sample_batch()
+        action_batch = action_batch.long().view(-1, 1)
+        Q = self.model(state_batch)
 
-        # 타겟값 계산
-        predict_Q = self.model(torch.FloatTensor(state_batch).to(self.device))
-        target_Q = predict_Q.cpu().detach().numpy()
-        target_nextQ = self.target_model(torch.FloatTensor(next_state_batch).to(self.device)).cpu().detach().numpy()
+        # 타겟값 계산 (Double DQN: 행동 선택은 네트워크, 가치 평가는 타겟 네트워크)
+        # next_state 에 대한 네트워크 연산은 역전파가 필요 없으므로 state 와 합치지 않고 no_grad 로 따로 수행
+        with torch.no_grad():
+            next_action = torch.argmax(self.model(next_state_batch), dim=1, keepdim=True)
+            target_next_Q = self.target_model(next_state_batch).gather(1, next_action)
+            target_acted_Q = reward_batch.view(-1, 1) + (1. - done_batch.view(-1, 1)) * config.discount_factor * target_next_Q
+            target_Q = Q.detach().scatter(1, action_batch, target_acted_Q)
 
-        Q_a = self.model(torch.FloatTensor(next_state_batch).to(self.device)).cpu().detach().numpy()
-        max_Q = np.max(target_Q)
+        max_Q = torch.max(Q.detach()).cpu().numpy()
 
-        with torch.no_grad():
-            for i in range(config.batch_size):
-                if done_batch[i]:
-                    target_Q[i, action_batch[i]] = reward_batch[i]
-                else:
-                    action_ind = np.argmax(Q_a[i])
-                    target_Q[i, action_batch[i]] = reward_batch[i] + config.discount_factor * target_nextQ[i][action_ind]
-
-        loss = F.smooth_l1_loss(predict_Q.to(self.device), torch.from_numpy(target_Q).to(self.device))
+        loss = torch.mean(weight_batch.view(-1, 1) * F.smooth_l1_loss(Q, target_Q, reduction='none'))
         self.optimizer.zero_grad()
         loss.backward()
         self.optimizer.step()
 
+        self.update_priority(index_batch, target_acted_Q - Q.detach().gather(1, action_batch))
+
         return loss.item(), max_Q
 
     def train_model_noisy(self):
         # 학습을 위한 미니 배치 데이터 샘플링
-        mini_batch = random.sample(self.memory, config.batch_size)
-        state_batch = torch.cat([torch.tensor([mini_batch[i][0]]) for i in range(config.batch_size)]).float().to(self.device)
-        action_batch = torch.cat([torch.tensor([mini_batch[i][1]]) for i in range(config.batch_size)]).float().to(self.device)
-        reward_batch = torch.cat([torch.tensor([mini_batch[i][2]]) for i in range(config.batch_size)]).float().to(self.device)
-        next_state_batch = torch.cat([torch.tensor([mini_batch[i][3]]) for i in range(config.batch_size)]).float().to(self.device)
-        done_batch = torch.cat([torch.tensor([mini_batch[i][4]]) for i in range(config.batch_size)]).float().to(self.device)
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, weight_batch, index_batch = self.sample_batch()
 
-        # 타겟값 계산
+        # 타겟값 계산 (update 마다 noise 를 새로 sampling, 타겟 네트워크는 평균 가중치만 사용)
+        self.model.reset_noise()
         Q = self.model(state_batch, train=True)
         action_batch_onehot = torch.eye(config.action_size)[action_batch.type(torch.long)].to(self.device)
         acted_Q = torch.sum(Q * action_batch_onehot, axis=-1).unsqueeze(1)
@@ -259,23 +328,19 @@ class DQNAgent():
 
         max_Q = torch.mean(torch.max(target_Q, axis=0).values).cpu().numpy()
 
-        loss = F.smooth_l1_loss(acted_Q, target_Q)
+        loss = torch.mean(weight_batch.view(-1, 1) * F.smooth_l1_loss(acted_Q, target_Q, reduction='none'))
         self.optimizer.zero_grad()
         loss.backward()
         self.optimizer.step()
 
+        self.update_priority(index_batch, target_Q - acted_Q)
+
         return loss.item(), max_Q
 
     # 학습 수행
     def train_model_ICM(self):
         # 학습을 위한 미니 배치 데이터 샘플링
-        mini_batch = random.sample(self.memory, config.batch_size)
-
-        state_batch = torch.cat([torch.tensor([mini_batch[i][0]]) for i in range(config.batch_size)]).float().to(self.device)
-        action_batch = torch.cat([torch.tensor([mini_batch[i][1]]) for i in range(config.batch_size)]).float().to(self.device)
-        reward_batch = torch.cat([torch.tensor([mini_batch[i][2]]) for i in range(config.batch_size)]).float().to(self.device)
-        next_state_batch = torch.cat([torch.tensor([mini_batch[i][3]]) for i in range(config.batch_size)]).float().to(self.device)
-        done_batch = torch.cat([torch.tensor([mini_batch[i][4]]) for i in range(config.batch_size)]).float().to(self.device)
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, weight_batch, index_batch = self.sample_batch()
 
         # ICM
         x_next_encode, x_fm, x_im = self.model_a(state_batch, next_state_batch, action_batch)
@@ -288,8 +353,7 @@ class DQNAgent():
         acted_Q = torch.sum(Q * action_batch_onehot, axis=-1).unsqueeze(1)
 
         with torch.no_grad():
-            for i in range(config.batch_size):
-                reward_batch[i] = (config.extrinsic_coeff * reward_batch[i]) + (config.intrinsic_coeff * reward_i[i])
+            reward_batch = (config.extrinsic_coeff * reward_batch.view(-1)) + (config.intrinsic_coeff * reward_i)
 
             target_next_Q = self.target_model(next_state_batch)
             max_next_Q = torch.max(target_next_Q, dim=1, keepdim=True).values
@@ -297,32 +361,27 @@ class DQNAgent():
 
         max_Q = torch.mean(torch.max(target_Q, axis=0).values).cpu().numpy()
 
-        loss_rl = F.smooth_l1_loss(acted_Q, target_Q)
+        loss_rl = torch.mean(weight_batch.view(-1, 1) * F.smooth_l1_loss(acted_Q, target_Q, reduction='none'))
         # ICM related losses
         loss_fm = F.mse_loss(input=x_fm.to(self.device), target=x_next_encode.to(self.device))
         loss_im = F.cross_entropy(input=x_im.to(self.device), target=action_batch.to(device=self.device, dtype=torch.int64))
 
         loss = (config.lamb * loss_rl) + (config.beta * loss_fm) + ((1-config.beta) * loss_im)
 
+        # 각 loss 의 gradient 를 더한 것과 같으므로 역전파는 한번만 수행 (encoder 의 그래프를 여러 번 지나지 않음)
         self.optimizer.zero_grad()
-        loss_rl.backward(retain_graph=True)
-        loss_fm.backward(retain_graph=True)
-        loss_im.backward(retain_graph=True)
+        (loss_rl + loss_fm + loss_im).backward()
 
         self.optimizer.step()
 
+        self.update_priority(index_batch, target_Q - acted_Q)
+
         return loss.item(), max_Q, config.intrinsic_coeff*reward_i.cpu().detach().numpy(), loss_rl.item(), loss_fm.item(), loss_im.item()
 
     # 학습 수행
     def train_model_RND(self):
         # 학습을 위한 미니 배치 데이터 샘플링
-        mini_batch = random.sample(self.memory, config.batch_size)
-
-        state_batch = torch.cat([torch.tensor([mini_batch[i][0]]) for i in range(config.batch_size)]).float().to(self.device)
-        action_batch = torch.cat([torch.tensor([mini_batch[i][1]]) for i in range(config.batch_size)]).float().to(self.device)
-        reward_batch = torch.cat([torch.tensor([mini_batch[i][2]]) for i in range(config.batch_size)]).float().to(self.device)
-        next_state_batch = torch.cat([torch.tensor([mini_batch[i][3]]) for i in range(config.batch_size)]).float().to(self.device)
-        done_batch = torch.cat([torch.tensor([mini_batch[i][4]]) for i in range(config.batch_size)]).float().to(self.device)
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, weight_batch, index_batch = self.sample_batch()
 
         # RND
         x_next_encode, x_next_encode_t = self.model_a(next_state_batch)
@@ -336,8 +395,7 @@ class DQNAgent():
         acted_Q = torch.sum(Q * action_batch_onehot, axis=-1).unsqueeze(1)
 
         with torch.no_grad():
-            for i in range(config.batch_size):
-                reward_batch[i] = (config.extrinsic_coeff * reward_batch[i]) + (config.intrinsic_coeff * reward_i[i])
+            reward_batch = (config.extrinsic_coeff * reward_batch.view(-1)) + (config.intrinsic_coeff * reward_i)
 
             target_next_Q = self.target_model(next_state_batch)
             max_next_Q = torch.max(target_next_Q, dim=1, keepdim=True).values
@@ -345,7 +403,7 @@ class DQNAgent():
 
         max_Q = torch.mean(torch.max(target_Q, axis=0).values).cpu().numpy()
 
-        loss_rl = F.smooth_l1_loss(acted_Q, target_Q)
+        loss_rl = torch.mean(weight_batch.view(-1, 1) * F.smooth_l1_loss(acted_Q, target_Q, reduction='none'))
 
         # RND loss
         loss_fm = F.mse_loss(input=x_next_encode.to(self.device), target=x_next_encode_t.to(self.device))
@@ -357,18 +415,23 @@ class DQNAgent():
         loss_fm.backward(retain_graph=True)
         self.optimizer.step()
 
+        self.update_priority(index_batch, target_Q - acted_Q)
+
         return loss.item(), max_Q, config.intrinsic_coeff*reward_i.cpu().detach().numpy(), loss_rl.item(), loss_fm.item()
 
 # OU Noise 클래스 -> DDPG 에서 action 을 결정할 때 사용
 class OUNoise():
     def __init__(self):
-        self.X = np.zeros(config.action_size)
+        self.X = np.zeros((1, config.action_size))
         self.mu = config.mu
         self.theta = config.theta
         self.sigma = config.sigma
 
-    def sample(self):
-        dx = self.theta * (self.mu - self.X) + self.sigma * np.random.randn(len(self.X))
+    # 환경마다 독립적인 noise 를 생성 (환경 수가 바뀌면 다시 초기화)
+    def sample(self, num_envs=1):
+        if len(self.X) != num_envs:
+            self.X = np.zeros((num_envs, config.action_size))
+        dx = self.theta * (self.mu - self.X) + self.sigma * np.random.randn(*self.X.shape)
         self.X += dx
         return self.X
 
@@ -381,7 +444,11 @@ class DDPGAgent():
         self.target_actor = target_actor
         self.target_critic = target_critic
 
+        # actor 와 critic 을 하나의 모델처럼 묶어서 타겟 네트워크를 한번에 갱신
+        self.target_updater = TargetUpdater(nn.ModuleList([actor, critic]), nn.ModuleList([target_actor, target_critic]))
+
         self.ou_noise = OUNoise()
+        self.state_buffer = StateBuffer(device)
 
         self.optimizer_actor = optimizer_actor
         self.optimizer_critic = optimizer_critic
@@ -389,8 +456,9 @@ class DDPGAgent():
         self.device = device
         self.algorithm = algorithm
 
-        self.memory = deque(maxlen=config.mem_maxlen)
-        self.obs_set = deque(maxlen=config.skip_frame*config.stack_frame)
+        self.memory = replay_memory.ReplayMemory(config.mem_maxlen)
+        self.collator = replay_memory.BatchCollator(self.device, config.pin_memory)
+        self.prefetcher = None
 
         self.epsilon = config.epsilon_init
 
@@ -416,15 +484,31 @@ class DDPGAgent():
 
     # 네트워크 연산 + OU noise (training 시) 에 따라 행동 결정
     def get_action(self, state, train_mode):
-        with torch.no_grad():
-            policy = self.actor(torch.from_numpy(state).unsqueeze(0).to(self.device))
-            action = policy.cpu().detach().numpy()
-            noise = self.ou_noise.sample()
-            return action + noise if train_mode else action
+        with torch.inference_mode():
+            action = self.actor(self.state_buffer.put(state)).cpu().numpy()
+        if not train_mode:
+            return action
+        return action + self.ou_noise.sample(len(state))
+
+    # 리플레이 메모리에 데이터 추가 (상태, 행동, 보상, 다음 상태, 게임 종료 여부, transition 을 만든 환경의 index)
+    def append_sample(self, state, action, reward, next_state, done, env_id=0):
+        self.memory.append(state, action, reward, next_state, done, env_id)
+
+    # 학습을 위한 미니 배치 데이터 샘플링 (prefetch 중이면 미리 준비된 미니 배치 사용)
+    def sample_batch(self):
+        if self.prefetcher is not None:
+            return self.prefetcher.get()
+        return self.collator.sample(self.memory, config.batch_size)
 
-    # 리플레이 메모리에 데이터 추가 (상태, 행동, 보상, 다음 상태, 게임 종료 여부)
-    def append_sample(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+    # 다음 미니 배치들을 미리 준비하는 prefetch thread 시작 / 종료
+    def start_prefetch(self, depth):
+        if self.prefetcher is None:
+            self.prefetcher = replay_memory.Prefetcher(self.memory, config.batch_size, self.device, config.pin_memory, depth)
+
+    def stop_prefetch(self):
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            self.prefetcher = None
 
     # 네트워크 모델 저장
     def save_model(self, load_model, train_mode):
@@ -451,13 +535,7 @@ class DDPGAgent():
         self.target_actor.train(), self.target_critic.train()
 
         # 학습을 위한 미니 배치 데이터 샘플링
-        mini_batch = random.sample(self.memory, config.batch_size)
-
-        state_batch = torch.cat([torch.tensor([mini_batch[i][0]]) for i in range(config.batch_size)]).float().to(self.device)
-        action_batch = torch.cat([torch.tensor([mini_batch[i][1]]) for i in range(config.batch_size)]).float().to(self.device)
-        reward_batch = torch.cat([torch.tensor([mini_batch[i][2]]) for i in range(config.batch_size)]).float().to(self.device)
-        next_state_batch = torch.cat([torch.tensor([mini_batch[i][3]]) for i in range(config.batch_size)]).float().to(self.device)
-        done_batch = torch.cat([torch.tensor([mini_batch[i][4]]) for i in range(config.batch_size)]).float().to(self.device)
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, weight_batch, index_batch = self.sample_batch()
 
         # get target
         Q = self.critic(state_batch, action_batch)
@@ -487,17 +565,11 @@ class DDPGAgent():
 
     # 타겟 네트워크 업데이트 : hard update
     def hard_update_target(self):
-        self.target_actor.load_state_dict(self.actor.state_dict())
-        self.target_critic.load_state_dict(self.critic.state_dict())
+        self.target_updater.hard_update()
 
     # 타겟 네트워크 업데이트 : soft update
     def soft_update_target(self):
-        self.soft_update(self.actor, self.target_actor, config.tau)
-        self.soft_update(self.critic, self.target_critic, config.tau)
-
-    def soft_update(self, model, target_model, tau):
-        for target_param, param in zip(target_model.parameters(), model.parameters()):
-            target_param.data.copy_(tau*param.data + (1-tau)*target_param.data)
+        self.target_updater.soft_update(config.tau)
 
     def write_scalar(self, loss_critic, loss_actor, reward, maxQ, episode):
         self.writer.add_scalar('Mean_Loss_Critic', loss_critic, episode)
@@ -512,6 +584,7 @@ class SACAgent():
         self.actor = actor
         self.critic = critic
         self.target_critic = target_critic
+        self.target_updater = TargetUpdater(critic, target_critic)
 
         self.optimizer_actor = optimizer_actor
         self.optimizer_critic = optimizer_critic
@@ -520,8 +593,10 @@ class SACAgent():
         self.device = device
         self.algorithm = algorithm
 
-        self.memory = deque(maxlen=config.mem_maxlen)
-        self.obs_set = deque(maxlen=config.skip_frame*config.stack_frame)
+        self.memory = replay_memory.ReplayMemory(config.mem_maxlen)
+        self.collator = replay_memory.BatchCollator(self.device, config.pin_memory)
+        self.prefetcher = None
+        self.state_buffer = StateBuffer(device)
 
         self.epsilon = config.epsilon_init
         self.alpha = alpha
@@ -548,16 +623,13 @@ class SACAgent():
 
             print("Model is loaded from {}".format(config.load_path+'/model.pth'))
 
-    # reparameterization trick 에 따라 행동 결정
+    # 정책의 분포에서 행동 결정 (evaluation 시에는 sampling 없이 평균 행동 사용)
+    # 행동 결정에는 gradient 가 필요 없으므로 reparameterization (rsample) 대신 sample 사용
     def get_action(self, state, train_mode):
-        mu, std = self.actor(torch.from_numpy(state).unsqueeze(0).to(self.device))
-        if not train_mode:
-            std = 0
-        m = Normal(mu, std)
-        z = m.rsample()
-        action = torch.tanh(z)
-        action = action.data.cpu().detach().numpy()
-        return action
+        with torch.inference_mode():
+            mu, std = self.actor(self.state_buffer.put(state))
+            z = Normal(mu, std).sample() if train_mode else mu
+            return torch.tanh(z).cpu().numpy()
 
     def sample_action(self, mu, std):
         m = Normal(mu, std)
@@ -570,9 +642,25 @@ class SACAgent():
         return action, log_prob
 
 
-    # 리플레이 메모리에 데이터 추가 (상태, 행동, 보상, 다음 상태, 게임 종료 여부)
-    def append_sample(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+    # 리플레이 메모리에 데이터 추가 (상태, 행동, 보상, 다음 상태, 게임 종료 여부, transition 을 만든 환경의 index)
+    def append_sample(self, state, action, reward, next_state, done, env_id=0):
+        self.memory.append(state, action, reward, next_state, done, env_id)
+
+    # 학습을 위한 미니 배치 데이터 샘플링 (prefetch 중이면 미리 준비된 미니 배치 사용)
+    def sample_batch(self):
+        if self.prefetcher is not None:
+            return self.prefetcher.get()
+        return self.collator.sample(self.memory, config.batch_size)
+
+    # 다음 미니 배치들을 미리 준비하는 prefetch thread 시작 / 종료
+    def start_prefetch(self, depth):
+        if self.prefetcher is None:
+            self.prefetcher = replay_memory.Prefetcher(self.memory, config.batch_size, self.device, config.pin_memory, depth)
+
+    def stop_prefetch(self):
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            self.prefetcher = None
 
     # 네트워크 모델 저장
     def save_model(self, load_model, train_mode):
@@ -599,13 +687,7 @@ class SACAgent():
         self.target_critic.train()
 
         # 학습을 위한 미니 배치 데이터 샘플링
-        mini_batch = random.sample(self.memory, config.batch_size)
-
-        state_batch = torch.cat([torch.tensor([mini_batch[i][0]]) for i in range(config.batch_size)]).float().to(self.device)
-        action_batch = torch.cat([torch.tensor([mini_batch[i][1]]) for i in range(config.batch_size)]).float().to(self.device)
-        reward_batch = torch.cat([torch.tensor([mini_batch[i][2]]) for i in range(config.batch_size)]).float().to(self.device)
-        next_state_batch = torch.cat([torch.tensor([mini_batch[i][3]]) for i in range(config.batch_size)]).float().to(self.device)
-        done_batch = torch.cat([torch.tensor([mini_batch[i][4]]) for i in range(config.batch_size)]).float().to(self.device)
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, weight_batch, index_batch = self.sample_batch()
 
         # get Q values (Q1, Q2)
         Q1, Q2 = self.critic(state_batch, action_batch)
@@ -652,15 +734,11 @@ class SACAgent():
 
     # 타겟 네트워크 업데이트 : hard update
     def hard_update_target(self):
-        self.target_critic.load_state_dict(self.critic.state_dict())
+        self.target_updater.hard_update()
 
     # 타겟 네트워크 업데이트 : soft update
     def soft_update_target(self):
-        self.soft_update(self.critic, self.target_critic, config.tau)
-
-    def soft_update(self, model, target_model, tau):
-        for target_param, param in zip(target_model.parameters(), model.parameters()):
-            target_param.data.copy_(tau*param.data + (1-tau)*target_param.data)
+        self.target_updater.soft_update(config.tau)
 
     def write_scalar(self, loss_critic1, loss_critic2, loss_actor, loss_alpha, reward, maxQ, alpha, episode):
         self.writer.add_scalar('Mean_Loss_Critic1', loss_critic1, episode)
@@ -0,0 +1,9 @@
+from algorithms.base import Algorithm, register, registry
+from algorithms import dqn, double_dqn, dueling_dqn, noisy_dqn, icm_dqn, rnd_dqn, ddpg, sac
+
+
+# 이름에 해당하는 알고리즘 생성
+def make(name):
+    if name not in registry:
+        raise ValueError("Unknown algorithm: {} (available: {})".format(name, ", ".join(sorted(registry))))
+    return registry[name]()
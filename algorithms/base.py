@@ -0,0 +1,60 @@
+# 이름으로 알고리즘을 찾기 위한 registry (trainer.run 에서 사용)
+registry = {}
+
+
+def register(name):
+    def decorator(cls):
+        registry[name] = cls
+        return cls
+    return decorator
+
+
+# Algorithm 클래스 -> trainer 의 학습 루프에서 호출하는 hook 정의
+# 알고리즘마다 agent 생성, 행동 결정, 학습, 타겟 네트워크 업데이트, 진행 상황 기록 방식을 다르게 구현
+class Algorithm():
+    # 시각적 관측 (frame stacking) 사용 여부
+    visual = True
+
+    # learn 이 반환하는 값들의 이름 (print_episode 마다 평균하여 log 에 전달)
+    metrics = ()
+
+    # 행동 결정에 사용하는 agent 의 네트워크 (비동기 학습 시 actor 용으로 복사하여 주기적으로 동기화)
+    acting_models = ("model",)
+
+    # Ape-X (apex.py) 의 actor process 에서 사용 가능 여부 (priority 를 구현한 알고리즘만 사용 가능)
+    distributed = False
+
+    # Ape-X 에서 actor 대신 inference server 가 배치로 네트워크 연산 가능 여부 (infer, use_inference 구현)
+    inference = False
+
+    # agent (네트워크, 옵티마이저 포함) 생성
+    def build(self, device):
+        raise NotImplementedError
+
+    # 모든 환경의 행동을 배치로 결정
+    def act(self, agent, state, step, train_mode):
+        raise NotImplementedError
+
+    # inference server 에서 여러 actor 의 상태를 모아 한번에 수행하는 행동 결정의 네트워크 연산 (탐험은 각 actor 에서 적용)
+    def infer(self, agent, state):
+        raise NotImplementedError
+
+    # actor 의 agent 가 네트워크 연산 대신 inference server 의 client 를 사용하도록 설정
+    def use_inference(self, agent, client):
+        raise NotImplementedError
+
+    # 학습 1회 수행 후 metrics 순서대로 값 반환
+    def learn(self, agent):
+        raise NotImplementedError
+
+    # actor 에서 계산하는 transition 들의 초기 우선순위 (Ape-X)
+    def priority(self, agent, state, action, reward, next_state, done):
+        raise NotImplementedError
+
+    # 학습 후 타겟 네트워크 업데이트 (num_envs : 이전 학습 이후 진행된 환경 step 수)
+    def update_target(self, agent, step, num_envs):
+        pass
+
+    # 게임 진행 상황 출력 및 텐서 보드에 보상과 손실함수 값 기록
+    def log(self, agent, step, episode, reward, metrics, train_mode):
+        raise NotImplementedError
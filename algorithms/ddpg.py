@@ -0,0 +1,45 @@
+import torch.optim as optim
+
+import agent
+import model
+import config
+from algorithms.base import Algorithm, register
+
+
+@register("DDPG")
+class DDPG(Algorithm):
+    visual = False
+    metrics = ("loss_critic", "loss_actor", "maxQ")
+    acting_models = ("actor",)
+
+    def build(self, device):
+        actor = model.Actor(config.action_size, "main").to(device)
+        target_actor = model.Actor(config.action_size, "target").to(device)
+        critic = model.Critic(config.action_size, "main").to(device)
+        target_critic = model.Critic(config.action_size, "target").to(device)
+
+        optimizer_actor = optim.Adam(actor.parameters(), lr=config.actor_lr)
+        optimizer_critic = optim.Adam(critic.parameters(), lr=config.critic_lr)
+
+        agent_ = agent.DDPGAgent(actor, critic, target_actor, target_critic, optimizer_actor, optimizer_critic, device, "_DDPG")
+
+        # Initialize target networks
+        agent_.hard_update_target()
+        return agent_
+
+    def act(self, agent, state, step, train_mode):
+        return agent.get_action(state, train_mode)
+
+    def learn(self, agent):
+        return agent.train_model()
+
+    # 타겟 네트워크 업데이트 : 학습마다 soft update
+    def update_target(self, agent, step, num_envs):
+        agent.soft_update_target()
+
+    def log(self, agent, step, episode, reward, metrics, train_mode):
+        print("step: {} / episode: {} / reward: {:.2f} / loss_critic: {:.4f}/ loss_actor: {:.4f}/ maxQ: {:.2f}".format
+              (step, episode, reward, metrics["loss_critic"], metrics["loss_actor"], metrics["maxQ"]))
+
+        if train_mode:
+            agent.write_scalar(metrics["loss_critic"], metrics["loss_actor"], reward, metrics["maxQ"], episode)
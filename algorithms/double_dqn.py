@@ -0,0 +1,19 @@
+import torch.optim as optim
+
+import agent
+import model
+import config
+from algorithms.base import register
+from algorithms.dqn import DQN
+
+
+@register("DoubleDQN")
+class DoubleDQN(DQN):
+    def build(self, device):
+        model_ = model.DQN(config.action_size, "main").to(device)
+        target_model_ = model.DQN(config.action_size, "target").to(device)
+        optimizer = optim.Adam(model_.parameters(), lr=config.learning_rate)
+        return agent.DQNAgent(model_, target_model_, optimizer, device, "_DoubleDQN")
+
+    def learn(self, agent):
+        return agent.train_model_double()
@@ -0,0 +1,51 @@
+import numpy as np
+import torch.optim as optim
+
+import agent
+import model
+import config
+from algorithms.base import Algorithm, register
+
+
+@register("DQN")
+class DQN(Algorithm):
+    metrics = ("loss", "maxQ")
+    distributed = True
+    inference = True
+
+    def build(self, device):
+        model_ = model.DQN(config.action_size, "main").to(device)
+        target_model_ = model.DQN(config.action_size, "target").to(device)
+        optimizer = optim.Adam(model_.parameters(), lr=config.learning_rate)
+        return agent.DQNAgent(model_, target_model_, optimizer, device, "_DQN")
+
+    def act(self, agent, state, step, train_mode):
+        if not train_mode:
+            agent.epsilon = 0.0
+        # Epsilon 감소 (학습 시작 후 환경 step 기준, Ape-X 의 actor 는 고정된 epsilon 사용)
+        elif not agent.fixed_epsilon and step > config.start_train_step and agent.epsilon > config.epsilon_min:
+            agent.epsilon -= len(state) / (config.run_step - config.start_train_step)
+        return agent.get_action(state)
+
+    def infer(self, agent, state):
+        return agent.greedy_action(state)
+
+    def use_inference(self, agent, client):
+        agent.inference = client
+
+    def learn(self, agent):
+        return agent.train_model()
+
+    def priority(self, agent, state, action, reward, next_state, done):
+        return np.abs(agent.td_error(state, action, reward, next_state, done))
+
+    def update_target(self, agent, step, num_envs):
+        if step % config.target_update_step < num_envs:
+            agent.update_target()
+
+    def log(self, agent, step, episode, reward, metrics, train_mode):
+        print("step: {} / episode: {} / reward: {:.2f} / loss: {:.4f} / maxQ: {:.2f} / epsilon: {:.4f}".format
+              (step, episode, reward, metrics["loss"], metrics["maxQ"], agent.epsilon))
+
+        if not config.load_model:
+            agent.write_scalar(metrics["loss"], reward, metrics["maxQ"], episode)
@@ -0,0 +1,39 @@
+import torch.optim as optim
+
+import agent
+import model
+import config
+from algorithms.base import register
+from algorithms.dqn import DQN
+
+
+@register("ICM_DQN")
+class ICM_DQN(DQN):
+    metrics = ("loss", "maxQ", "r_i", "loss_rl", "loss_fm", "loss_im")
+
+    def build(self, device):
+        model_ = model.DQN(config.action_size, "main").to(device)
+        target_model_ = model.DQN(config.action_size, "target").to(device)
+        model_ICM = model.ICM(config.action_size, "ICM").to(device)
+        models = [model_, model_ICM]
+
+        optimizer = optim.Adam(list(models[0].parameters()) + list(models[1].parameters()), lr=config.learning_rate)
+        return agent.DQNAgent(models, target_model_, optimizer, device, "_ICM")
+
+    def act(self, agent, state, step, train_mode):
+        # 학습 시작 후에는 호기심 (intrinsic reward) 으로 탐험 (Ape-X 의 actor 는 actor 마다 정한 epsilon 을 유지)
+        if step > config.start_train_step and train_mode and not agent.fixed_epsilon:
+            agent.epsilon = 0
+        return agent.get_action(state)
+
+    def learn(self, agent):
+        return agent.train_model_ICM()
+
+    def log(self, agent, step, episode, reward, metrics, train_mode):
+        print("step: {} / episode: {} / reward: {:.2f} / loss_tot: {:.4f} / loss_rl: {:.4f} / loss_fm: {:.6f} / loss_im: {:.4f} / maxQ: {:.2f} / reward_i: {:.6f}".format
+              (step, episode, reward, metrics["loss"], config.lamb*metrics["loss_rl"],
+              config.beta*metrics["loss_fm"], (1-config.beta)*metrics["loss_im"], metrics["maxQ"], 100*metrics["r_i"]))
+
+        if train_mode:
+            agent.write_scalar_ICM(metrics["loss"], reward, metrics["maxQ"], metrics["r_i"], episode,
+                                   metrics["loss_rl"], metrics["loss_fm"], metrics["loss_im"])
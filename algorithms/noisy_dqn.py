@@ -0,0 +1,38 @@
+import torch
+import torch.optim as optim
+
+import agent
+import model
+import config
+from algorithms.base import register
+from algorithms.dqn import DQN
+
+
+@register("NoisyDQN")
+class NoisyDQN(DQN):
+    # noisy network 의 noise 는 actor 마다 따로 sampling 하므로 inference server 는 사용하지 않음
+    inference = False
+
+    def build(self, device):
+        model_ = model.NoisyDQNHay(config.action_size).to(device)
+        target_model_ = model.NoisyDQNHay(config.action_size).to(device)
+        optimizer = optim.Adam(model_.parameters(), lr=config.learning_rate)
+        agent_ = agent.DQNAgent(model_, target_model_, optimizer, device, "_NoisyDQN")
+
+        # 탐험은 noisy network 로 하므로 epsilon 사용하지 않음
+        agent_.epsilon = 0.0
+        return agent_
+
+    def act(self, agent, state, step, train_mode):
+        return agent.get_action_noisy(state, step, train_mode)
+
+    def learn(self, agent):
+        return agent.train_model_noisy()
+
+    def log(self, agent, step, episode, reward, metrics, train_mode):
+        print("step: {} / episode: {} / reward: {:.2f} / loss: {:.4f} / maxQ: {:.2f} / epsilon: {:.4f} / w_sig2: {:.5f} / b_sig2: {:.5f}".format
+              (step, episode, reward, metrics["loss"], metrics["maxQ"], agent.epsilon,
+              torch.mean(agent.model.linear2.w_sig), torch.mean(agent.model.linear2.b_sig)))
+
+        if not config.load_model:
+            agent.write_scalar(metrics["loss"], reward, metrics["maxQ"], episode)
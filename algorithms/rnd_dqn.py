@@ -0,0 +1,41 @@
+import torch.optim as optim
+
+import agent
+import model
+import config
+from algorithms.base import register
+from algorithms.icm_dqn import ICM_DQN
+
+
+@register("RND_DQN")
+class RND_DQN(ICM_DQN):
+    metrics = ("loss", "maxQ", "r_i", "loss_rl", "loss_fm")
+
+    def build(self, device):
+        model_ = model.DQN(config.action_size, "main").to(device)
+        target_model_ = model.DQN(config.action_size, "target").to(device)
+        model_RND = model.RND(config.action_size, "RND").to(device)
+        models = [model_, model_RND]
+
+        # optimizer 에 넣기 위하여 RND model 에서 학습을 진행할 parameter 만 뽑음
+        param_active_list = []
+        for name, param in model_RND.named_parameters():
+            if str(name).startswith('model_active'):
+                param_active_list.append(param)
+            elif str(name).startswith('model_frozen'):
+                param.requires_grad = False
+
+        optimizer = optim.Adam(list(model_.parameters()) + list(param_active_list), lr=config.learning_rate)
+        return agent.DQNAgent(models, target_model_, optimizer, device, "_RND")
+
+    def learn(self, agent):
+        return agent.train_model_RND()
+
+    def log(self, agent, step, episode, reward, metrics, train_mode):
+        print("step: {} / episode: {} / reward: {:.2f} / loss_tot: {:.4f} / loss_rl: {:.4f} / loss_fm: {:.6f} / maxQ: {:.2f} / reward_i: {:.6f}".format
+              (step, episode, reward, metrics["loss"], config.lamb*metrics["loss_rl"],
+              config.beta*metrics["loss_fm"], metrics["maxQ"], 100*metrics["r_i"]))
+
+        if train_mode:
+            agent.write_scalar_ICM(metrics["loss"], reward, metrics["maxQ"], metrics["r_i"], episode,
+                                   metrics["loss_rl"], metrics["loss_fm"])
@@ -0,0 +1,42 @@
+import torch
+import torch.optim as optim
+
+import agent
+import model
+import config
+from algorithms.base import register
+from algorithms.ddpg import DDPG
+
+
+@register("SAC")
+class SAC(DDPG):
+    metrics = ("loss_critic1", "loss_critic2", "loss_actor", "loss_alpha", "maxQ", "alpha")
+
+    def build(self, device):
+        actor = model.ActorSAC(config.action_size, "main").to(device)
+        critic = model.CriticSAC(config.action_size, "main").to(device)
+        target_critic = model.CriticSAC(config.action_size, "target").to(device)
+
+        optimizer_actor = optim.Adam(actor.parameters(), lr=config.actor_lr)
+        optimizer_critic = optim.Adam(critic.parameters(), lr=config.critic_lr)
+
+        # initialize automatic entropy tuning
+        target_entropy = -torch.prod(torch.Tensor(config.action_size)).to(device).item()
+        log_alpha = torch.zeros(1, requires_grad=True, device=device)
+        alpha = log_alpha.exp()
+        optimizer_alpha = optim.Adam([log_alpha], lr=config.alpha_lr)
+
+        agent_ = agent.SACAgent(actor, critic, target_critic, optimizer_actor, optimizer_critic, optimizer_alpha, alpha, log_alpha, target_entropy, device, "_SAC")
+
+        # Initialize target networks
+        agent_.hard_update_target()
+        return agent_
+
+    def log(self, agent, step, episode, reward, metrics, train_mode):
+        print("step: {} / episode: {} / reward: {:.2f} / loss_critic1: {:.4f}/ loss_critic2: {:.4f}/ loss_actor: {:.4f}/ loss_alpha: {:.4f}/ maxQ: {:.2f}/ alpha: {:.4f}".format
+              (step, episode, reward, metrics["loss_critic1"], metrics["loss_critic2"],
+              metrics["loss_actor"], metrics["loss_alpha"], metrics["maxQ"], metrics["alpha"]))
+
+        if train_mode:
+            agent.write_scalar(metrics["loss_critic1"], metrics["loss_critic2"], metrics["loss_actor"], metrics["loss_alpha"],
+                               reward, metrics["maxQ"], metrics["alpha"], episode)
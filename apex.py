@@ -0,0 +1,424 @@
+import copy
+import time
+import types
+import queue
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+
+import numpy as np
+import torch
+
+import config
+import vector_env
+import replay_memory
+import algorithms
+from trainer import Learner
+from inference_server import InferenceServer
+
+
+# Ape-X (Distributed Prioritized Experience Replay)
+# - actor process : 각자의 worker_id 의 환경과 epsilon 으로 행동하고, transition 과 초기 우선순위를 replay process 로 전송
+# - replay process : 모든 actor 의 transition 을 Prioritized Experience Replay 메모리에 저장하고 learner 의 요청에 따라 샘플링
+# - learner (main process) : replay process 에서 받은 미니 배치로 학습하고, 네트워크를 shared memory 로 actor 들에게 전달
+# - inference server (apex_inference_server) : learner process 의 thread 에서 actor 들의 상태를 모아 배치로 행동 결정
+
+
+# main process 에서 바꾼 config 값들 (spawn 으로 시작한 process 는 config.py 를 다시 import 하므로 인자로 전달하여 적용)
+def config_settings():
+    return {name: value for name, value in vars(config).items()
+            if not name.startswith("_") and not isinstance(value, types.ModuleType)}
+
+
+def apply_config_settings(settings):
+    for name, value in settings.items():
+        setattr(config, name, value)
+
+
+# i 번째 actor 의 epsilon (actor 마다 탐험 정도를 다르게 설정)
+def actor_epsilon(actor_id, num_actors):
+    if num_actors == 1:
+        return config.apex_epsilon
+    return config.apex_epsilon ** (1 + config.apex_alpha * actor_id / (num_actors - 1))
+
+
+# SharedWeights 클래스 -> learner 의 네트워크 가중치를 shared memory 의 하나의 tensor 에 복사하여 actor 들에게 전달
+# version 이 바뀐 경우에만 actor 가 가중치를 읽어감
+class SharedWeights():
+    def __init__(self, models):
+        self.shapes = [[(key, value.shape) for key, value in model.state_dict().items()] for model in models]
+        size = sum(value.numel() for model in models for value in model.state_dict().values())
+        self.buffer = torch.zeros(size).share_memory_()
+        self.version = multiprocessing.Value('l', 0)
+
+    def _slices(self, models):
+        offset = 0
+        for model, shapes in zip(models, self.shapes):
+            state_dict = model.state_dict()
+            for key, shape in shapes:
+                size = int(np.prod(shape))
+                yield state_dict[key], self.buffer[offset:offset + size].view(shape)
+                offset += size
+
+    def publish(self, models):
+        with self.version.get_lock():
+            with torch.no_grad():
+                for value, shared in self._slices(models):
+                    shared.copy_(value)
+            self.version.value += 1
+
+    # version 이 바뀌었으면 가중치를 복사하고 새 version 반환
+    def load(self, models, version=-1):
+        with self.version.get_lock():
+            if self.version.value == version:
+                return version
+            with torch.no_grad():
+                for value, shared in self._slices(models):
+                    value.copy_(shared)
+            return self.version.value
+
+
+# TransitionBuffer 클래스 -> actor 의 transition 을 모았다가 초기 우선순위와 함께 한번에 replay process 로 전송
+# VectorActor 에서 agent 대신 사용 (append_sample)
+class TransitionBuffer():
+    def __init__(self, algorithm, agent, conn, send_size):
+        self.algorithm = algorithm
+        self.agent = agent
+        self.conn = conn
+        self.send_size = send_size
+        self.samples = []
+
+    # VectorActor 의 상태는 FrameStacker 의 출력 버퍼이므로 전송할 때까지 복사하여 보관
+    def append_sample(self, state, action, reward, next_state, done, env_id=0):
+        self.samples.append((np.copy(state), action, reward, np.copy(next_state), done))
+        if len(self.samples) >= self.send_size:
+            self.flush()
+
+    def flush(self):
+        if not self.samples:
+            return
+        state, action, reward, next_state, done = [np.stack(field) for field in zip(*self.samples)]
+        reward = reward.astype(np.float32)
+        done = done.astype(np.float32)
+        priority = self.algorithm.priority(self.agent, state, action, reward, next_state, done)
+        self.conn.send(("append", state, action, reward, next_state, done, priority))
+        self.samples = []
+
+
+def actor_process(settings, algorithm, actor_id, num_actors, base_worker_id, conn, episode_queue, weights, env_step, stop_event, inference=None):
+    apply_config_settings(settings)
+    # actor 들이 CPU 를 나누어 사용하도록 thread 는 하나만 사용
+    torch.set_num_threads(1)
+    np.random.seed(actor_id)
+
+    # 텐서 보드에는 actor 마다 별도의 경로에 에피소드 보상을 기록, epsilon 은 감소시키지 않고 고정
+    # actor 는 항상 학습 모드로 탐험하고 보상을 기록
+    config.train_mode = True
+    config.save_path = config.save_path + "/actor_{}".format(actor_id)
+    config.epsilon_min = actor_epsilon(actor_id, num_actors)
+    agent = algorithm.build(torch.device("cpu"))
+    agent.epsilon = config.epsilon_min
+    agent.fixed_epsilon = True
+    acting_models = [getattr(agent, name) for name in algorithm.acting_models]
+    version = weights.load(acting_models)
+    # inference server 를 사용하면 네트워크 연산은 server 에서 하므로 가중치를 갱신하지 않음
+    if inference is not None:
+        algorithm.use_inference(agent, inference)
+
+    env = vector_env.make_env(base_worker_id=base_worker_id + actor_id * config.num_envs)
+    episode = 0
+    try:
+        brain_name = list(env.external_brains.keys())[0]
+        buffer = TransitionBuffer(algorithm, agent, conn, config.apex_send_size)
+        actor = vector_env.VectorActor(env, brain_name, buffer, visual=algorithm.visual)
+        actor.reset(env.reset(train_mode=True, config=config.env_config)[brain_name])
+
+        while not stop_event.is_set() and env_step.value < config.run_step:
+            action = algorithm.act(agent, actor.state, env_step.value, True)
+            for episode_reward in actor.step(action, True):
+                episode_queue.put(episode_reward)
+                agent.writer.add_scalar('Actor_Reward', episode_reward, episode)
+                episode += 1
+
+            with env_step.get_lock():
+                env_step.value += actor.num_envs
+
+            # learner 가 새 가중치를 전달했으면 actor 네트워크 갱신
+            if inference is None:
+                version = weights.load(acting_models, version)
+    finally:
+        env.close()
+        conn.close()
+        if inference is not None:
+            inference.close()
+
+
+def replay_process(settings, actor_conns, learner_conn):
+    apply_config_settings(settings)
+    beta_increment = (1.0 - config.per_beta) / max(1, config.run_step - config.start_train_step)
+    sampler = replay_memory.PrioritizedSampler(config.mem_maxlen, config.per_alpha, config.per_beta, beta_increment, config.per_eps)
+    memory = replay_memory.ReplayMemory(config.mem_maxlen, sampler)
+
+    # 메모리에 start_train_step 개의 transition 이 쌓일 때까지 learner 의 샘플링 요청은 대기
+    pending = 0
+    min_size = max(config.batch_size, min(config.start_train_step, config.mem_maxlen))
+
+    # learner 가 미니 배치를 바로 받지 않아도 actor 의 transition 을 계속 저장할 수 있도록 전송은 별도의 thread 에서 수행
+    # (daemon thread 이므로 종료 시 보내지 못한 미니 배치는 버림)
+    send_queue = queue.Queue()
+
+    def send():
+        while True:
+            batch = send_queue.get()
+            try:
+                learner_conn.send(batch)
+            except (BrokenPipeError, EOFError):
+                return
+
+    sender = threading.Thread(target=send, daemon=True)
+    sender.start()
+
+    conns = list(actor_conns) + [learner_conn]
+    while True:
+        for conn in wait(conns):
+            try:
+                message = conn.recv()
+            except EOFError:
+                # 종료된 actor
+                conns.remove(conn)
+                if conn is learner_conn:
+                    break
+                continue
+
+            name = message[0]
+            if name == "append":
+                state, action, reward, next_state, done, priority = message[1:]
+                index = (memory.index + np.arange(len(state))) % memory.maxlen
+                for i in range(len(state)):
+                    memory.append(state[i], action[i], reward[i], next_state[i], done[i])
+                memory.update_priority(index, priority)
+            elif name == "sample":
+                pending += 1
+            elif name == "update_priority":
+                memory.update_priority(message[1], message[2])
+            elif name == "close":
+                conns.remove(conn)
+                break
+
+        if learner_conn not in conns:
+            break
+
+        while pending > 0 and len(memory) >= min_size:
+            index = memory.sample_index(config.batch_size)
+            send_queue.put((memory.get_batch(index), memory.sample_weight(index), index, len(memory)))
+            pending -= 1
+
+
+# ReplayClient 클래스 -> learner 에서 replay process 의 메모리를 사용하기 위한 client
+# agent 의 prefetcher (get) 와 memory (update_priority) 대신 사용하며, 미니 배치를 받으면 바로 다음 미니 배치를 요청하여
+# replay process 의 샘플링과 learner 의 학습이 동시에 진행되도록 함
+class ReplayClient():
+    def __init__(self, conn, device):
+        self.conn = conn
+        self.device = device
+        self.requested = False
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def get(self):
+        if not self.requested:
+            self.conn.send(("sample",))
+        batch, weight, index, self.size = self.conn.recv()
+        self.conn.send(("sample",))
+        self.requested = True
+
+        batch = tuple(torch.from_numpy(field).to(self.device).float() for field in batch)
+        return batch + (torch.from_numpy(weight).float().to(self.device), index)
+
+    def update_priority(self, index, td_error):
+        self.conn.send(("update_priority", index, td_error))
+
+    def close(self):
+        pass
+
+
+# ApeX 클래스 -> actor / replay process 를 실행하고 main process 에서 learner 로 학습
+class ApeX():
+    def __init__(self, algorithm, num_actors, inference_server=None):
+        if not algorithm.distributed:
+            raise ValueError("{} does not support Ape-X".format(type(algorithm).__name__))
+        self.inference_server = config.apex_inference_server if inference_server is None else inference_server
+        if self.inference_server and not algorithm.inference:
+            raise ValueError("{} does not support the inference server".format(type(algorithm).__name__))
+        self.algorithm = algorithm
+        self.num_actors = num_actors
+        self.learner = None
+        self.server = None
+        self.env_step = multiprocessing.Value('l', 0)
+        self.elapsed = 0.0
+
+    def run(self):
+        algorithm = self.algorithm
+
+        # 우선순위는 replay process 의 PER 메모리에서 사용
+        config.prioritized_memory = True
+        config.train_mode = True
+        base_worker_id = np.random.randint(60000 - self.num_actors * config.num_envs)
+
+        agent = algorithm.build(config.device)
+        acting_models = [getattr(agent, name) for name in algorithm.acting_models]
+        weights = SharedWeights(acting_models)
+        weights.publish(acting_models)
+
+        # inference server 는 학습 중인 네트워크가 아닌, 가중치를 전달할 때마다 갱신하는 복사본으로 행동 결정
+        clients = [None] * self.num_actors
+        if self.inference_server:
+            inference_agent = copy.copy(agent)
+            for name in algorithm.acting_models:
+                setattr(inference_agent, name, copy.deepcopy(getattr(agent, name)))
+            self.inference_models = [getattr(inference_agent, name) for name in algorithm.acting_models]
+            self.server = InferenceServer(lambda state: algorithm.infer(inference_agent, state),
+                                          config.inference_max_batch_size, config.inference_max_wait)
+            clients = [self.server.connect() for _ in range(self.num_actors)]
+
+        episode_queue = multiprocessing.Queue()
+        stop_event = multiprocessing.Event()
+        learner_conn, replay_learner_conn = multiprocessing.Pipe()
+        actor_conns = [multiprocessing.Pipe(duplex=False) for _ in range(self.num_actors)]
+
+        # num_envs 가 1 보다 크면 actor 가 SubprocessUnityEnvironment 의 worker process 를 만들어야 하므로
+        # actor 는 daemon process 로 만들지 않음 (종료는 아래의 stop_event / join / terminate 로 처리)
+        # fork 가 아닌 spawn (Windows, macOS 의 기본값) 으로 시작해도 위에서 바꾼 config 값을 사용하도록 함께 전달
+        settings = config_settings()
+        processes = [multiprocessing.Process(target=replay_process, args=(settings, [recv for recv, _ in actor_conns], replay_learner_conn), daemon=True)]
+        for actor_id, (_, send) in enumerate(actor_conns):
+            processes.append(multiprocessing.Process(target=actor_process,
+                                                     args=(settings, algorithm, actor_id, self.num_actors, base_worker_id, send, episode_queue, weights, self.env_step, stop_event, clients[actor_id])))
+        for process in processes:
+            process.start()
+        # main process 에서는 사용하지 않는 pipe 의 끝을 닫아 process 가 종료되면 EOFError 가 발생하도록 함
+        replay_learner_conn.close()
+        for recv, send in actor_conns:
+            recv.close()
+            send.close()
+        for client in clients:
+            if client is not None:
+                client.close()
+
+        client = ReplayClient(learner_conn, config.device)
+        agent.memory = client
+        agent.prefetcher = client
+        self.learner = Learner(algorithm, agent, config.replay_ratio, False)
+
+        try:
+            self.loop(agent, weights, episode_queue, processes)
+        finally:
+            # actor 들이 종료된 후 replay process 종료
+            stop_event.set()
+            for process in processes[1:] + processes[:1]:
+                if process is processes[0]:
+                    try:
+                        learner_conn.send(("close",))
+                    except (BrokenPipeError, EOFError):
+                        pass
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+            learner_conn.close()
+            agent.prefetcher = None
+            if self.server is not None:
+                self.server.close()
+
+    # 학습한 네트워크를 actor 들에게 전달 (inference server 는 연산 중이 아닐 때 복사본 갱신)
+    def publish(self, weights, acting_models):
+        if self.server is None:
+            weights.publish(acting_models)
+            return
+        with self.server.lock:
+            with torch.no_grad():
+                for model, inference_model in zip(acting_models, self.inference_models):
+                    inference_model.load_state_dict(model.state_dict())
+
+    def loop(self, agent, weights, episode_queue, processes):
+        algorithm = self.algorithm
+        learner = self.learner
+        acting_models = [getattr(agent, name) for name in algorithm.acting_models]
+        agent.epsilon = config.apex_epsilon
+
+        episode = 0
+        reward_list = []
+        published_step = 0
+        saved_step = 0
+
+        # 학습 상태 출력을 위한 이전 기록
+        start_time = time.perf_counter()
+        last_time = start_time
+        last_busy_time = 0.0
+        last_step = 0
+        last_learn_step = 0
+
+        while True:
+            step = self.env_step.value
+            if step >= config.run_step:
+                break
+
+            for process in processes:
+                if process.exitcode is not None:
+                    raise RuntimeError("Ape-X process {} exited with code {}".format(process.name, process.exitcode))
+
+            # replay ratio 를 넘지 않도록 학습 수행 (actor 는 learner 를 기다리지 않으므로 learner 가 느리면 replay ratio 가 낮아짐)
+            # 한번에 하나씩 학습하여 학습하는 동안에도 종료 조건과 에피소드 결과를 확인
+            learned = False
+            if step > config.start_train_step:
+                learner.env_step = step
+                if learner.learn_step < learner.target_step():
+                    learner.learn()
+                    learned = True
+
+                # 학습한 네트워크를 actor 들 (inference server) 에게 전달
+                if learner.learn_step - published_step >= config.weight_sync_step:
+                    self.publish(weights, acting_models)
+                    published_step = learner.learn_step
+
+            if step // config.save_step > saved_step // config.save_step:
+                agent.save_model(config.load_model, True)
+                saved_step = step
+
+            episode_rewards = []
+            try:
+                while True:
+                    episode_rewards.append(episode_queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not episode_rewards and not learned:
+                time.sleep(0.001)
+
+            # 게임 진행 상황 출력 및 텐서 보드에 보상과 손실함수 값 기록 (모든 actor 의 에피소드 기준)
+            # 학습하는 동안 여러 에피소드가 끝난 경우 한번만 출력
+            reward_list += episode_rewards
+            episode += len(episode_rewards)
+            if episode // config.print_episode > (episode - len(episode_rewards)) // config.print_episode:
+                step = self.env_step.value
+                algorithm.log(agent, step, episode, np.mean(reward_list), learner.pop_metrics(), True)
+                reward_list = []
+
+                now = time.perf_counter()
+                print("actors: {} / learner utilization: {:.1f}% / replay ratio: {:.2f} / replay memory: {} / env steps/s: {:.1f}".format
+                      (self.num_actors, 100 * (learner.busy_time - last_busy_time) / (now - last_time),
+                       (learner.learn_step - last_learn_step) / max(1, step - last_step), len(agent.memory), (step - last_step) / (now - last_time)))
+                if self.server is not None:
+                    stats = self.server.pop_stats()
+                    print("inference batches: {} / batch size: mean {:.1f}, p50 {}, p90 {}, max {} / requests per batch: {:.1f} / wait: {:.2f} ms".format
+                          (stats["batches"], stats["mean"], stats["p50"], stats["p90"], stats["max"], stats["requests"], 1000 * stats["wait"]))
+                last_time, last_busy_time = now, learner.busy_time
+                last_step, last_learn_step = step, learner.learn_step
+
+        self.elapsed = time.perf_counter() - start_time
+        agent.save_model(config.load_model, True)
+
+
+# 이름으로 알고리즘을 선택하여 num_actors 개의 actor 로 Ape-X 학습 실행
+def run(name, num_actors):
+    ApeX(algorithms.make(name), num_actors).run()
@@ -0,0 +1,114 @@
+# Benchmark : agent 별 행동 결정 (get_action) 한번의 지연 시간 비교 (환경 하나, CPU)
+# before : no_grad (SAC 는 autograd 그래프 생성), step 마다 입력 tensor 생성, NoisyDQN 은 train_mode 를 device tensor 로 만들고
+#          evaluation 시에도 noise 를 sampling, DDPG 는 evaluation 시에도 OU noise 를 sampling
+# after  : inference_mode 와 StateBuffer 로 행동 결정, evaluation 시에는 noise 를 만들지 않음
+# SAC 의 기존 evaluation (Normal(mu, 0)) 은 표준편차 0 을 허용하지 않는 torch 에서 에러가 발생하므로 n/a 로 표시
+# Usage : python benchmark/bench_acting.py
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.distributions import Normal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import model
+import algorithms
+
+# Parameter Setting
+num_calls = 500
+visual_state_size = [80, 80, 1]
+vector_state_size = 8
+config.stack_frame = 4
+config.action_size = 4
+config.load_model = False
+config.train_mode = False
+
+
+# 기존 행동 결정
+def legacy_dqn(agent, state, train_mode):
+    with torch.no_grad():
+        Q = agent.model(torch.from_numpy(state).to(agent.device))
+        return np.argmax(Q.cpu().numpy(), axis=1)
+
+
+def legacy_noisy_dqn(agent, state, train_mode):
+    Q = agent.model(torch.from_numpy(state).to(agent.device), torch.tensor(train_mode).to(agent.device))
+    return np.argmax(Q.cpu().detach().numpy(), axis=1)
+
+
+def legacy_noisy_linear_forward(self, x, train):
+    w_eps = torch.randn((self.n_out, self.n_in))
+    b_eps = torch.randn((self.n_out))
+    if train:
+        w = self.w_mu + F.relu(self.w_sig) * w_eps
+        b = self.b_mu + F.relu(self.b_sig) * b_eps
+    else:
+        w = self.w_mu
+        b = self.b_mu
+    return F.linear(x, w, b)
+
+
+def legacy_ddpg(agent, state, train_mode):
+    with torch.no_grad():
+        policy = agent.actor(torch.from_numpy(state).to(agent.device))
+        action = policy.cpu().detach().numpy()
+        noise = agent.ou_noise.sample(len(state))
+        return action + noise if train_mode else action
+
+
+def legacy_sac(agent, state, train_mode):
+    mu, std = agent.actor(torch.from_numpy(state).to(agent.device))
+    if not train_mode:
+        std = 0
+    m = Normal(mu, std)
+    z = m.rsample()
+    action = torch.tanh(z)
+    return action.data.cpu().detach().numpy()
+
+
+# (알고리즘 이름, 상태 크기, 기존 행동 결정, 현재 행동 결정)
+agents = [
+    ("DQN", visual_state_size, legacy_dqn, lambda agent, state, train_mode: agent.get_action(state)),
+    ("NoisyDQN", visual_state_size, legacy_noisy_dqn, lambda agent, state, train_mode: agent.get_action_noisy(state, 0, train_mode)),
+    ("DDPG", vector_state_size, legacy_ddpg, lambda agent, state, train_mode: agent.get_action(state, train_mode)),
+    ("SAC", vector_state_size, legacy_sac, lambda agent, state, train_mode: agent.get_action(state, train_mode)),
+]
+
+
+def measure(fn, agent, state, train_mode):
+    try:
+        for _ in range(10):
+            fn(agent, state, train_mode)
+    except (ValueError, RuntimeError):
+        return None
+    start = time.perf_counter()
+    for _ in range(num_calls):
+        fn(agent, state, train_mode)
+    return (time.perf_counter() - start) / num_calls
+
+
+if __name__ == '__main__':
+    torch.set_num_threads(1)
+    config.start_train_step = -1
+    for name, state_size, legacy, current in agents:
+        config.state_size = state_size
+        agent = algorithms.make(name).build(torch.device("cpu"))
+        agent.epsilon = 0.0
+        if isinstance(state_size, list):
+            state = np.random.randint(0, 256, (1, state_size[2] * config.stack_frame) + tuple(state_size[:2])).astype(np.float32)
+        else:
+            state = np.random.randn(1, state_size).astype(np.float32)
+
+        for train_mode in [True, False]:
+            forward = model.NoisyLinearHay.forward
+            model.NoisyLinearHay.forward = legacy_noisy_linear_forward
+            before = measure(legacy, agent, state, train_mode)
+            model.NoisyLinearHay.forward = forward
+            after = measure(current, agent, state, train_mode)
+            print("{:>8} / train_mode: {!s:>5} / before: {} / after: {:>7.3f} ms / speedup: {}".format(
+                name, train_mode, "{:>7.3f} ms".format(1000 * before) if before else "    n/a   ", 1000 * after,
+                "{:.2f}x".format(before / after) if before else "n/a"))
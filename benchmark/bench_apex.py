@@ -0,0 +1,51 @@
+# Benchmark : Ape-X 의 actor process 수에 따른 전체 샘플 수집 속도 (env steps/s) 비교
+# Unity 빌드 대신 step 마다 step_latency 만큼 Unity 의 응답을 기다리는 LocalEnvironment 를 사용하고,
+# learner 는 같은 machine 에서 replay ratio 를 넘지 않도록 학습하면서 actor 들에게 네트워크를 전달
+# Usage : python benchmark/bench_apex.py
+import os
+import sys
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+config.state_size = [80, 80, 1]
+config.stack_frame = 4
+config.skip_frame = 1
+import apex
+import algorithms
+
+# Parameter Setting
+num_actors_list = [1, 2, 4, 8]
+num_steps = 2000
+step_latency = 0.02
+batch_size = 32
+
+
+def run(num_actors):
+    apex_ = apex.ApeX(algorithms.make("DQN"), num_actors)
+    apex_.run()
+    learner = apex_.learner
+    return apex_.env_step.value / apex_.elapsed, learner.learn_step / apex_.elapsed
+
+
+if __name__ == '__main__':
+    config.local_env = True
+    config.local_step_latency = step_latency
+    config.load_model = False
+    config.save_path = os.path.join(tempfile.mkdtemp(), "bench")
+    config.batch_size = batch_size
+    config.mem_maxlen = num_steps
+    config.start_train_step = 4 * batch_size
+    config.run_step = num_steps
+    config.replay_ratio = 0.25
+    config.save_step = 10 ** 9
+    config.print_episode = 10 ** 9
+
+    print("cpu: {} / device: {} / env step latency: {:.1f} ms / replay ratio: {:.2f}".format
+          (multiprocessing.cpu_count(), config.device, 1000 * step_latency, config.replay_ratio))
+    base = None
+    for num_actors in num_actors_list:
+        rate, learn_rate = run(num_actors)
+        base = base or rate
+        print("num_actors: {} / {:>7.1f} env steps/s / {:.2f}x / {:>6.1f} learn steps/s".format(num_actors, rate, rate / base, learn_rate))
@@ -0,0 +1,89 @@
+# Benchmark : SubprocessUnityEnvironment 의 step 지연 시간이 환경마다 다를 때의 env steps/s 비교
+# before : step 으로 모든 환경에 행동을 보내고 가장 느린 환경이 끝날 때까지 기다린 후 정책 계산
+# after  : step_send / step_recv 로 먼저 끝난 batch_size 개의 환경에 대해서만 정책을 계산하고 행동을 보냄 (envpool 방식)
+# Unity 빌드 대신 매 step 지수 분포를 따르는 임의의 시간만큼 대기하는 LocalEnvironment 를 사용
+# Usage : python benchmark/bench_async_env.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import local_env
+from mlagents.envs.subprocess_environment import SubprocessUnityEnvironment
+
+# Parameter Setting
+num_envs_list = [4, 8, 16]
+num_steps = 2000
+state_size = 8
+action_size = 2
+# step 지연 시간 : min_latency + 평균 mean_latency 인 지수 분포 (초)
+min_latency = 0.001
+mean_latency = 0.005
+# 정책 계산 (GPU 추론) 에 걸리는 시간 (초)
+policy_time = 0.001
+
+
+# step 마다 지연 시간이 달라지는 LocalEnvironment
+class RandomLatencyEnvironment(local_env.LocalEnvironment):
+    def __init__(self, worker_id):
+        super(RandomLatencyEnvironment, self).__init__(worker_id=worker_id, state_size=state_size,
+                                                       action_size=action_size)
+        self.latency_random = np.random.RandomState(1000 + worker_id)
+
+    def step(self, vector_action=None, memory=None, text_action=None, value=None):
+        self.step_latency = min_latency + self.latency_random.exponential(mean_latency)
+        return super(RandomLatencyEnvironment, self).step(vector_action, memory, text_action, value)
+
+
+def make_env(worker_id):
+    return RandomLatencyEnvironment(worker_id)
+
+
+def policy(brain_info):
+    time.sleep(policy_time)
+    return np.zeros((len(brain_info.agents), action_size))
+
+
+def run_sync(num_envs):
+    env = SubprocessUnityEnvironment(make_env, num_envs)
+    brain_name = list(env.external_brains.keys())[0]
+    brain_info = env.reset(train_mode=True)[brain_name]
+
+    start = time.perf_counter()
+    for _ in range(num_steps // num_envs):
+        brain_info = env.step({brain_name: policy(brain_info)})[brain_name]
+    elapsed = time.perf_counter() - start
+
+    env.close()
+    return (num_steps // num_envs) * num_envs / elapsed
+
+
+def run_async(num_envs, batch_size):
+    env = SubprocessUnityEnvironment(make_env, num_envs)
+    brain_name = list(env.external_brains.keys())[0]
+    brain_info = env.reset(train_mode=True)[brain_name]
+    env_ids = list(range(num_envs))
+
+    env_steps = 0
+    start = time.perf_counter()
+    while env_steps < (num_steps // num_envs) * num_envs:
+        env.step_send(env_ids, {brain_name: policy(brain_info)})
+        env_ids, all_brain_info = env.step_recv(batch_size)
+        brain_info = all_brain_info[brain_name]
+        env_steps += len(env_ids)
+    elapsed = time.perf_counter() - start
+
+    env.step_recv()
+    env.close()
+    return env_steps / elapsed
+
+
+if __name__ == '__main__':
+    for num_envs in num_envs_list:
+        before = run_sync(num_envs)
+        for batch_size in [num_envs // 2, num_envs // 4]:
+            after = run_async(num_envs, batch_size)
+            print("num_envs: {:>2d} / batch_size: {:>2d} / before: {:>7.1f} env steps/s / after: {:>7.1f} env steps/s / "
+                  "speedup: {:.2f}x".format(num_envs, batch_size, before, after, after / before))
@@ -0,0 +1,56 @@
+# Benchmark : 동기 학습 (환경 step -> 학습 -> 환경 step) 과 비동기 학습 thread 의 처리량 비교
+# Unity 의 응답 대기 시간을 step_latency (sleep) 로 흉내낸 LocalEnvironment 에서 DQN 을 학습
+# Usage : python benchmark/bench_async_learner.py
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+config.state_size = [80, 80, 1]
+config.stack_frame = 4
+config.skip_frame = 1
+import local_env
+import trainer
+import algorithms
+
+# Parameter Setting
+step_latency = 0.02
+num_steps = 300
+batch_size = 32
+replay_ratios = [1.0, 0.5]
+
+
+def run(async_learner, replay_ratio):
+    config.async_learner = async_learner
+    config.replay_ratio = replay_ratio
+    trainer_ = trainer.Trainer(algorithms.make("DQN"))
+    env = local_env.LocalEnvironment(step_latency=step_latency, episode_length=10 ** 9)
+
+    start = time.perf_counter()
+    trainer_.run(env)
+    elapsed = time.perf_counter() - start
+
+    learner = trainer_.learner
+    return num_steps / elapsed, trainer_.actor_time / elapsed, learner.busy_time / elapsed, learner.learn_step / (num_steps - config.start_train_step)
+
+
+if __name__ == '__main__':
+    config.train_mode = True
+    config.load_model = False
+    config.save_path = os.path.join(tempfile.mkdtemp(), "bench")
+    config.batch_size = batch_size
+    config.mem_maxlen = num_steps
+    config.start_train_step = batch_size
+    config.run_step = num_steps
+    config.test_step = 0
+    config.save_step = 10 ** 9
+    config.print_episode = 10 ** 9
+
+    print("device: {} / env step latency: {:.1f} ms / batch_size: {}".format(config.device, 1000 * step_latency, batch_size))
+    for replay_ratio in replay_ratios:
+        for async_learner in [False, True]:
+            rate, actor, learner, ratio = run(async_learner, replay_ratio)
+            print("{:<5} replay ratio: {:.2f} (measured {:.2f}) / {:>6.1f} env steps/s / actor utilization: {:>5.1f}% / learner utilization: {:>5.1f}%".format
+                  ("async" if async_learner else "sync", replay_ratio, ratio, rate, 100 * actor, 100 * learner))
@@ -0,0 +1,100 @@
+# Benchmark : 알고리즘별 미니 배치 구성 시간 비교
+# before : 샘플마다 torch.tensor 를 만든 뒤 torch.cat 으로 합치는 기존 방식
+# after  : 샘플링한 index 의 데이터를 필드별 버퍼에 한번에 모은 뒤 device 로 복사 (BatchCollator)
+# Usage : python benchmark/bench_batch_collation.py
+import os
+import sys
+import time
+import random
+import warnings
+from collections import deque
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import replay_memory
+
+# Parameter Setting
+mem_maxlen = 10000
+batch_size = 128
+num_batches = 50
+device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+
+# (algorithm, state shape, state dtype, action shape)
+visual = ((4, 84, 84), np.uint8, ())
+vector = ((76,), np.float64, (1, 3))
+algorithms = [
+    ("DQN", ) + visual,
+    ("DoubleDQN", ) + visual,
+    ("DuelingDQN", ) + visual,
+    ("NoisyDQN", ) + visual,
+    ("ICM_DQN", ) + visual,
+    ("RND_DQN", ) + visual,
+    ("DDPG", ) + vector,
+    ("SAC", ) + vector,
+]
+
+
+def make_transitions(state_shape, state_dtype, action_shape):
+    transitions = []
+    for _ in range(16):
+        state = np.random.randint(0, 255, size=state_shape).astype(state_dtype)
+        action = np.random.randn(*action_shape) if action_shape else np.random.randint(0, 3)
+        transitions.append((state, action, float(np.random.rand()), state.copy(), False))
+    return transitions
+
+
+def legacy_collate(mini_batch):
+    state_batch = torch.cat([torch.tensor([mini_batch[i][0]]) for i in range(batch_size)]).float().to(device)
+    action_batch = torch.cat([torch.tensor([mini_batch[i][1]]) for i in range(batch_size)]).float().to(device)
+    reward_batch = torch.cat([torch.tensor([mini_batch[i][2]]) for i in range(batch_size)]).float().to(device)
+    next_state_batch = torch.cat([torch.tensor([mini_batch[i][3]]) for i in range(batch_size)]).float().to(device)
+    done_batch = torch.cat([torch.tensor([mini_batch[i][4]]) for i in range(batch_size)]).float().to(device)
+    return state_batch, action_batch, reward_batch, next_state_batch, done_batch
+
+
+def synchronize():
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+
+
+def bench_legacy(transitions):
+    memory = deque(maxlen=mem_maxlen)
+    for i in range(mem_maxlen):
+        memory.append(transitions[i % len(transitions)])
+
+    legacy_collate(random.sample(memory, batch_size))
+    synchronize()
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        batch = legacy_collate(random.sample(memory, batch_size))
+    synchronize()
+    return (time.perf_counter() - start) / num_batches
+
+
+def bench_collator(transitions):
+    memory = replay_memory.ReplayMemory(mem_maxlen)
+    for i in range(mem_maxlen):
+        memory.append(*transitions[i % len(transitions)])
+    collator = replay_memory.BatchCollator(device, pin_memory=True)
+
+    collator.sample(memory, batch_size)
+    synchronize()
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        batch = collator.sample(memory, batch_size)
+    synchronize()
+    return (time.perf_counter() - start) / num_batches
+
+
+if __name__ == '__main__':
+    # 기존 방식에서 발생하는 ndarray 리스트 -> tensor 변환 경고 무시
+    warnings.filterwarnings("ignore", category=UserWarning)
+    print("device: {} / batch_size: {} / mem_maxlen: {}".format(device, batch_size, mem_maxlen))
+    for name, state_shape, state_dtype, action_shape in algorithms:
+        transitions = make_transitions(state_shape, state_dtype, action_shape)
+        before = bench_legacy(transitions)
+        after = bench_collator(transitions)
+        print("{:<11} before: {:>8.3f} ms / after: {:>8.3f} ms / speedup: {:>6.1f}x".format
+              (name, 1000 * before, 1000 * after, before / after))
@@ -0,0 +1,60 @@
+# Benchmark : 통신 방식 (communicator) 별 메시지 크기에 따른 exchange 지연 시간 비교
+# rpc    : gRPC (기존 기본값, 요청마다 servicer thread 와 Pipe 를 거침)
+# socket : 길이 header 를 붙인 TCP socket
+# unix   : 같은 메시지를 Unix domain socket 으로 전송
+# shm    : 공유 메모리에 메시지를 복사하고 named pipe 에 1 byte 를 써서 상대에게 알림
+# Unity 대신 별도의 process 에서 stand-in peer 가 요청마다 정해진 크기의 응답을 보냄
+# Usage : python benchmark/bench_communicators.py
+import os
+import sys
+import time
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mlagents.envs import UnityEnvironment
+from mlagents.envs.stand_in_peer import PEERS
+from mlagents.envs.communicator_objects import UnityOutput, UnityInput, AgentInfoProto
+
+# Parameter Setting
+communicators = ["rpc", "socket", "unix", "shm"]
+# gRPC 의 기본 최대 메시지 크기 (4MB) 보다 작은 크기만 사용
+message_sizes = [1000, 100000, 3000000]
+num_exchanges = {1000: 2000, 100000: 500, 3000000: 30}
+base_port = 5950
+
+
+# Unity 대역 : 요청을 받을 때마다 size 크기의 시각적 관측을 담은 응답 전송
+def echo_env(communicator, port, size):
+    output = UnityOutput()
+    output.rl_output.agentInfos["Brain"].value.extend([AgentInfoProto(visual_observations=[b"x" * size])])
+    PEERS[communicator](port).serve(UnityOutput(), lambda unity_input: output)
+
+
+def run(communicator, size, worker_id):
+    # gRPC 상태를 fork 하지 않도록 spawn 으로 peer process 생성
+    process = multiprocessing.get_context("spawn").Process(target=echo_env, args=(communicator, base_port + worker_id, size), daemon=True)
+    process.start()
+    comm = UnityEnvironment.get_communicator(worker_id, base_port, 30, communicator)
+    comm.initialize(UnityInput())
+
+    num = num_exchanges[size]
+    start = time.perf_counter()
+    for _ in range(num):
+        comm.exchange(UnityInput())
+    elapsed = (time.perf_counter() - start) / num
+
+    comm.close()
+    process.join()
+    return elapsed
+
+
+if __name__ == '__main__':
+    worker_id = 0
+    for size in message_sizes:
+        results = {}
+        for communicator in communicators:
+            results[communicator] = run(communicator, size, worker_id)
+            worker_id += 1
+        print("message: {:>9,d} bytes / ".format(size) +
+              " / ".join("{}: {:.3f} ms ({:.2f}x)".format(name, 1000 * elapsed, results["rpc"] / elapsed)
+                         for name, elapsed in results.items()))
@@ -0,0 +1,113 @@
+# Benchmark : Double DQN 학습 1회 (update) 시간 비교
+# before : Q 값을 numpy 로 옮긴 뒤 샘플마다 python 반복문으로 타겟값을 계산하는 기존 방식
+# after  : 타겟값을 device 에서 tensor 연산으로 계산 (next_state 에 대한 네트워크 연산은 no_grad)
+# concat : after 와 같지만 state / next_state 를 합쳐 네트워크 연산을 한번만 수행 (역전파가 두 배 크기의 배치에 대해 수행됨)
+# Usage : python benchmark/bench_double_dqn.py
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+config.state_size = [80, 80, 1]
+config.stack_frame = 4
+import model
+
+# Parameter Setting
+batch_size = 128
+action_size = 3
+discount_factor = 0.99
+num_updates = 20
+device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+
+
+def make_batch():
+    state_batch = torch.randint(0, 255, (batch_size, 4, 80, 80), device=device).float()
+    action_batch = torch.randint(0, action_size, (batch_size,), device=device).float()
+    reward_batch = torch.rand(batch_size, device=device)
+    next_state_batch = torch.randint(0, 255, (batch_size, 4, 80, 80), device=device).float()
+    done_batch = (torch.rand(batch_size, device=device) < 0.1).float()
+    return state_batch, action_batch, reward_batch, next_state_batch, done_batch
+
+
+def legacy_update(network, target_network, optimizer, batch):
+    state_batch, action_batch, reward_batch, next_state_batch, done_batch = batch
+    action_batch = action_batch.long().cpu().numpy()
+    reward_batch = reward_batch.cpu().numpy()
+    done_batch = done_batch.cpu().numpy()
+
+    predict_Q = network(state_batch)
+    # CPU 에서는 .numpy() 가 predict_Q 와 메모리를 공유하므로 clone 하여 기존 (GPU) 동작을 재현
+    target_Q = predict_Q.cpu().detach().clone().numpy()
+    target_nextQ = target_network(next_state_batch).cpu().detach().numpy()
+    Q_a = network(next_state_batch).cpu().detach().numpy()
+
+    for i in range(batch_size):
+        if done_batch[i]:
+            target_Q[i, action_batch[i]] = reward_batch[i]
+        else:
+            action_ind = np.argmax(Q_a[i])
+            target_Q[i, action_batch[i]] = reward_batch[i] + discount_factor * target_nextQ[i][action_ind]
+
+    loss = F.smooth_l1_loss(predict_Q, torch.from_numpy(target_Q).to(device))
+    optimizer.zero_grad()
+    loss.backward()
+    optimizer.step()
+    return loss.item()
+
+
+def tensor_update(network, target_network, optimizer, batch, concat=False):
+    state_batch, action_batch, reward_batch, next_state_batch, done_batch = batch
+    action_batch = action_batch.long().view(-1, 1)
+
+    if concat:
+        Q, next_Q = network(torch.cat([state_batch, next_state_batch])).split(batch_size)
+    else:
+        Q = network(state_batch)
+        with torch.no_grad():
+            next_Q = network(next_state_batch)
+
+    with torch.no_grad():
+        next_action = torch.argmax(next_Q, dim=1, keepdim=True)
+        target_next_Q = target_network(next_state_batch).gather(1, next_action)
+        target_acted_Q = reward_batch.view(-1, 1) + (1. - done_batch.view(-1, 1)) * discount_factor * target_next_Q
+        target_Q = Q.detach().scatter(1, action_batch, target_acted_Q)
+
+    loss = F.smooth_l1_loss(Q, target_Q)
+    optimizer.zero_grad()
+    loss.backward()
+    optimizer.step()
+    return loss.item()
+
+
+def concat_update(network, target_network, optimizer, batch):
+    return tensor_update(network, target_network, optimizer, batch, concat=True)
+
+
+def run(update, batch):
+    torch.manual_seed(0)
+    network = model.DQN(action_size, "main").to(device)
+    target_network = model.DQN(action_size, "target").to(device)
+    target_network.load_state_dict(network.state_dict())
+    optimizer = torch.optim.SGD(network.parameters(), lr=1e-4)
+
+    first_loss = update(network, target_network, optimizer, batch)
+    start = time.perf_counter()
+    for _ in range(num_updates):
+        update(network, target_network, optimizer, batch)
+    return first_loss, (time.perf_counter() - start) / num_updates
+
+
+if __name__ == '__main__':
+    batch = make_batch()
+    print("device: {} / batch_size: {}".format(device, batch_size))
+
+    before_loss, before = run(legacy_update, batch)
+    print("{:<7} loss: {:.6f} / {:>8.2f} ms".format("before", before_loss, 1000 * before))
+    for name, update in [("after", tensor_update), ("concat", concat_update)]:
+        loss, elapsed = run(update, batch)
+        print("{:<7} loss: {:.6f} / {:>8.2f} ms / speedup: {:.2f}x".format(name, loss, 1000 * elapsed, before / elapsed))
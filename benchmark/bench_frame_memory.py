@@ -0,0 +1,101 @@
+# Benchmark : stacked state 를 그대로 저장하는 리플레이 메모리 vs 프레임을 한번만 저장하는 리플레이 메모리
+# 메모리 사용량, 샘플링 속도를 비교하고 재구성한 state 가 원래 state 와 같은지 확인
+# Usage : python benchmark/bench_frame_memory.py
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import replay_memory
+
+# Parameter Setting
+state_size = [84, 84, 1]
+stack_frame = 4
+skip_frame = 2
+mem_maxlen = 20000
+batch_size = 128
+num_batches = 200
+episode_length = 300
+
+
+# DQNAgent.skip_stack_frame 과 같은 방식으로 state 생성
+def skip_stack_frame(obs_set, obs):
+    obs_set.append(obs)
+    state = np.zeros([state_size[2]*stack_frame, state_size[0], state_size[1]])
+    for i in range(stack_frame):
+        state[state_size[2]*i : state_size[2]*(i+1), :,:] = obs_set[-1 - (skip_frame*i)]
+    return np.uint8(state)
+
+
+def fill(memories, num_transition):
+    obs_set = deque(maxlen=skip_frame*stack_frame)
+    # 프레임이 구분되도록 step 마다 다른 값을 가지는 관측값 사용
+    frames = [np.full((1, state_size[2], state_size[0], state_size[1]), i % 256, dtype=np.uint8) for i in range(256)]
+    step = 0
+    while step < num_transition:
+        obs = frames[step % 256]
+        for _ in range(skip_frame*stack_frame):
+            obs_set.append(obs)
+        state = skip_stack_frame(obs_set, obs)
+        length = np.random.randint(episode_length // 2, episode_length)
+        for t in range(length):
+            next_state = skip_stack_frame(obs_set, frames[(step + 1) % 256])
+            action, reward = np.random.randint(0, 3), np.random.rand()
+            done = t + 1 == length or step + 1 == num_transition
+            for memory in memories:
+                memory.append(state, action, reward, next_state, done)
+            state = next_state
+            step += 1
+            if done:
+                break
+
+
+def memory_bytes(memory):
+    return sum(v.nbytes for v in vars(memory).values() if isinstance(v, np.ndarray))
+
+
+def check_reconstruction():
+    # 같은 transition 을 두 메모리에 저장한 뒤 재구성한 state 가 같은지 확인 (frame memory 는 ring 이 한번 이상 순환)
+    num_transition = 3000
+    memory = replay_memory.ReplayMemory(num_transition)
+    frame_memory = replay_memory.FrameReplayMemory(1000, state_size[2], stack_frame, skip_frame)
+
+    transition_global = []
+    class Recorder():
+        def append(self, *args):
+            transition_global.append(frame_memory.count - 1)
+    fill([memory, frame_memory, Recorder()], num_transition)
+
+    # 메모리에 남아있는 transition 들에 대해서만 비교
+    global_index = np.array(transition_global)
+    slot = global_index % frame_memory.maxlen
+    index = np.arange(num_transition)
+    valid = (frame_memory.global_index[slot] == global_index) & frame_memory._is_valid(slot)
+    expected = memory.get_batch(index[valid])
+    rebuilt = frame_memory.get_batch(slot[valid])
+    return all(np.array_equal(e, r) for e, r in zip(expected, rebuilt)), int(valid.sum())
+
+
+def bench(memory):
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        batch = memory.sample(batch_size)
+    return num_batches * batch_size / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    matches, num_checked = check_reconstruction()
+    print("reconstruction matches: {} ({} transitions checked)".format(matches, num_checked))
+
+    memory = replay_memory.ReplayMemory(mem_maxlen)
+    frame_memory = replay_memory.FrameReplayMemory(mem_maxlen, state_size[2], stack_frame, skip_frame)
+    fill([memory, frame_memory], mem_maxlen)
+
+    print("state_size: {} / stack_frame: {} / skip_frame: {} / mem_maxlen: {}".format(state_size, stack_frame, skip_frame, mem_maxlen))
+    for name, m in [("stacked", memory), ("frame", frame_memory)]:
+        per_transition = memory_bytes(m) / m.maxlen
+        print("{:<8} memory: {:>8.1f} MB / {:>7.0f} bytes per transition / 1M transitions: {:>6.2f} GB / sampling: {:>8.0f} samples/s".format
+              (name, memory_bytes(m) / 2**20, per_transition, per_transition * 1e6 / 2**30, bench(m)))
@@ -0,0 +1,98 @@
+# Benchmark : 환경 step 마다 frame stacking 에 걸리는 시간과 메모리 할당량 비교
+# before : 환경마다 deque 에 프레임을 저장하고 float64 배열을 새로 만들어 stack 한 뒤 uint8 로 변환하는 기존 방식 (skip_stack_frame)
+# after  : vector_env.FrameStacker (미리 할당한 uint8 ring buffer 와 출력 버퍼 사용)
+# 할당량은 tracemalloc 으로 측정한 step 당 최대 임시 할당 크기 (numpy 배열 할당 포함)
+# Usage : python benchmark/bench_frame_stack.py
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import vector_env
+
+# Parameter Setting
+state_size = [84, 84, 1]
+stack_frame = 4
+skip_frame = 2
+num_envs_list = [1, 8]
+num_steps = 2000
+episode_length = 100
+
+
+# 기존 VectorActor 의 obs_set / skip_stack_frame 방식
+class LegacyStacker():
+    def __init__(self, num_envs):
+        self.obs_set = [deque(maxlen=skip_frame*stack_frame) for _ in range(num_envs)]
+        self.state = np.zeros([num_envs, state_size[2]*stack_frame, state_size[0], state_size[1]], dtype=np.uint8)
+
+    def skip_stack_frame(self, i, obs):
+        self.obs_set[i].append(obs)
+        state = np.zeros([state_size[2]*stack_frame, state_size[0], state_size[1]])
+        for j in range(stack_frame):
+            state[state_size[2]*j : state_size[2]*(j+1), :,:] = self.obs_set[i][-1 - (skip_frame*j)]
+        return np.uint8(state)
+
+    def push(self, obs):
+        self.state = np.stack([self.skip_stack_frame(i, obs[i]) for i in range(len(obs))])
+        return self.state
+
+    def reset(self, i, obs):
+        for _ in range(skip_frame*stack_frame):
+            self.obs_set[i].append(obs)
+        self.state[i] = self.skip_stack_frame(i, obs)
+
+
+def make_frames(num_envs):
+    # 프레임이 구분되도록 step 마다 다른 값을 가지는 관측값 사용 (get_obs 와 같은 float CHW)
+    return [np.random.randint(0, 256, (num_envs, state_size[2], state_size[0], state_size[1])).astype(np.float64) for _ in range(16)]
+
+
+def run(stacker, frames, measure_memory=False):
+    num_envs = len(frames[0])
+    for i in range(num_envs):
+        stacker.reset(i, frames[0][i])
+
+    states = []
+    elapsed = 0.0
+    peak = 0
+    for step in range(num_steps):
+        obs = frames[step % len(frames)]
+        if measure_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        state = stacker.push(obs)
+        # 에피소드가 끝난 환경은 stack 초기화 (환경마다 다른 step 에 끝남)
+        for i in range(num_envs):
+            if (step + i) % episode_length == 0:
+                stacker.reset(i, obs[i])
+        elapsed += time.perf_counter() - start
+
+        if measure_memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+        elif step < 3 * episode_length:
+            states.append(state.copy())
+    return elapsed / num_steps, peak, states
+
+
+if __name__ == '__main__':
+    print("state_size: {} / stack_frame: {} / skip_frame: {}".format(state_size, stack_frame, skip_frame))
+    for num_envs in num_envs_list:
+        frames = make_frames(num_envs)
+        before, _, before_states = run(LegacyStacker(num_envs), frames)
+        after, _, after_states = run(vector_env.FrameStacker(num_envs, frames[0].shape[1:], stack_frame, skip_frame), frames)
+        same = all(np.array_equal(a, b) for a, b in zip(before_states, after_states))
+
+        tracemalloc.start()
+        _, before_alloc, _ = run(LegacyStacker(num_envs), frames, measure_memory=True)
+        _, after_alloc, _ = run(vector_env.FrameStacker(num_envs, frames[0].shape[1:], stack_frame, skip_frame), frames, measure_memory=True)
+        tracemalloc.stop()
+
+        print("num_envs: {} / same state: {}".format(num_envs, same))
+        print("  {:<6} {:>8.1f} us/step / {:>10,d} bytes allocated/step".format("before", 1e6 * before, before_alloc))
+        print("  {:<6} {:>8.1f} us/step / {:>10,d} bytes allocated/step / speedup: {:.2f}x".format("after", 1e6 * after, after_alloc, before / after))
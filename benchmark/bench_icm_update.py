@@ -0,0 +1,95 @@
+# Benchmark : ICM_DQN 학습 (train_model_ICM) 한번의 처리량 비교 (CPU, 80 x 80 x 4 상태, images/s = 2 x batch_size x updates/s)
+# before : ICM 의 encoder 를 current / next state 에 따로 수행, 내적 보상을 샘플마다 Python 반복으로 더하고, loss 마다 역전파 (retain_graph)
+# after  : [state; next_state] 를 합쳐서 encoder 를 한번만 수행한 후 나누고, 내적 보상은 한번에 계산, 역전파는 한번
+# Usage : python benchmark/bench_icm_update.py
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import model
+import algorithms
+
+# Parameter Setting
+num_updates = 20
+batch_size_list = [32, 128]
+num_samples = 1000
+config.state_size = [80, 80, 1]
+config.stack_frame = 4
+config.action_size = 4
+config.load_model = False
+config.train_mode = False
+
+
+# 기존 ICM forward : encoder 를 current / next state 에 따로 수행
+def legacy_icm_forward(self, x_now, x_next, a_now):
+    x_now_encode = self.encode(x_now)
+    x_next_encode = self.encode(x_next)
+
+    x_fm = torch.cat([x_now_encode, a_now.unsqueeze(1)], dim=1)
+    x_fm = F.relu(self.fc1_fm(x_fm))
+    x_fm = torch.cat([x_fm, a_now.unsqueeze(1)], dim=1)
+    x_fm = self.fc2_fm(x_fm)
+
+    x_encode = torch.cat([x_now_encode, x_next_encode], dim=1)
+    x_im = F.relu(self.fc1_im(x_encode))
+    x_im = F.softmax(self.fc2_im(x_im), dim=1)
+    return x_next_encode, x_fm, x_im
+
+
+# 기존 train_model_ICM : 샘플마다 내적 보상을 더하고 loss 마다 역전파
+def legacy_train_model_ICM(self):
+    state_batch, action_batch, reward_batch, next_state_batch, done_batch, weight_batch, index_batch = self.sample_batch()
+    x_next_encode, x_fm, x_im = legacy_icm_forward(self.model_a, state_batch, next_state_batch, action_batch)
+    reward_i = (config.eta * 0.5) * torch.sum(torch.square(x_fm - x_next_encode), dim=1)
+
+    Q = self.model(state_batch)
+    action_batch_onehot = torch.eye(config.action_size)[action_batch.type(torch.long)].to(self.device)
+    acted_Q = torch.sum(Q * action_batch_onehot, axis=-1).unsqueeze(1)
+
+    with torch.no_grad():
+        for i in range(config.batch_size):
+            reward_batch[i] = (config.extrinsic_coeff * reward_batch[i]) + (config.intrinsic_coeff * reward_i[i])
+        target_next_Q = self.target_model(next_state_batch)
+        max_next_Q = torch.max(target_next_Q, dim=1, keepdim=True).values
+        target_Q = (1. - done_batch).view(config.batch_size, -1) * config.discount_factor * max_next_Q + reward_batch.view(config.batch_size, -1)
+
+    loss_rl = torch.mean(weight_batch.view(-1, 1) * F.smooth_l1_loss(acted_Q, target_Q, reduction='none'))
+    loss_fm = F.mse_loss(input=x_fm, target=x_next_encode)
+    loss_im = F.cross_entropy(input=x_im, target=action_batch.to(dtype=torch.int64))
+
+    self.optimizer.zero_grad()
+    loss_rl.backward(retain_graph=True)
+    loss_fm.backward(retain_graph=True)
+    loss_im.backward(retain_graph=True)
+    self.optimizer.step()
+
+
+def run(train, batch_size):
+    config.batch_size = batch_size
+    torch.manual_seed(0)
+    agent = algorithms.make("ICM_DQN").build(torch.device("cpu"))
+    random = np.random.RandomState(0)
+    for _ in range(num_samples):
+        agent.append_sample(random.randint(0, 256, (4, 80, 80), dtype=np.uint8), random.randint(config.action_size),
+                            random.rand(), random.randint(0, 256, (4, 80, 80), dtype=np.uint8), False)
+
+    train(agent)
+    start = time.perf_counter()
+    for _ in range(num_updates):
+        train(agent)
+    return 2 * batch_size * num_updates / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    torch.set_num_threads(1)
+    for batch_size in batch_size_list:
+        before = run(legacy_train_model_ICM, batch_size)
+        after = run(lambda agent: agent.train_model_ICM(), batch_size)
+        print("batch_size: {:>3d} / before: {:>7.1f} images/s / after: {:>7.1f} images/s / speedup: {:.2f}x".format
+              (batch_size, before, after, after / before))
@@ -0,0 +1,71 @@
+# Benchmark : BrainInfo.from_agent_proto 의 시각적 관측 디코딩 시간 (에이전트 수 x 카메라 수)
+# serial  : 에이전트 / 카메라 순서대로 process_pixels 호출 (기존 방식)
+# threads : ThreadPoolImageDecoder (PIL 은 디코딩 중 GIL 을 놓으므로 여러 core 에서 동시에 디코딩)
+# reuse   : ThreadPoolImageDecoder 에 카메라마다 출력 배열 재사용
+# Usage : python benchmark/bench_image_decode.py
+import io
+import os
+import sys
+import time
+import multiprocessing
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mlagents.envs import BrainInfo, BrainParameters, ImageDecoder, ThreadPoolImageDecoder
+from mlagents.envs.communicator_objects import AgentInfoProto
+
+# Parameter Setting
+image_size = [84, 84]
+gray_scale = False
+uint8_visual = True
+num_agents_list = [1, 8, 32]
+num_cameras_list = [1, 2]
+num_threads_list = [2, 4]
+num_steps = 50
+
+
+def png_bytes(pixels):
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def make_step(num_agents, num_cameras):
+    resolutions = [{"height": image_size[0], "width": image_size[1], "blackAndWhite": gray_scale} for _ in range(num_cameras)]
+    brain_params = BrainParameters("Brain", 0, 1, resolutions, [3], [], 0)
+    agent_infos = [AgentInfoProto(stacked_vector_observation=[], reward=0, done=False, id=i,
+                                  visual_observations=[png_bytes(np.random.randint(0, 256, image_size + [3]).astype(np.uint8))
+                                                       for _ in range(num_cameras)])
+                   for i in range(num_agents)]
+    return agent_infos, brain_params
+
+
+def run(decoder, agent_infos, brain_params):
+    BrainInfo.from_agent_proto(agent_infos, brain_params, uint8_visual, decoder)
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        BrainInfo.from_agent_proto(agent_infos, brain_params, uint8_visual, decoder)
+    return (time.perf_counter() - start) / num_steps
+
+
+if __name__ == '__main__':
+    print("cpu: {} / image: {} / gray_scale: {} / uint8_visual: {}".format(multiprocessing.cpu_count(), image_size, gray_scale, uint8_visual))
+    decoders = [("serial", ImageDecoder())]
+    for num_threads in num_threads_list:
+        decoders.append(("threads={}".format(num_threads), ThreadPoolImageDecoder(num_threads)))
+        decoders.append(("threads={} reuse".format(num_threads), ThreadPoolImageDecoder(num_threads, reuse_output=True)))
+
+    for num_agents in num_agents_list:
+        for num_cameras in num_cameras_list:
+            agent_infos, brain_params = make_step(num_agents, num_cameras)
+            print("agents: {} / cameras: {}".format(num_agents, num_cameras))
+            base = None
+            for name, decoder in decoders:
+                elapsed = run(decoder, agent_infos, brain_params)
+                base = base or elapsed
+                print("  {:<16} {:>8.2f} ms/step / {:.2f}x".format(name, 1000 * elapsed, base / elapsed))
+
+    for _, decoder in decoders:
+        decoder.close()
@@ -0,0 +1,97 @@
+# Benchmark : Ape-X actor 수에 따른 행동 결정 (DQN 네트워크 연산) 처리량과 지연 시간 비교
+# before : actor process 마다 자신의 CPU 네트워크 복사본으로 배치 크기 1 의 연산을 매 step 수행
+# after  : learner process 의 InferenceServer 가 actor 들의 상태를 max_wait 동안 모아서 한번의 배치 연산 (config.device)
+# 환경은 step 마다 step_latency 만큼 기다리는 것으로 대신하고, actor 는 환경 하나의 상태 (4 x 80 x 80 uint8) 로 행동 결정
+# Usage : python benchmark/bench_inference_server.py
+import os
+import sys
+import time
+import multiprocessing
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+config.state_size = [80, 80, 1]
+config.stack_frame = 4
+import model
+from inference_server import InferenceServer
+
+# Parameter Setting
+num_actors_list = [2, 4, 8]
+max_wait_list = [0.0, 0.002, 0.005]
+duration = 5.0
+step_latency = 0.01
+action_size = 4
+
+
+def greedy_action(model_, device):
+    def fn(state):
+        with torch.no_grad():
+            Q = model_(torch.from_numpy(state).to(device))
+        return np.argmax(Q.cpu().numpy(), axis=1)
+    return fn
+
+
+# actor : duration 초 동안 환경 step 과 행동 결정을 반복하고 (행동 결정 횟수, 행동 결정에 걸린 시간) 을 전송
+def actor(actor_id, state_dict, client, result_queue):
+    torch.set_num_threads(1)
+    if client is None:
+        local_model = model.DQN(action_size, "main")
+        local_model.load_state_dict(state_dict)
+        infer = greedy_action(local_model, torch.device("cpu"))
+    else:
+        infer = client.infer
+    state = np.random.RandomState(actor_id).randint(0, 256, (1, 4, 80, 80)).astype(np.uint8)
+
+    count, infer_time = 0, 0.0
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        time.sleep(step_latency)
+        start = time.perf_counter()
+        infer(state)
+        infer_time += time.perf_counter() - start
+        count += 1
+    result_queue.put((count, infer_time))
+    if client is not None:
+        client.close()
+
+
+def run(num_actors, max_wait=None):
+    model_ = model.DQN(action_size, "main").to(config.device)
+    state_dict = {key: value.cpu() for key, value in model_.state_dict().items()}
+    server = None
+    clients = [None] * num_actors
+    if max_wait is not None:
+        server = InferenceServer(greedy_action(model_, config.device), max_wait=max_wait)
+        clients = [server.connect() for _ in range(num_actors)]
+
+    result_queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=actor, args=(i, state_dict, clients[i], result_queue))
+                 for i in range(num_actors)]
+    for process in processes:
+        process.start()
+    results = [result_queue.get() for _ in range(num_actors)]
+    for process in processes:
+        process.join()
+
+    stats = None
+    if server is not None:
+        stats = server.pop_stats()
+        server.close()
+    count = sum(count for count, _ in results)
+    return count / duration, sum(infer_time for _, infer_time in results) / count, stats
+
+
+if __name__ == '__main__':
+    torch.set_num_threads(1)
+    print("cpu: {} / device: {} / env step latency: {:.1f} ms".format(multiprocessing.cpu_count(), config.device, 1000 * step_latency))
+    for num_actors in num_actors_list:
+        before, before_latency, _ = run(num_actors)
+        print("num_actors: {} / before: {:>6.1f} actions/s, latency {:.2f} ms".format(num_actors, before, 1000 * before_latency))
+        for max_wait in max_wait_list:
+            after, after_latency, stats = run(num_actors, max_wait)
+            print("num_actors: {} / max_wait: {:.1f} ms / after: {:>6.1f} actions/s, latency {:.2f} ms / speedup: {:.2f}x / "
+                  "batch size: mean {:.1f}, max {}".format(num_actors, 1000 * max_wait, after, 1000 * after_latency,
+                                                          after / before, stats["mean"], stats["max"]))
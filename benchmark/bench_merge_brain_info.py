@@ -0,0 +1,70 @@
+# Benchmark : worker 수에 따른 SubprocessUnityEnvironment._merge_step_info 의 시간 비교
+# before : 첫 worker 의 AllBrainInfo 를 deepcopy 한 후 나머지 worker 를 하나씩 BrainInfo.merge (np.append / extend 반복)
+#          agent id 는 문자열 "worker-agent" 로 하나씩 변환
+# after  : BrainInfo.merge_all 로 모든 worker 의 필드를 한번에 concatenate, agent id 는 정수 (worker, agent) 튜플
+# Usage : python benchmark/bench_merge_brain_info.py
+import os
+import sys
+import copy
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mlagents.envs import BrainInfo
+from mlagents.envs.subprocess_environment import SubprocessUnityEnvironment, EnvironmentResponse
+
+# Parameter Setting
+num_workers_list = [8, 32, 64]
+num_merges = 200
+agents_per_worker = 4
+vector_observation_size = 64
+memory_size = 256
+action_size = 5
+visual_size = [84, 84, 3]
+
+
+# 기존 merge : deepcopy + worker 마다 BrainInfo.merge
+def legacy_merge_step_info(env_steps):
+    accumulated_brain_info = None
+    for env_step in env_steps:
+        all_brain_info = env_step.payload
+        for brain_name, brain_info in all_brain_info.items():
+            for i in range(len(brain_info.agents)):
+                brain_info.agents[i] = str(env_step.worker_id) + '-' + str(brain_info.agents[i])
+            if accumulated_brain_info:
+                accumulated_brain_info[brain_name].merge(brain_info)
+        if not accumulated_brain_info:
+            accumulated_brain_info = copy.deepcopy(all_brain_info)
+    return accumulated_brain_info
+
+
+# worker 들이 보낸 응답 (pickle 을 푼 직후처럼 매번 새 리스트와 배열)
+def make_responses(num_workers, random):
+    n = agents_per_worker
+    image = random.randint(0, 256, [3] + visual_size[:2], dtype=np.uint8)
+    return [EnvironmentResponse('step', worker_id, {"Brain": BrainInfo(
+        [[image.copy() for _ in range(n)]], random.rand(n, vector_observation_size), [""] * n,
+        memory=random.rand(n, memory_size), reward=random.rand(n).tolist(), agents=list(range(n)),
+        local_done=[False] * n, vector_action=random.rand(n, action_size), text_action=[[]] * n,
+        max_reached=[False] * n, action_mask=np.ones((n, action_size)), custom_observations=[None] * n)})
+        for worker_id in range(num_workers)]
+
+
+def run(merge, num_workers):
+    random = np.random.RandomState(0)
+    elapsed = 0.0
+    for _ in range(num_merges):
+        responses = make_responses(num_workers, random)
+        start = time.perf_counter()
+        merge(responses)
+        elapsed += time.perf_counter() - start
+    return elapsed / num_merges
+
+
+if __name__ == '__main__':
+    for num_workers in num_workers_list:
+        before = run(legacy_merge_step_info, num_workers)
+        after = run(SubprocessUnityEnvironment._merge_step_info, num_workers)
+        print("num_workers: {:>2d} / before: {:>7.3f} ms / after: {:>7.3f} ms / speedup: {:.2f}x".format
+              (num_workers, 1000 * before, 1000 * after, before / after))
@@ -0,0 +1,83 @@
+# Benchmark : NoisyDQNHay 의 noisy linear layer 연산 시간 비교 (CPU, 80 x 80 x 4 입력 -> 첫 noisy layer 는 512 x 6400)
+# before : independent Gaussian noise, forward 마다 n_out x n_in + n_out 개의 noise 를 sampling
+# after  : factorized Gaussian noise, reset_noise 때만 n_in + n_out 개의 noise 를 sampling 하고 noisy 가중치를 만들지 않고 연산
+# act   : 배치 1 행동 결정 (after 는 step 마다 reset_noise 후 forward)
+# learn : 배치 batch_size 의 forward + backward (after 는 update 마다 reset_noise)
+# Usage : python benchmark/bench_noisy_linear.py
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+config.state_size = [80, 80, 1]
+config.stack_frame = 4
+import model
+
+# Parameter Setting
+num_calls = 100
+batch_size = 32
+action_size = 4
+
+
+# 기존 noisy linear layer : forward 마다 가중치 크기의 noise 를 sampling
+class LegacyNoisyLinearHay(nn.Module):
+    def __init__(self, n_in, n_out):
+        super(LegacyNoisyLinearHay, self).__init__()
+        self.n_in = n_in
+        self.n_out = n_out
+        self.w_mu = nn.Parameter(-np.sqrt(3/n_out) + torch.rand(n_out, n_in) * 2 * np.sqrt(3/n_out))
+        self.w_sig = nn.Parameter(torch.ones((n_out, n_in)) * 0.017)
+        self.b_mu = nn.Parameter(-np.sqrt(3/n_out) + torch.rand(n_out) * 2 * np.sqrt(3/n_out))
+        self.b_sig = nn.Parameter(torch.ones((n_out)) * 0.017)
+
+    def forward(self, x, train):
+        w_eps = torch.randn((self.n_out, self.n_in))
+        b_eps = torch.randn((self.n_out))
+        w = self.w_mu + F.relu(self.w_sig) * w_eps
+        b = self.b_mu + F.relu(self.b_sig) * b_eps
+        return F.linear(x, w, b)
+
+
+def make_model(legacy):
+    model_ = model.NoisyDQNHay(action_size)
+    if legacy:
+        model_.linear1 = LegacyNoisyLinearHay(model_.linear1.n_in, model_.linear1.n_out)
+        model_.linear2 = LegacyNoisyLinearHay(model_.linear2.n_in, model_.linear2.n_out)
+        model_.reset_noise = lambda: None
+    return model_
+
+
+def run(legacy):
+    model_ = make_model(legacy)
+    random = np.random.RandomState(0)
+    state = torch.from_numpy(random.randint(0, 256, (1, 4, 80, 80)).astype(np.float32))
+    state_batch = torch.from_numpy(random.randint(0, 256, (batch_size, 4, 80, 80)).astype(np.float32))
+
+    start = time.perf_counter()
+    for _ in range(num_calls):
+        model_.reset_noise()
+        with torch.inference_mode():
+            model_(state, True)
+    act_time = (time.perf_counter() - start) / num_calls
+
+    start = time.perf_counter()
+    for _ in range(num_calls):
+        model_.reset_noise()
+        model_(state_batch, True).sum().backward()
+    learn_time = (time.perf_counter() - start) / num_calls
+    return act_time, learn_time
+
+
+if __name__ == '__main__':
+    torch.set_num_threads(1)
+    run(legacy=True)
+    before = run(legacy=True)
+    after = run(legacy=False)
+    for name, b, a in zip(["act", "learn"], before, after):
+        print("{:>5} / before: {:>7.3f} ms / after: {:>7.3f} ms / speedup: {:.2f}x".format(name, 1000 * b, 1000 * a, b / a))
@@ -0,0 +1,66 @@
+# Benchmark : 미니 배치 prefetch thread 사용 여부에 따른 step 당 시간 비교
+# env.step 의 Unity 통신 대기 시간을 sleep 으로 대신하고, 매 step 마다 미니 배치를 샘플링하여 학습
+# Usage : python benchmark/bench_prefetch.py
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import replay_memory
+
+# Parameter Setting
+state_shape = (4, 84, 84)
+mem_maxlen = 10000
+batch_size = 128
+num_steps = 100
+env_step_latency = 0.005
+prefetch_depths = [0, 1, 2, 4]
+device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+
+
+def run(memory, model, optimizer, depth):
+    collator = replay_memory.BatchCollator(device, pin_memory=True)
+    prefetcher = replay_memory.Prefetcher(memory, batch_size, device, True, depth) if depth > 0 else None
+    state = np.random.randint(0, 255, size=state_shape).astype(np.uint8)
+
+    start = time.perf_counter()
+    for step in range(num_steps):
+        # env.step 대기
+        time.sleep(env_step_latency)
+        memory.append(state, np.random.randint(0, 3), 0.0, state, False)
+
+        # 학습 수행
+        if prefetcher is not None:
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch, _, _ = prefetcher.get()
+        else:
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch, _, _ = collator.sample(memory, batch_size)
+        loss = F.mse_loss(model(state_batch / 255.0).squeeze(1), reward_batch)
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        loss.item()
+    elapsed = time.perf_counter() - start
+
+    if prefetcher is not None:
+        prefetcher.close()
+    return elapsed / num_steps
+
+
+if __name__ == '__main__':
+    memory = replay_memory.ReplayMemory(mem_maxlen)
+    for i in range(mem_maxlen):
+        state = np.full(state_shape, i % 256, dtype=np.uint8)
+        memory.append(state, i % 3, np.random.rand(), state, False)
+
+    model = nn.Sequential(nn.Conv2d(4, 16, 8, stride=4), nn.ReLU(), nn.Flatten(), nn.LazyLinear(1)).to(device)
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-4)
+    model(torch.zeros((1,) + state_shape, device=device))
+
+    print("device: {} / batch_size: {} / env step latency: {:.1f} ms".format(device, batch_size, 1000 * env_step_latency))
+    for depth in prefetch_depths:
+        print("prefetch_depth: {} / {:.2f} ms per step".format(depth, 1000 * run(memory, model, optimizer, depth)))
@@ -0,0 +1,81 @@
+# Benchmark : deque 리플레이 메모리 vs numpy ring buffer 리플레이 메모리 샘플링 속도 비교
+# Usage : python benchmark/bench_replay_memory.py
+import os
+import sys
+import time
+import random
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import replay_memory
+
+# Parameter Setting
+mem_maxlen = 50000
+batch_size = 128
+num_batches = 200
+
+# (name, state shape, state dtype, action shape)
+cases = [
+    ("visual (DQN)", (4, 84, 84), np.uint8, ()),
+    ("vector (DDPG/SAC)", (76,), np.float64, (1, 3)),
+]
+
+
+def make_transition(state_shape, state_dtype, action_shape):
+    state = np.random.randint(0, 255, size=state_shape).astype(state_dtype)
+    action = np.random.randn(*action_shape) if action_shape else np.random.randint(0, 3)
+    return state, action, float(np.random.rand()), state.copy(), False
+
+
+def fill(memory_append, state_shape, state_dtype, action_shape):
+    # 매번 새 배열을 만들면 시간이 오래 걸리므로 미리 만든 transition 몇 개를 반복해서 사용
+    transitions = [make_transition(state_shape, state_dtype, action_shape) for _ in range(16)]
+    for i in range(mem_maxlen):
+        memory_append(transitions[i % len(transitions)])
+
+
+def bench_deque(state_shape, state_dtype, action_shape):
+    memory = deque(maxlen=mem_maxlen)
+    fill(memory.append, state_shape, state_dtype, action_shape)
+
+    # 샘플링만 수행
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        mini_batch = random.sample(memory, batch_size)
+    sample_rate = num_batches * batch_size / (time.perf_counter() - start)
+
+    # 샘플링 + 필드별 배열로 변환
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        mini_batch = random.sample(memory, batch_size)
+        batch = [np.array([mini_batch[i][k] for i in range(batch_size)]) for k in range(5)]
+    batch_rate = num_batches * batch_size / (time.perf_counter() - start)
+    return sample_rate, batch_rate
+
+
+def bench_ring(state_shape, state_dtype, action_shape):
+    memory = replay_memory.ReplayMemory(mem_maxlen)
+    fill(lambda t: memory.append(*t), state_shape, state_dtype, action_shape)
+
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        index = memory.sample_index(batch_size)
+    sample_rate = num_batches * batch_size / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        batch = memory.sample(batch_size)
+    batch_rate = num_batches * batch_size / (time.perf_counter() - start)
+    return sample_rate, batch_rate
+
+
+if __name__ == '__main__':
+    print("mem_maxlen: {} / batch_size: {} / num_batches: {}".format(mem_maxlen, batch_size, num_batches))
+    for name, state_shape, state_dtype, action_shape in cases:
+        deque_rates = bench_deque(state_shape, state_dtype, action_shape)
+        ring_rates = bench_ring(state_shape, state_dtype, action_shape)
+        for label, deque_rate, ring_rate in zip(["index only", "full batch"], deque_rates, ring_rates):
+            print("{:<18} {:<10} deque: {:>12.0f} samples/s / ring buffer: {:>12.0f} samples/s / speedup: {:.1f}x".format
+                  (name, label, deque_rate, ring_rate, ring_rate / deque_rate))
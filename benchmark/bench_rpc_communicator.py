@@ -0,0 +1,93 @@
+# Benchmark : RpcCommunicator 의 메시지 크기별 exchange 지연 시간 비교
+# before : gRPC servicer thread 가 요청과 응답을 multiprocessing.Pipe 로 주고받는 기존 방식 (메시지마다 pickle 2번)
+# after  : servicer thread 와 condition variable 로 메시지 객체를 그대로 주고받음
+# Unity 대신 별도의 process 에서 gRPC stand-in client 가 요청마다 정해진 크기의 응답을 보냄
+# Usage : python benchmark/bench_rpc_communicator.py
+import os
+import sys
+import time
+import multiprocessing
+from multiprocessing import Pipe
+from concurrent.futures import ThreadPoolExecutor
+
+import grpc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mlagents.envs.rpc_communicator import RpcCommunicator
+from mlagents.envs.stand_in_peer import RpcPeer
+from mlagents.envs.communicator_objects import UnityOutput, UnityInput, AgentInfoProto, \
+    UnityToExternalServicer, add_UnityToExternalServicer_to_server
+
+# Parameter Setting
+# gRPC 의 기본 최대 메시지 크기 (4MB) 보다 작은 크기만 사용
+message_sizes = [1000, 100000, 3000000]
+num_exchanges = {1000: 2000, 100000: 500, 3000000: 30}
+base_port = 6000
+
+
+# 기존 servicer : 요청과 응답을 Pipe 로 전달
+class LegacyServicer(UnityToExternalServicer):
+    def __init__(self):
+        self.parent_conn, self.child_conn = Pipe()
+
+    def Exchange(self, request, context):
+        self.child_conn.send(request)
+        return self.child_conn.recv()
+
+    def receive(self, timeout=None):
+        if not self.parent_conn.poll(timeout):
+            return None
+        return self.parent_conn.recv()
+
+    def send(self, reply):
+        self.parent_conn.send(reply)
+
+    def close(self):
+        self.parent_conn.close()
+
+
+class LegacyRpcCommunicator(RpcCommunicator):
+    def create_server(self):
+        self.check_port(self.port)
+        self.server = grpc.server(ThreadPoolExecutor(max_workers=10))
+        self.unity_to_external = LegacyServicer()
+        add_UnityToExternalServicer_to_server(self.unity_to_external, self.server)
+        self.server.add_insecure_port('[::]:' + str(self.port))
+        self.server.start()
+        self.is_open = True
+
+
+# Unity 대역 : 요청을 받을 때마다 size 크기의 시각적 관측을 담은 응답 전송
+def echo_env(port, size):
+    output = UnityOutput()
+    output.rl_output.agentInfos["Brain"].value.extend([AgentInfoProto(visual_observations=[b"x" * size])])
+    RpcPeer(port).serve(UnityOutput(), lambda unity_input: output)
+
+
+def run(communicator_class, size, worker_id):
+    # gRPC 상태를 fork 하지 않도록 spawn 으로 peer process 생성
+    process = multiprocessing.get_context("spawn").Process(target=echo_env, args=(base_port + worker_id, size),
+                                                            daemon=True)
+    process.start()
+    comm = communicator_class(worker_id=worker_id, base_port=base_port)
+    comm.initialize(UnityInput())
+
+    num = num_exchanges[size]
+    start = time.perf_counter()
+    for _ in range(num):
+        comm.exchange(UnityInput())
+    elapsed = (time.perf_counter() - start) / num
+
+    comm.close()
+    process.join()
+    return elapsed
+
+
+if __name__ == '__main__':
+    worker_id = 0
+    for size in message_sizes:
+        before = run(LegacyRpcCommunicator, size, worker_id)
+        after = run(RpcCommunicator, size, worker_id + 1)
+        worker_id += 2
+        print("message: {:>9,d} bytes / before: {:>9.3f} ms / after: {:>9.3f} ms / speedup: {:.2f}x".format
+              (size, 1000 * before, 1000 * after, before / after))
@@ -0,0 +1,50 @@
+# Benchmark : Prioritized Experience Replay 용 sum tree / min tree 처리량 (capacity 1M)
+# 비교를 위해 매번 전체 우선순위의 누적합을 계산하는 O(n) 샘플링도 함께 측정
+# Usage : python benchmark/bench_segment_tree.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import replay_memory
+
+# Parameter Setting
+capacity = 1000000
+batch_size = 128
+num_iter = 200
+
+
+def rate(fn, num, per_call):
+    start = time.perf_counter()
+    for _ in range(num):
+        fn()
+    return num * per_call / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    sampler = replay_memory.PrioritizedSampler(capacity, alpha=0.6, beta=0.4)
+
+    # 새 transition 추가 (하나씩)
+    index = iter(range(capacity))
+    add_rate = rate(lambda: sampler.add(next(index)), 20000, 1)
+    sampler.update(np.arange(capacity), np.random.rand(capacity))
+
+    sample_rate = rate(lambda: sampler.sample(batch_size), num_iter, batch_size)
+    weight_rate = rate(lambda: sampler.weight(sampler.sample(batch_size)), num_iter, batch_size)
+    update_rate = rate(lambda: sampler.update(np.random.randint(0, capacity, batch_size), np.random.rand(batch_size)),
+                       num_iter, batch_size)
+
+    priority = np.random.rand(capacity)
+    def linear_sample():
+        cumsum = np.cumsum(priority)
+        return np.searchsorted(cumsum, np.random.rand(batch_size) * cumsum[-1])
+    linear_rate = rate(linear_sample, 20, batch_size)
+
+    print("capacity: {} / batch_size: {}".format(capacity, batch_size))
+    print("add (one at a time)     : {:>12.0f} transitions/s".format(add_rate))
+    print("sample                  : {:>12.0f} samples/s".format(sample_rate))
+    print("sample + IS weight      : {:>12.0f} samples/s".format(weight_rate))
+    print("batched priority update : {:>12.0f} priorities/s".format(update_rate))
+    print("O(n) cumsum sample      : {:>12.0f} samples/s".format(linear_rate))
@@ -0,0 +1,65 @@
+# Benchmark : SubprocessUnityEnvironment 의 병렬 환경 수에 따른 env steps/s 비교
+# before : 각 worker 가 AllBrainInfo 전체를 Pipe 로 pickle 하여 보내고, 부모 process 에서 deepcopy 후 merge
+# after  : worker 가 관측 / 보상 / 종료 정보를 공유 메모리의 자기 행에 쓰고 작은 header 만 전송 (merge 결과는 공유 메모리의 view)
+# Unity 빌드 대신 매 step 같은 84x84x3 시각적 관측을 반환하는 LocalEnvironment 를 사용하여 전달 비용만 측정
+# Usage : python benchmark/bench_shared_memory_env.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import local_env
+from mlagents.envs import BrainInfo
+from mlagents.envs.subprocess_environment import SubprocessUnityEnvironment
+
+# Parameter Setting
+num_envs_list = [2, 4, 8]
+num_steps = 1000
+state_size = [84, 84, 3]
+action_size = 4
+
+
+# 관측 이미지를 한번만 만들고 재사용하는 LocalEnvironment
+class StaticImageEnvironment(local_env.LocalEnvironment):
+    def _brain_info(self, reward, done):
+        if not hasattr(self, "visual_observation"):
+            self.visual_observation = super(StaticImageEnvironment, self)._brain_info(reward, done).visual_observations
+        return BrainInfo(self.visual_observation, np.zeros((1, 0)), [""], memory=np.zeros((0, 0)), reward=[reward],
+                         agents=[0], local_done=[done], max_reached=[done],
+                         vector_action=np.zeros((1, self.action_size)), text_action=[[]])
+
+
+# uint8_visual : False 이면 [0, 1] 범위의 float64 HWC 관측 (169 KB / 환경), True 이면 uint8 CHW 관측 (21 KB / 환경)
+def make_env_factory(uint8_visual):
+    def make_local_env(worker_id):
+        return StaticImageEnvironment(worker_id=worker_id, state_size=state_size, action_size=action_size,
+                                      uint8_visual=uint8_visual)
+    return make_local_env
+
+
+def run(num_envs, uint8_visual, shared_memory):
+    env = SubprocessUnityEnvironment(make_env_factory(uint8_visual), num_envs, shared_memory=shared_memory)
+    brain_name = list(env.external_brains.keys())[0]
+    env.reset(train_mode=True)
+    action = {brain_name: np.zeros(num_envs, dtype=np.int64)}
+    for _ in range(10):
+        env.step(action)
+
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        obs = np.asarray(env.step(action)[brain_name].visual_observations[0])
+    elapsed = time.perf_counter() - start
+
+    env.close()
+    return num_steps * num_envs / elapsed
+
+
+if __name__ == '__main__':
+    for uint8_visual in [False, True]:
+        for num_envs in num_envs_list:
+            before = run(num_envs, uint8_visual, shared_memory=False)
+            after = run(num_envs, uint8_visual, shared_memory=True)
+            print("uint8_visual: {} / num_envs: {} / before: {:>7.1f} env steps/s / after: {:>7.1f} env steps/s / "
+                  "speedup: {:.2f}x".format(uint8_visual, num_envs, before, after, after / before))
@@ -0,0 +1,106 @@
+# Benchmark : SocketCommunicator 의 메시지 크기별 exchange 지연 시간 비교
+# before : 12000 byte 씩 받아서 bytes 를 이어붙이는 기존 수신 방식 (TCP_NODELAY 사용 안함)
+# after  : 길이 header 를 읽은 뒤 재사용하는 버퍼에 recv_into 로 받고 버퍼에서 바로 protobuf 로 변환 (TCP_NODELAY)
+# Unity 대신 별도의 process 에서 요청마다 정해진 크기의 응답을 보내는 echo 환경 사용
+# Usage : python benchmark/bench_socket_communicator.py
+import os
+import sys
+import time
+import socket
+import struct
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mlagents.envs.socket_communicator import SocketCommunicator
+from mlagents.envs.communicator_objects import UnityMessage, UnityInput, AgentInfoProto
+from mlagents.envs.exception import UnityTimeOutException
+
+# Parameter Setting
+message_sizes = [1000, 100000, 5000000]
+num_exchanges = {1000: 2000, 100000: 500, 5000000: 20}
+base_port = 5900
+
+
+# 기존 SocketCommunicator 의 수신 방식
+class LegacySocketCommunicator(SocketCommunicator):
+    def initialize(self, inputs):
+        output = super(LegacySocketCommunicator, self).initialize(inputs)
+        self._conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 0)
+        return output
+
+    def _communicator_receive(self):
+        try:
+            s = self._conn.recv(self._buffer_size)
+            message_length = struct.unpack("I", bytearray(s[:4]))[0]
+            s = s[4:]
+            while len(s) != message_length:
+                s += self._conn.recv(self._buffer_size)
+        except socket.timeout as e:
+            raise UnityTimeOutException("The environment took too long to respond.")
+        return s
+
+    def _communicator_send(self, message):
+        self._conn.send(struct.pack("I", len(message)) + message)
+
+
+def recv_exactly(conn, n):
+    data = bytearray()
+    while len(data) < n:
+        chunk = conn.recv(n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+# Unity 대역 : 요청을 받을 때마다 size 크기의 시각적 관측을 담은 응답 전송
+def echo_env(port, size):
+    message = UnityMessage()
+    message.header.status = 200
+    message.unity_output.rl_output.agentInfos["Brain"].value.extend([AgentInfoProto(visual_observations=[b"x" * size])])
+    reply = message.SerializeToString()
+    reply = struct.pack("I", len(reply)) + reply
+
+    while True:
+        try:
+            conn = socket.create_connection(("localhost", port))
+            break
+        except ConnectionRefusedError:
+            time.sleep(0.01)
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    while True:
+        header = recv_exactly(conn, 4)
+        if header is None:
+            return
+        request = UnityMessage()
+        request.ParseFromString(bytes(recv_exactly(conn, struct.unpack("I", header)[0])))
+        if request.header.status != 200:
+            return
+        conn.sendall(reply)
+
+
+def run(communicator_class, size, worker_id):
+    process = multiprocessing.Process(target=echo_env, args=(base_port + worker_id, size), daemon=True)
+    process.start()
+    comm = communicator_class(worker_id=worker_id, base_port=base_port)
+    comm.initialize(UnityInput())
+
+    num = num_exchanges[size]
+    start = time.perf_counter()
+    for _ in range(num):
+        comm.exchange(UnityInput())
+    elapsed = (time.perf_counter() - start) / num
+
+    comm.close()
+    process.join()
+    return elapsed
+
+
+if __name__ == '__main__':
+    worker_id = 0
+    for size in message_sizes:
+        before = run(LegacySocketCommunicator, size, worker_id)
+        after = run(SocketCommunicator, size, worker_id + 1)
+        worker_id += 2
+        print("message: {:>9,d} bytes / before: {:>9.3f} ms / after: {:>9.3f} ms / speedup: {:.2f}x".format
+              (size, 1000 * before, 1000 * after, before / after))
@@ -0,0 +1,100 @@
+# Benchmark : brain 하나의 에이전트 수에 따른 UnityEnvironment.step 의 Python 측 처리 시간 비교
+# before : 행동 배열을 _flatten 으로 float 리스트로 변환하고, 에이전트마다 AgentActionProto 를 만들어 extend (복사)
+# after  : float32 배열을 한번에 변환 / 검사하고, 에이전트별 행동 리스트를 한번에 만들어 add 로 proto 를 직접 채움
+# Unity 대신 미리 만든 응답을 돌려주는 communicator 를 사용 (action : 행동 입력 생성만, step : 관측 변환 포함 step 전체)
+# Usage : python benchmark/bench_step_input.py
+import os
+import sys
+import time
+import logging
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mlagents.envs import UnityEnvironment
+from mlagents.envs.mock_communicator import MockCommunicator
+from mlagents.envs.communicator_objects import UnityRLInput, AgentActionProto
+
+# Parameter Setting
+num_agents_list = [64, 256, 1024]
+num_steps = 200
+action_size = 2
+logging.disable(logging.INFO)
+
+
+# 에이전트 수만큼의 응답을 한번만 만들어 재사용하는 communicator
+class CachedOutputCommunicator(MockCommunicator):
+    def exchange(self, inputs):
+        if not hasattr(self, "output"):
+            self.output = super(CachedOutputCommunicator, self).exchange(inputs)
+        return self.output
+
+
+def make_env_class(num_agents, legacy):
+    class StandInEnvironment(LegacyUnityEnvironment if legacy else UnityEnvironment):
+        @staticmethod
+        def get_communicator(worker_id, base_port, timeout_wait, communicator="rpc"):
+            return CachedOutputCommunicator(num_agents=num_agents)
+    return StandInEnvironment
+
+
+# 기존 방식 : 리스트로 변환하고 에이전트마다 proto 를 만들어 복사
+class LegacyUnityEnvironment(UnityEnvironment):
+    @classmethod
+    def _flatten_action(cls, arr):
+        return cls._flatten(arr)
+
+    def _generate_step_input(self, vector_action, memory, text_action, value, custom_action):
+        rl_in = UnityRLInput()
+        for b in vector_action:
+            n_agents = self._n_agents[b]
+            if n_agents == 0:
+                continue
+            _a_s = len(vector_action[b]) // n_agents
+            _m_s = len(memory[b]) // n_agents
+            for i in range(n_agents):
+                action = AgentActionProto(
+                    vector_actions=vector_action[b][i * _a_s: (i + 1) * _a_s],
+                    memories=memory[b][i * _m_s: (i + 1) * _m_s],
+                    text_actions=text_action[b][i],
+                    custom_action=custom_action[b][i]
+                )
+                if b in value:
+                    if value[b] is not None:
+                        action.value = float(value[b][i])
+                rl_in.agent_actions[b].value.extend([action])
+                rl_in.command = 0
+        return self.wrap_unity_input(rl_in)
+
+
+def run(num_agents, legacy):
+    env = make_env_class(num_agents, legacy)(file_name=None)
+    env.reset()
+    action = np.random.RandomState(0).rand(num_agents, action_size).astype(np.float32)
+    brain_name = env.brain_names[0]
+    vector_action = {brain_name: action}
+    empty = {brain_name: [""] * num_agents}
+    custom = {brain_name: [None] * num_agents}
+
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        env._generate_step_input({brain_name: env._flatten_action(action)}, {brain_name: []}, empty, {}, custom)
+    action_time = (time.perf_counter() - start) / num_steps
+
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        env.step(vector_action)
+    step_time = (time.perf_counter() - start) / num_steps
+
+    env.close()
+    return action_time, step_time
+
+
+if __name__ == '__main__':
+    for num_agents in num_agents_list:
+        before = run(num_agents, legacy=True)
+        after = run(num_agents, legacy=False)
+        print("num_agents: {:>4d} / action: before {:>7.3f} ms, after {:>7.3f} ms ({:.2f}x) / "
+              "step: before {:>7.3f} ms, after {:>7.3f} ms ({:.2f}x)".format
+              (num_agents, 1000 * before[0], 1000 * after[0], before[0] / after[0],
+               1000 * before[1], 1000 * after[1], before[1] / after[1]))
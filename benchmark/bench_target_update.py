@@ -0,0 +1,55 @@
+# Benchmark : 파라미터 수에 따른 타겟 네트워크 업데이트 시간 비교 (CPU)
+# before : soft update 는 파라미터마다 tau * param + (1 - tau) * target 임시 tensor 를 만들어 copy_, hard update 는 load_state_dict
+# after  : TargetUpdater 의 foreach 연산 (soft update : _foreach_lerp_, hard update : _foreach_copy_)
+# 네트워크는 hidden_size 크기의 Linear layer num_layers 개 (파라미터 tensor 수 = 2 x num_layers)
+# Usage : python benchmark/bench_target_update.py
+import os
+import sys
+import time
+
+import torch
+import torch.nn as nn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent import TargetUpdater
+
+# Parameter Setting
+hidden_size_list = [64, 256, 1024]
+num_layers = 6
+num_updates = 1000
+tau = 1e-3
+
+
+# 기존 soft update
+def legacy_soft_update(model, target_model, tau):
+    for target_param, param in zip(target_model.parameters(), model.parameters()):
+        target_param.data.copy_(tau*param.data + (1-tau)*target_param.data)
+
+
+def make_model(hidden_size):
+    return nn.Sequential(*[nn.Linear(hidden_size, hidden_size) for _ in range(num_layers)])
+
+
+def measure(fn):
+    fn()
+    start = time.perf_counter()
+    for _ in range(num_updates):
+        fn()
+    return (time.perf_counter() - start) / num_updates
+
+
+if __name__ == '__main__':
+    torch.set_num_threads(1)
+    for hidden_size in hidden_size_list:
+        model, target_model = make_model(hidden_size), make_model(hidden_size)
+        num_params = sum(param.numel() for param in model.parameters())
+        updater = TargetUpdater(model, target_model)
+
+        soft_before = measure(lambda: legacy_soft_update(model, target_model, tau))
+        soft_after = measure(lambda: updater.soft_update(tau))
+        hard_before = measure(lambda: target_model.load_state_dict(model.state_dict()))
+        hard_after = measure(updater.hard_update)
+        print("params: {:>9,d} / soft: before {:>8.1f} us, after {:>8.1f} us ({:.2f}x) / "
+              "hard: before {:>8.1f} us, after {:>8.1f} us ({:.2f}x)".format
+              (num_params, 1e6 * soft_before, 1e6 * soft_after, soft_before / soft_after,
+               1e6 * hard_before, 1e6 * hard_after, hard_before / hard_after))
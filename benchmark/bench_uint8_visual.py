@@ -0,0 +1,85 @@
+# Benchmark : 시각적 관측을 Unity 에서 받은 뒤 frame stack 까지의 step 당 시간과 메모리 비교
+# float : process_pixels 가 [0, 1] 범위의 float64 HWC 이미지를 만들고 get_obs 에서 255 를 곱해 CHW 로 변환하는 기존 방식
+# uint8 : uint8_visual 로 PNG 에서 읽은 uint8 이미지를 CHW 로 그대로 사용
+# 각 step 은 BrainInfo.from_agent_proto -> (SubprocessUnityEnvironment 의 pipe 전송을 위한 pickle) -> get_obs -> FrameStacker.push
+# Usage : python benchmark/bench_uint8_visual.py
+import io
+import os
+import sys
+import time
+import pickle
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import vector_env
+from mlagents.envs import BrainInfo, BrainParameters
+from mlagents.envs.communicator_objects import AgentInfoProto
+
+# Parameter Setting
+image_size = [84, 84]
+gray_scale = True
+stack_frame = 4
+skip_frame = 1
+num_agents_list = [1, 8]
+num_steps = 300
+
+
+def make_agent_infos(num_agents):
+    agent_infos = []
+    for i in range(num_agents):
+        # Unity 카메라 이미지와 같은 크기의 RGB PNG (랜덤 픽셀)
+        pixels = np.random.randint(0, 256, image_size + [3]).astype(np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, format='PNG')
+        agent_infos.append(AgentInfoProto(stacked_vector_observation=[], visual_observations=[buffer.getvalue()],
+                                          reward=0, done=False, id=i))
+    return agent_infos
+
+
+def run(agent_infos, brain_params, uint8_visual, measure_memory=False):
+    actor = vector_env.VectorActor(None, brain_params.brain_name, None, visual=True)
+    stacker = None
+    elapsed = 0.0
+    peak = 0
+    for _ in range(num_steps):
+        if measure_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        brain_info = BrainInfo.from_agent_proto(agent_infos, brain_params, uint8_visual)
+        message = pickle.dumps(brain_info, pickle.HIGHEST_PROTOCOL)
+        obs = actor.get_obs(pickle.loads(message))
+        if stacker is None:
+            stacker = vector_env.FrameStacker(len(obs), obs.shape[1:], stack_frame, skip_frame)
+        state = stacker.push(obs)
+        elapsed += time.perf_counter() - start
+
+        if measure_memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    return elapsed / num_steps, peak, len(message), state.copy()
+
+
+if __name__ == '__main__':
+    brain_params = BrainParameters("Brain", 0, 1, [{"height": image_size[0], "width": image_size[1], "blackAndWhite": gray_scale}],
+                                   [3], [], 0)
+    print("image: {} / gray_scale: {} / stack_frame: {}".format(image_size, gray_scale, stack_frame))
+    for num_agents in num_agents_list:
+        agent_infos = make_agent_infos(num_agents)
+        results = {}
+        for name, uint8_visual in [("float", False), ("uint8", True)]:
+            elapsed, _, message_size, state = run(agent_infos, brain_params, uint8_visual)
+            tracemalloc.start()
+            _, peak, _, _ = run(agent_infos, brain_params, uint8_visual, measure_memory=True)
+            tracemalloc.stop()
+            results[name] = elapsed, peak, message_size, state
+
+        print("num_agents: {} / max state difference: {}".format
+              (num_agents, np.abs(results["float"][3].astype(np.int64) - results["uint8"][3]).max()))
+        base = results["float"][0]
+        for name, (elapsed, peak, message_size, _) in results.items():
+            print("  {:<6} {:>8.1f} us/step / {:.2f}x / {:>11,d} bytes allocated/step (peak) / {:>9,d} bytes pickled/step".format
+                  (name, 1e6 * elapsed, base / elapsed, peak, message_size))
@@ -0,0 +1,75 @@
+# Benchmark : 병렬 환경 수에 따른 샘플 수집 속도 (env steps/s) 비교
+# Unity 빌드 대신 step 마다 step_time 만큼 CPU 를 사용하는 LocalEnvironment 를 SubprocessUnityEnvironment 로 실행
+# 행동은 DQN 네트워크 연산 한번으로 모든 환경에 대해 결정하고, transition 은 리플레이 메모리에 저장
+# Usage : python benchmark/bench_vector_env.py
+import os
+import sys
+import time
+import multiprocessing
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+config.state_size = [80, 80, 1]
+config.stack_frame = 4
+config.skip_frame = 1
+import model
+import local_env
+import replay_memory
+import vector_env
+from mlagents.envs.subprocess_environment import SubprocessUnityEnvironment
+
+# Parameter Setting
+num_envs_list = [1, 2, 4, 8]
+num_steps = 2000
+step_time = 0.002
+mem_maxlen = 10000
+device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+
+
+# 행동 결정과 리플레이 메모리 저장만 수행하는 agent
+class BenchAgent():
+    def __init__(self):
+        self.model = model.DQN(config.action_size, "main").to(device)
+        self.memory = replay_memory.ReplayMemory(mem_maxlen)
+
+    def get_action(self, state):
+        with torch.no_grad():
+            Q = self.model(torch.from_numpy(state).to(device))
+        return np.argmax(Q.cpu().numpy(), axis=1)
+
+    def append_sample(self, state, action, reward, next_state, done):
+        self.memory.append(state, action, reward, next_state, done)
+
+
+def make_local_env(worker_id):
+    return local_env.LocalEnvironment(worker_id=worker_id, step_time=step_time)
+
+
+def run(num_envs):
+    env = SubprocessUnityEnvironment(make_local_env, num_envs) if num_envs > 1 else make_local_env(0)
+    brain_name = list(env.external_brains.keys())[0]
+    agent = BenchAgent()
+    actor = vector_env.VectorActor(env, brain_name, agent, visual=True)
+    actor.reset(env.reset(train_mode=True)[brain_name])
+
+    step = 0
+    start = time.perf_counter()
+    while step < num_steps:
+        actor.step(agent.get_action(actor.state), True)
+        step += actor.num_envs
+    elapsed = time.perf_counter() - start
+
+    env.close()
+    return step / elapsed
+
+
+if __name__ == '__main__':
+    print("cpu: {} / device: {} / env step time: {:.1f} ms".format(multiprocessing.cpu_count(), device, 1000 * step_time))
+    base = None
+    for num_envs in num_envs_list:
+        rate = run(num_envs)
+        base = base or rate
+        print("num_envs: {} / {:>8.1f} env steps/s / {:.2f}x".format(num_envs, rate, rate / base))
@@ -11,6 +11,54 @@ train_mode = False
 batch_size = 128
 mem_maxlen = 50000
 
+# 시각적 관측 (visual observation) 에서 각 프레임을 한번만 저장하는 리플레이 메모리 사용 여부
+frame_memory = False
+
+# 시각적 관측을 [0, 1] 범위의 float 대신 Unity 에서 받은 uint8 이미지 (CHW) 그대로 사용
+# (정규화는 네트워크 안에서 device 로 옮긴 뒤에 수행)
+uint8_visual = False
+
+# 시각적 관측 (PNG) 을 디코딩할 thread 의 수 (0 이면 에이전트 / 카메라 순서대로 디코딩)
+decode_threads = 0
+
+# Unity 환경과의 통신 방식 ("rpc", "socket", "unix" : Unix domain socket, "shm" : 공유 메모리)
+# Unity 빌드도 같은 방식을 사용해야 함
+communicator = "rpc"
+
+# 미니 배치를 pinned memory 버퍼에 모아서 GPU 로 비동기 복사 (CUDA 사용 시에만 적용)
+pin_memory = True
+
+# 학습 중 미리 준비해 둘 미니 배치의 수 (0 이면 prefetch thread 를 사용하지 않음)
+prefetch_depth = 0
+
+# 환경 step 당 학습 (gradient step) 횟수
+replay_ratio = 1.0
+
+# 학습을 별도의 thread 에서 환경 step 과 동시에 수행 (actor 는 weight_sync_step 번 학습마다 복사한 네트워크로 행동 결정)
+async_learner = False
+weight_sync_step = 100
+
+# Ape-X : num_actors 개의 actor process 가 각자의 epsilon 으로 환경을 진행하고 transition 과 초기 우선순위를 replay process 로 전송
+# (0 이면 사용하지 않음, train.py --num-actors 로도 설정 가능)
+# i 번째 actor 의 epsilon = apex_epsilon ** (1 + apex_alpha * i / (num_actors - 1))
+num_actors = 0
+apex_epsilon = 0.4
+apex_alpha = 7
+# actor 가 한번에 전송하는 transition 의 수
+apex_send_size = 50
+# actor 들이 각자 CPU 에서 네트워크 연산을 하는 대신 learner process 의 inference server 가 상태를 모아 device 에서 배치로 연산
+# inference_max_wait : 첫 요청 이후 다른 actor 의 요청을 기다리는 최대 시간 (초, 클수록 배치가 커지지만 행동 결정이 늦어짐)
+# inference_max_batch_size : 이 수 이상의 상태가 모이면 기다리지 않고 연산
+apex_inference_server = False
+inference_max_wait = 0.002
+inference_max_batch_size = 256
+
+# Prioritized Experience Replay 사용 여부 (DQN 계열)
+prioritized_memory = False
+per_alpha = 0.6
+per_beta = 0.4
+per_eps = 1e-6
+
 discount_factor = 0.99
 learning_rate = 0.0001
 
@@ -51,6 +99,17 @@ alpha_lr = 3e-4
 # env_config = {'gridSize':3}
 env_config = {}
 
+# 동시에 실행할 환경의 수 (1 보다 크면 각 환경을 별도의 process 에서 병렬로 실행하고 행동을 배치로 결정)
+num_envs = 1
+
+# 병렬 환경의 관측 / 보상 / 종료 정보를 pickle 대신 공유 메모리로 전달 (num_envs 가 1 보다 클 때만 적용)
+shared_memory_env = False
+
+# Unity 빌드 대신 local_env.LocalEnvironment 사용 여부 (Unity 없이 학습 루프 / 처리량 확인용)
+local_env = False
+# LocalEnvironment 의 step 마다 Unity 의 응답을 기다리는 시간 (초) 을 흉내내는 대기 시간
+local_step_latency = 0.0
+
 device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
 
 # Environment Path
@@ -0,0 +1,151 @@
+import time
+import threading
+import collections
+import multiprocessing
+from multiprocessing.connection import wait
+
+import numpy as np
+
+
+# InferenceServer 클래스 -> 여러 actor 의 행동 결정 요청을 모아서 한번의 배치 연산으로 처리하는 thread
+# actor (다른 process 또는 thread) 는 connect 로 받은 InferenceClient 의 infer 로 상태 배치를 보내고 결과를 기다림
+# 첫 요청이 도착한 후 max_wait 초 동안 다른 actor 의 요청을 더 모으고, 모은 상태가 max_batch_size 개 이상이거나
+# 연결된 모든 actor 가 요청을 보냈으면 바로 연산 (max_wait 가 클수록 배치가 커지지만 요청의 대기 시간이 길어짐)
+# fn : 상태 배치 (numpy) 를 받아서 상태마다 하나씩의 결과 (numpy) 를 반환하는 함수
+class InferenceServer():
+    def __init__(self, fn, max_batch_size=256, max_wait=0.002):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        # fn 이 사용하는 네트워크를 갱신할 때는 lock 을 잡아서 연산 중에 바뀌지 않도록 함
+        self.lock = threading.Lock()
+
+        self.conns = []
+        self.conns_lock = threading.Lock()
+        # 새 client 연결과 종료 요청을 server thread 에 알리기 위한 pipe
+        self.wakeup_recv, self.wakeup_send = multiprocessing.Pipe(duplex=False)
+
+        # 배치 크기 (상태 수) 와 배치에 포함된 요청 수의 분포
+        self.stats_lock = threading.Lock()
+        self.batch_sizes = collections.Counter()
+        self.request_counts = collections.Counter()
+        self.wait_time = 0.0
+
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    # actor 하나를 위한 client 생성 (actor process 를 시작하기 전에 호출하여 인자로 전달)
+    def connect(self):
+        server_conn, client_conn = multiprocessing.Pipe()
+        with self.conns_lock:
+            self.conns.append(server_conn)
+        self.wakeup_send.send(None)
+        return InferenceClient(client_conn)
+
+    def _connections(self):
+        with self.conns_lock:
+            return list(self.conns)
+
+    def _receive(self, conns, requests):
+        for conn in conns:
+            try:
+                requests[conn] = conn.recv()
+            except (EOFError, OSError):
+                # 종료된 actor
+                with self.conns_lock:
+                    self.conns.remove(conn)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            requests = {}
+            ready = wait(self._connections() + [self.wakeup_recv])
+            if self.wakeup_recv in ready:
+                self.wakeup_recv.recv()
+                ready.remove(self.wakeup_recv)
+            self._receive(ready, requests)
+            if not requests:
+                continue
+
+            # 첫 요청 이후 max_wait 초까지 아직 요청하지 않은 actor 의 요청을 더 모음
+            start = time.perf_counter()
+            deadline = start + self.max_wait
+            while sum(len(state) for state in requests.values()) < self.max_batch_size:
+                idle = [conn for conn in self._connections() if conn not in requests]
+                timeout = deadline - time.perf_counter()
+                if not idle or timeout <= 0:
+                    break
+                ready = wait(idle, timeout)
+                if not ready:
+                    break
+                self._receive(ready, requests)
+            waited = time.perf_counter() - start
+
+            states = list(requests.values())
+            try:
+                with self.lock:
+                    result = self.fn(np.concatenate(states) if len(states) > 1 else states[0])
+            except Exception as e:
+                # fn 에서 발생한 에러는 infer 를 호출한 쪽에서 다시 발생
+                result = e
+
+            offset = 0
+            for conn, state in requests.items():
+                try:
+                    conn.send(result if isinstance(result, Exception) else result[offset:offset + len(state)])
+                except (BrokenPipeError, EOFError, OSError):
+                    pass
+                offset += len(state)
+
+            with self.stats_lock:
+                self.batch_sizes[offset] += 1
+                self.request_counts[len(requests)] += 1
+                self.wait_time += waited
+
+    # 마지막 호출 이후의 배치 크기 분포 반환 후 초기화
+    # batches : 연산 횟수, mean / p50 / p90 / max : 배치 크기 (상태 수), requests : 배치당 평균 요청 수,
+    # wait : 배치당 평균 요청 수집 시간 (초), histogram : {배치 크기: 연산 횟수}
+    def pop_stats(self):
+        with self.stats_lock:
+            batch_sizes, request_counts, wait_time = self.batch_sizes, self.request_counts, self.wait_time
+            self.batch_sizes, self.request_counts, self.wait_time = collections.Counter(), collections.Counter(), 0.0
+
+        batches = sum(batch_sizes.values())
+        if batches == 0:
+            return {"batches": 0, "mean": 0.0, "p50": 0, "p90": 0, "max": 0, "requests": 0.0, "wait": 0.0, "histogram": {}}
+        sizes = np.repeat(list(batch_sizes.keys()), list(batch_sizes.values()))
+        return {"batches": batches,
+                "mean": float(np.mean(sizes)),
+                "p50": int(np.percentile(sizes, 50, method="lower")),
+                "p90": int(np.percentile(sizes, 90, method="lower")),
+                "max": int(np.max(sizes)),
+                "requests": sum(count * n for count, n in request_counts.items()) / batches,
+                "wait": wait_time / batches,
+                "histogram": dict(sorted(batch_sizes.items()))}
+
+    # server thread 종료 (연결된 client 의 요청은 더 이상 처리하지 않음)
+    def close(self):
+        self.stop_event.set()
+        self.wakeup_send.send(None)
+        self.thread.join()
+        with self.conns_lock:
+            for conn in self.conns:
+                conn.close()
+            self.conns = []
+
+
+# InferenceClient 클래스 -> actor 에서 InferenceServer 로 상태 배치를 보내고 결과를 받음
+class InferenceClient():
+    def __init__(self, conn):
+        self.conn = conn
+
+    def infer(self, state):
+        self.conn.send(state)
+        result = self.conn.recv()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self):
+        self.conn.close()
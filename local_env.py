@@ -0,0 +1,88 @@
+import time
+import numpy as np
+
+from mlagents.envs import AllBrainInfo, BrainInfo, BrainParameters
+from mlagents.envs.base_unity_environment import BaseUnityEnvironment
+
+import config
+
+
+# LocalEnvironment 클래스 -> Unity 빌드 없이 학습 루프와 병렬 환경을 시험하기 위한 대역 환경
+# 에이전트 하나에 대해 UnityEnvironment 와 같은 형태의 BrainInfo 를 반환하며, 보상은 랜덤
+# step_time 동안 CPU 연산을 수행하여 Unity 의 물리 연산 / 렌더링 시간을 흉내내고,
+# step_latency 동안은 CPU 를 사용하지 않고 대기하여 별도 process 인 Unity 의 응답을 기다리는 시간을 흉내냄
+# uint8_visual 이면 UnityEnvironment 와 같이 시각적 관측을 uint8 CHW 이미지로 반환
+class LocalEnvironment(BaseUnityEnvironment):
+    def __init__(self, worker_id=0, state_size=None, action_size=None, episode_length=200, step_time=0.0, step_latency=0.0,
+                 uint8_visual=False):
+        self.state_size = config.state_size if state_size is None else state_size
+        self.action_size = config.action_size if action_size is None else action_size
+        self.visual = isinstance(self.state_size, (list, tuple))
+        self.episode_length = episode_length
+        self.step_time = step_time
+        self.step_latency = step_latency
+        self.uint8_visual = uint8_visual
+        self.brain_name = "LocalBrain"
+        self.random = np.random.RandomState(worker_id)
+        self.step_count = 0
+
+        if self.visual:
+            height, width, channel = self.state_size
+            camera_resolutions = [{"height": height, "width": width, "blackAndWhite": channel == 1}]
+            vector_observation_size = 0
+        else:
+            camera_resolutions = []
+            vector_observation_size = self.state_size
+        # 시각적 관측은 이산 행동 (DQN 계열), 벡터 관측은 연속 행동 (DDPG, SAC) 으로 가정
+        self.brain = BrainParameters(self.brain_name, vector_observation_size, 1, camera_resolutions,
+                                     [self.action_size], [], 1 - int(self.visual))
+
+    def reset(self, config=None, train_mode=True) -> AllBrainInfo:
+        self.step_count = 0
+        return {self.brain_name: self._brain_info(0.0, False)}
+
+    def step(self, vector_action=None, memory=None, text_action=None, value=None) -> AllBrainInfo:
+        # Unity 의 한 step 만큼 CPU 사용
+        end = time.perf_counter() + self.step_time
+        while time.perf_counter() < end:
+            pass
+        time.sleep(self.step_latency)
+
+        self.step_count += 1
+        done = self.step_count >= self.episode_length
+        brain_info = self._brain_info(self.random.rand(), done)
+        # Unity 와 같이 에피소드가 끝나면 다음 step 부터 새로운 에피소드 시작
+        if done:
+            self.step_count = 0
+        return {self.brain_name: brain_info}
+
+    def _brain_info(self, reward, done):
+        if self.visual:
+            # process_pixels 결과와 같은 uint8 CHW 또는 [0, 1] 범위의 HWC 이미지
+            image = self.random.randint(0, 256, self.state_size, dtype=np.uint8)
+            if self.uint8_visual:
+                visual_observation = [[np.ascontiguousarray(image.transpose(2, 0, 1))]]
+            else:
+                visual_observation = [[image / 255.0]]
+            vector_observation = np.zeros((1, 0))
+        else:
+            visual_observation = []
+            vector_observation = self.random.randn(1, self.state_size)
+        return BrainInfo(visual_observation, vector_observation, [""], memory=np.zeros((0, 0)), reward=[reward], agents=[0],
+                         local_done=[done], max_reached=[done],
+                         vector_action=np.zeros((1, self.action_size)), text_action=[[]])
+
+    @property
+    def global_done(self):
+        return False
+
+    @property
+    def external_brains(self):
+        return {self.brain_name: self.brain}
+
+    @property
+    def reset_parameters(self):
+        return {}
+
+    def close(self):
+        pass
@@ -2,6 +2,7 @@ import logging
 import numpy as np
 import io
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 from PIL import Image
 
@@ -48,6 +49,38 @@ class BrainInfo:
         self.action_masks = safe_concat_np_ndarray(self.action_masks, other.action_masks)
         self.custom_observations = safe_concat_lists(self.custom_observations, other.custom_observations)
 
+    @staticmethod
+    def merge_all(brain_infos: List['BrainInfo'], agents: Optional[List] = None) -> 'BrainInfo':
+        """
+        Merges the BrainInfos of several environments, concatenating each field once instead of
+        merging them one by one.
+        :param brain_infos: BrainInfos to merge, in order.
+        :param agents: Agent ids of the merged BrainInfo. The ids of brain_infos are concatenated if None.
+        :return: The merged BrainInfo, which does not share lists or arrays with brain_infos.
+        """
+        num_agents = [len(info.agents) for info in brain_infos]
+        visual_observations = []
+        for i in range(len(brain_infos[0].visual_observations or [])):
+            cameras = [info.visual_observations[i] for info in brain_infos if info.visual_observations[i] is not None]
+            if cameras and all(isinstance(x, np.ndarray) for x in cameras):
+                visual_observations.append(np.concatenate(cameras, axis=0))
+            else:
+                visual_observations.append([x for camera in cameras for x in camera])
+        return BrainInfo(
+            visual_observation=visual_observations,
+            vector_observation=concat_np_ndarrays([info.vector_observations for info in brain_infos], keep_empty=True),
+            text_observations=concat_lists([info.text_observations for info in brain_infos]),
+            memory=concat_memories([info.memories for info in brain_infos], num_agents),
+            reward=concat_lists([info.rewards for info in brain_infos]),
+            agents=concat_lists([info.agents for info in brain_infos]) if agents is None else agents,
+            local_done=concat_lists([info.local_done for info in brain_infos]),
+            vector_action=concat_np_ndarrays([info.previous_vector_actions for info in brain_infos]),
+            text_action=concat_lists([info.previous_text_actions for info in brain_infos]),
+            max_reached=concat_lists([info.max_reached for info in brain_infos]),
+            action_mask=concat_np_ndarrays([info.action_masks for info in brain_infos]),
+            custom_observations=concat_lists([info.custom_observations for info in brain_infos])
+        )
+
     @staticmethod
     def merge_memories(m1, m2, agents1, agents2):
         if len(m1) == 0 and len(m2) != 0:
@@ -65,32 +98,60 @@ class BrainInfo:
         return np.append(m1, m2, axis=0)
 
     @staticmethod
-    def process_pixels(image_bytes, gray_scale):
+    def process_pixels(image_bytes, gray_scale, uint8=False, out=None):
         """
         Converts byte array observation image into numpy array, re-sizes it,
         and optionally converts it to grey scale
         :param gray_scale: Whether to convert the image to grayscale.
         :param image_bytes: input byte array corresponding to image
+        :param uint8: Whether to return the decoded uint8 pixels in channel-first (CHW) order
+        instead of a float array in [0, 1] in channel-last (HWC) order.
+        :param out: Optional array with the shape and dtype of the result to decode into.
         :return: processed numpy array of observation from environment
         """
-        s = bytearray(image_bytes)
-        image = Image.open(io.BytesIO(s))
+        image = Image.open(io.BytesIO(image_bytes))
+        if uint8:
+            s = np.asarray(image)
+            if s.ndim == 2:
+                s = s[np.newaxis]
+            elif gray_scale:
+                # Channel mean rounded down, computed in integers to avoid float copies of the image.
+                channels = s.shape[2]
+                s = s.sum(axis=2, dtype=np.uint16)
+                if out is not None:
+                    np.floor_divide(s, channels, out=out[0], casting='unsafe')
+                    return out
+                s //= channels
+                return s.astype(np.uint8)[np.newaxis]
+            else:
+                s = s.transpose(2, 0, 1)
+            if out is not None:
+                np.copyto(out, s)
+                return out
+            return np.ascontiguousarray(s)
         s = np.array(image) / 255.0
         if gray_scale:
             s = np.mean(s, axis=2)
             s = np.reshape(s, [s.shape[0], s.shape[1], 1])
+        if out is not None:
+            np.copyto(out, s)
+            return out
         return s
 
     @staticmethod
-    def from_agent_proto(agent_info_list, brain_params):
+    def from_agent_proto(agent_info_list, brain_params, uint8_visual=False, image_decoder=None):
         """
         Converts list of agent infos to BrainInfo.
+        :param uint8_visual: Whether visual observations are kept as uint8 CHW arrays (see process_pixels).
+        :param image_decoder: ImageDecoder used for the visual observations (decodes serially if None).
         """
+        if image_decoder is None:
+            image_decoder = default_image_decoder
         vis_obs = []
         for i in range(brain_params.number_visual_observations):
-            obs = [BrainInfo.process_pixels(x.visual_observations[i],
-                                            brain_params.camera_resolutions[i]['blackAndWhite'])
-                   for x in agent_info_list]
+            obs = image_decoder.decode([x.visual_observations[i] for x in agent_info_list],
+                                       brain_params.camera_resolutions[i]['blackAndWhite'],
+                                       uint8_visual, key=(brain_params.brain_name, i))
             vis_obs += [obs]
         if len(agent_info_list) == 0:
             memory_size = 0
@@ -162,10 +223,109 @@ def safe_concat_np_ndarray(a1: Optional[np.ndarray], a2: Optional[np.ndarray]):
     return None
 
 
+def concat_lists(lists: List[Optional[List]]) -> Optional[List]:
+    """
+    Concatenates lists in one pass, like safe_concat_lists applied in turn (None if all are None).
+    """
+    lists = [l for l in lists if l is not None]
+    if not lists:
+        return None
+    return [x for l in lists for x in l]
+
+
+def concat_np_ndarrays(arrays: List[Optional[np.ndarray]], keep_empty=False) -> Optional[np.ndarray]:
+    """
+    Concatenates arrays along the first axis in one pass, like safe_concat_np_ndarray applied in turn.
+    :param keep_empty: Whether empty arrays are concatenated as well instead of being skipped.
+    """
+    arrays = [np.asarray(a) for a in arrays if a is not None]
+    if not keep_empty:
+        arrays = [a for a in arrays if a.size != 0]
+    if not arrays:
+        return None
+    return np.concatenate(arrays, axis=0)
+
+
+def concat_memories(memories: List[Optional[np.ndarray]], num_agents: List[int]) -> Optional[np.ndarray]:
+    """
+    Concatenates memories in one pass, like BrainInfo.merge_memories applied in turn: memories narrower than the
+    widest one are padded with zeros, and agents without memories get zero rows.
+    """
+    memories = [np.asarray(m) if m is not None else None for m in memories]
+    width = max([m.shape[1] for m in memories if m is not None and len(m) != 0], default=0)
+    if width == 0:
+        return concat_np_ndarrays(memories, keep_empty=True)
+    merged = np.zeros((sum(num_agents), width))
+    start = 0
+    for m, n in zip(memories, num_agents):
+        if m is not None and len(m) != 0:
+            merged[start:start + len(m), :m.shape[1]] = m
+        start += n
+    return merged
+
+
 # Renaming of dictionary of brain name to BrainInfo for clarity
 AllBrainInfo = Dict[str, BrainInfo]
 
 
+class ImageDecoder:
+    """
+    Decodes the visual observations of one camera for all agents of a brain.
+    The default implementation calls BrainInfo.process_pixels for each image in turn.
+    """
+
+    def decode(self, images, gray_scale, uint8=False, key=None):
+        """
+        :param images: Encoded images, one per agent.
+        :param gray_scale: Whether to convert the images to grayscale.
+        :param uint8: Whether to return uint8 CHW arrays (see BrainInfo.process_pixels).
+        :param key: Identifies the brain and camera the images come from.
+        :return: List of decoded arrays, one per agent.
+        """
+        return [BrainInfo.process_pixels(x, gray_scale, uint8) for x in images]
+
+    def close(self):
+        pass
+
+
+class ThreadPoolImageDecoder(ImageDecoder):
+    def __init__(self, num_threads: int, reuse_output: bool = False):
+        """
+        Decodes the images of each camera in parallel on a thread pool. PIL releases the GIL while
+        decoding, so the threads can run at the same time.
+
+        :int num_threads: Number of decoding threads.
+        :bool reuse_output: Whether to decode into one array per camera (key) that is reused on every call.
+        The returned arrays are then views into it and are overwritten by the next decode of the same camera.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=num_threads)
+        self.reuse_output = reuse_output
+        self.outputs = {}
+
+    def decode(self, images, gray_scale, uint8=False, key=None):
+        if len(images) == 0:
+            return []
+        if not self.reuse_output:
+            return list(self.executor.map(lambda x: BrainInfo.process_pixels(x, gray_scale, uint8), images))
+
+        # The first image gives the shape and dtype of the output array.
+        first = BrainInfo.process_pixels(images[0], gray_scale, uint8)
+        out = self.outputs.get(key)
+        if out is None or out.shape != (len(images),) + first.shape or out.dtype != first.dtype:
+            out = np.empty((len(images),) + first.shape, dtype=first.dtype)
+            self.outputs[key] = out
+        out[0] = first
+        list(self.executor.map(lambda i: BrainInfo.process_pixels(images[i], gray_scale, uint8, out[i]),
+                               range(1, len(images))))
+        return list(out)
+
+    def close(self):
+        self.executor.shutdown()
+
+
+default_image_decoder = ImageDecoder()
+
+
 class BrainParameters:
     def __init__(self,
                  brain_name: str,
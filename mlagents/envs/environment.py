@@ -7,7 +7,7 @@ import subprocess
 from typing import *
 
 from mlagents.envs.base_unity_environment import BaseUnityEnvironment
-from .brain import AllBrainInfo, BrainInfo, BrainParameters
+from .brain import AllBrainInfo, BrainInfo, BrainParameters, ImageDecoder
 from .exception import UnityEnvironmentException, UnityActionException, UnityTimeOutException
 
 from .communicator_objects import UnityRLInput, UnityRLOutput, AgentActionProto, \
@@ -15,6 +15,9 @@ from .communicator_objects import UnityRLInput, UnityRLOutput, AgentActionProto,
     UnityInput, UnityOutput, CustomResetParameters, CustomAction
 
 from .rpc_communicator import RpcCommunicator
+from .socket_communicator import SocketCommunicator
+from .unix_socket_communicator import UnixSocketCommunicator
+from .shared_memory_communicator import SharedMemoryCommunicator
 from sys import platform
 
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +28,8 @@ class UnityEnvironment(BaseUnityEnvironment):
     SCALAR_ACTION_TYPES = (int, np.int32, np.int64, float, np.float32, np.float64)
     SINGLE_BRAIN_ACTION_TYPES = SCALAR_ACTION_TYPES + (list, np.ndarray)
     SINGLE_BRAIN_TEXT_TYPES = (str, list, np.ndarray)
+    COMMUNICATORS = {"rpc": RpcCommunicator, "socket": SocketCommunicator, "unix": UnixSocketCommunicator,
+                     "shm": SharedMemoryCommunicator}
 
     def __init__(self,
                  file_name: Optional[str] = None,
@@ -33,7 +38,10 @@ class UnityEnvironment(BaseUnityEnvironment):
                  seed: int = 0,
                  docker_training: bool = False,
                  no_graphics: bool = False,
-                 timeout_wait: int = 30):
+                 timeout_wait: int = 30,
+                 uint8_visual: bool = False,
+                 image_decoder: Optional[ImageDecoder] = None,
+                 communicator: str = "rpc"):
         """
         Starts a new unity environment and establishes a connection with the environment.
         Notice: Currently communication between Unity and Python takes place over an open socket without authentication.
@@ -45,16 +53,24 @@ class UnityEnvironment(BaseUnityEnvironment):
         :bool docker_training: Informs this class whether the process is being run within a container.
         :bool no_graphics: Whether to run the Unity simulator in no-graphics mode
         :int timeout_wait: Time (in seconds) to wait for connection from environment.
+        :bool uint8_visual: Whether to return visual observations as raw uint8 arrays in CHW order
+        instead of float arrays in [0, 1] in HWC order.
+        :ImageDecoder image_decoder: Decoder for the visual observations (decodes serially if None).
+        It is closed together with the environment.
+        :string communicator: Transport to the environment, one of "rpc" (gRPC over TCP), "socket" (TCP socket),
+        "unix" (Unix domain socket) or "shm" (shared memory). The environment must use the same transport.
         :bool train_mode: Whether to run in training mode, speeding up the simulation, by default.
         """
 
+        self._uint8_visual = uint8_visual
+        self._image_decoder = image_decoder or ImageDecoder()
         atexit.register(self._close)
         self.port = base_port + worker_id
         self._buffer_size = 12000
         self._version_ = "API-8"
         self._loaded = False  # If true, this means the environment was successfully loaded
         self.proc1 = None  # The process that is started. If None, no process was started
-        self.communicator = self.get_communicator(worker_id, base_port, timeout_wait)
+        self.communicator = self.get_communicator(worker_id, base_port, timeout_wait, communicator)
 
         # If the environment name is None, a new environment will not be launched
         # and the communicator will directly try to connect to an existing unity environment.
@@ -138,8 +154,12 @@ class UnityEnvironment(BaseUnityEnvironment):
         return self._external_brain_names
 
     @staticmethod
-    def get_communicator(worker_id, base_port, timeout_wait):
-        return RpcCommunicator(worker_id, base_port, timeout_wait)
+    def get_communicator(worker_id, base_port, timeout_wait, communicator="rpc"):
+        if communicator not in UnityEnvironment.COMMUNICATORS:
+            raise UnityEnvironmentException(
+                "Unknown communicator {0}. Available communicators are {1}.".format(
+                    communicator, ", ".join(UnityEnvironment.COMMUNICATORS)))
+        return UnityEnvironment.COMMUNICATORS[communicator](worker_id, base_port, timeout_wait)
 
     @property
     def external_brains(self):
@@ -375,14 +395,14 @@ class UnityEnvironment(BaseUnityEnvironment):
                                                     self._brains[
                                                         brain_name].vector_action_space_size[0]
                 else:
-                    vector_action[brain_name] = self._flatten(vector_action[brain_name])
+                    vector_action[brain_name] = self._flatten_action(vector_action[brain_name])
                 if brain_name not in memory:
                     memory[brain_name] = []
                 else:
                     if memory[brain_name] is None:
                         memory[brain_name] = []
                     else:
-                        memory[brain_name] = self._flatten(memory[brain_name])
+                        memory[brain_name] = self._flatten_action(memory[brain_name])
                 if brain_name not in text_action:
                     text_action[brain_name] = [""] * n_agent
                 else:
@@ -462,6 +482,7 @@ class UnityEnvironment(BaseUnityEnvironment):
     def _close(self):
         self._loaded = False
         self.communicator.close()
+        self._image_decoder.close()
         if self.proc1 is not None:
             self.proc1.kill()
 
@@ -485,6 +506,28 @@ class UnityEnvironment(BaseUnityEnvironment):
         arr = [float(x) for x in arr]
         return arr
 
+    @classmethod
+    def _flatten_action(cls, arr) -> Union[List[float], np.ndarray]:
+        """
+        Flattens actions (or memories) of all agents of a brain.
+        :param arr: numpy array, list or scalar.
+        :return: flat float32 array if arr is a numeric numpy array, otherwise flattened list (see _flatten).
+        """
+        if isinstance(arr, np.ndarray) and arr.dtype.kind in 'biuf':
+            # Actions are sent as 32 bit floats, so numpy arrays are converted once as a whole.
+            return np.ascontiguousarray(arr, dtype=np.float32).reshape(-1)
+        return cls._flatten(arr)
+
+    @staticmethod
+    def _split_agents(arr, n_agents) -> List[List[float]]:
+        """
+        Splits flattened actions (or memories) into the lists of each agent.
+        """
+        if isinstance(arr, np.ndarray):
+            return arr.reshape(n_agents, -1).tolist()
+        size = len(arr) // n_agents
+        return [arr[i * size: (i + 1) * size] for i in range(n_agents)]
+
     def _get_state(self, output: UnityRLOutput) -> (AllBrainInfo, bool):
         """
         Collects experience information from all external brains in environment at current step.
@@ -495,7 +538,9 @@ class UnityEnvironment(BaseUnityEnvironment):
         for brain_name in output.agentInfos:
             agent_info_list = output.agentInfos[brain_name].value
             _data[brain_name] = BrainInfo.from_agent_proto(agent_info_list,
-                                                           self.brains[brain_name])
+                                                           self.brains[brain_name],
+                                                           self._uint8_visual,
+                                                           self._image_decoder)
         return _data, global_done
 
     def _generate_step_input(self, vector_action, memory, text_action, value, custom_action) -> UnityRLInput:
@@ -504,20 +549,25 @@ class UnityEnvironment(BaseUnityEnvironment):
             n_agents = self._n_agents[b]
             if n_agents == 0:
                 continue
-            _a_s = len(vector_action[b]) // n_agents
-            _m_s = len(memory[b]) // n_agents
+            vector_actions = self._split_agents(vector_action[b], n_agents)
+            memories = self._split_agents(memory[b], n_agents) if len(memory[b]) != 0 else None
+            values = None
+            if b in value and value[b] is not None:
+                values = np.asarray(value[b], dtype=np.float64).reshape(-1).tolist()
+            agent_actions = rl_in.agent_actions[b].value
             for i in range(n_agents):
-                action = AgentActionProto(
-                    vector_actions=vector_action[b][i * _a_s: (i + 1) * _a_s],
-                    memories=memory[b][i * _m_s: (i + 1) * _m_s],
-                    text_actions=text_action[b][i],
-                    custom_action=custom_action[b][i]
-                )
-                if b in value:
-                    if value[b] is not None:
-                        action.value = float(value[b][i])
-                rl_in.agent_actions[b].value.extend([action])
-                rl_in.command = 0
+                # add() builds the message in place, while extend() would copy it. Fields left at their
+                # default are not set.
+                action = agent_actions.add(vector_actions=vector_actions[i])
+                if memories is not None:
+                    action.memories.extend(memories[i])
+                if text_action[b][i]:
+                    action.text_actions = text_action[b][i]
+                if custom_action[b][i] is not None:
+                    action.custom_action.CopyFrom(custom_action[b][i])
+                if values is not None:
+                    action.value = values[i]
+            rl_in.command = 0
         return self.wrap_unity_input(rl_in)
 
     def _generate_reset_input(self, training, config, custom_reset_parameters) -> UnityRLInput:
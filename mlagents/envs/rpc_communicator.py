@@ -2,7 +2,7 @@ import logging
 import grpc
 
 import socket
-from multiprocessing import Pipe
+import threading
 from concurrent.futures import ThreadPoolExecutor
 
 from .communicator import Communicator
@@ -15,15 +15,56 @@ logger = logging.getLogger("mlagents.envs")
 
 class UnityToExternalServicerImplementation(UnityToExternalServicer):
     def __init__(self):
-        self.parent_conn, self.child_conn = Pipe()
+        """
+        Hands the messages of Unity to the Python side and its replies back to the gRPC thread serving Unity.
+        The message objects are passed directly instead of being pickled through a Pipe.
+        """
+        self._condition = threading.Condition()
+        self._request = None
+        self._reply = None
+        self._closed = False
 
     def Initialize(self, request, context):
-        self.child_conn.send(request)
-        return self.child_conn.recv()
+        return self.Exchange(request, context)
 
     def Exchange(self, request, context):
-        self.child_conn.send(request)
-        return self.child_conn.recv()
+        with self._condition:
+            self._request = request
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: self._reply is not None or self._closed)
+            reply, self._reply = self._reply, None
+        if reply is None:
+            reply = UnityMessage()
+            reply.header.status = 400
+        return reply
+
+    def receive(self, timeout=None):
+        """
+        Waits for the next message from Unity.
+        :param timeout: Time (in seconds) to wait, or None to wait until a message arrives.
+        :return: The message, or None if no message arrived in time.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._request is not None, timeout):
+                return None
+            request, self._request = self._request, None
+        return request
+
+    def send(self, reply):
+        """
+        Replies to the last message from Unity.
+        """
+        with self._condition:
+            self._reply = reply
+            self._condition.notify_all()
+
+    def close(self):
+        """
+        Releases the pending and any later requests from Unity with a shutdown signal (unless a reply was sent).
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
 
 
 class RpcCommunicator(Communicator):
@@ -75,27 +116,27 @@ class RpcCommunicator(Communicator):
             s.close()
 
     def initialize(self, inputs: UnityInput) -> UnityOutput:
-        if not self.unity_to_external.parent_conn.poll(self.timeout_wait):
+        aca_message = self.unity_to_external.receive(self.timeout_wait)
+        if aca_message is None:
             raise UnityTimeOutException(
                 "The Unity environment took too long to respond. Make sure that :\n"
                 "\t The environment does not need user interaction to launch\n"
                 "\t The Academy's Broadcast Hub is configured correctly\n"
                 "\t The Agents are linked to the appropriate Brains\n"
                 "\t The environment and the Python interface have compatible versions.")
-        aca_param = self.unity_to_external.parent_conn.recv().unity_output
         message = UnityMessage()
         message.header.status = 200
         message.unity_input.CopyFrom(inputs)
-        self.unity_to_external.parent_conn.send(message)
-        self.unity_to_external.parent_conn.recv()
-        return aca_param
+        self.unity_to_external.send(message)
+        self.unity_to_external.receive()
+        return aca_message.unity_output
 
     def exchange(self, inputs: UnityInput) -> UnityOutput:
         message = UnityMessage()
         message.header.status = 200
         message.unity_input.CopyFrom(inputs)
-        self.unity_to_external.parent_conn.send(message)
-        output = self.unity_to_external.parent_conn.recv()
+        self.unity_to_external.send(message)
+        output = self.unity_to_external.receive()
         if output.header.status != 200:
             return None
         return output.unity_output
@@ -107,7 +148,7 @@ class RpcCommunicator(Communicator):
         if self.is_open:
             message_input = UnityMessage()
             message_input.header.status = 400
-            self.unity_to_external.parent_conn.send(message_input)
-            self.unity_to_external.parent_conn.close()
+            self.unity_to_external.send(message_input)
+            self.unity_to_external.close()
             self.server.stop(False)
             self.is_open = False
@@ -0,0 +1,281 @@
+import copy
+import numpy as np
+
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .brain import AllBrainInfo, BrainInfo
+from .shared_memory_communicator import attach_shared_memory
+
+# BrainInfo fields holding one row per agent, which are candidates for shared memory.
+# Visual observations are stored per camera as ("visual_observations", camera index).
+ARRAY_FIELDS = ["vector_observations", "memories", "rewards", "local_done", "max_reached",
+                "previous_vector_actions", "action_masks"]
+# Array fields that BrainInfo holds as lists, restored as lists so that BrainInfo.merge can extend them.
+LISTED_ARRAY_FIELDS = ["rewards", "local_done", "max_reached"]
+ALIGNMENT = 64
+
+# Segments that could not be closed yet because arrays returned to the caller still point into them.
+_retired_segments = []
+
+
+class SharedBrainInfoLayout(NamedTuple):
+    name: str
+    # brain name -> [(field, dtype, shape of one agent's row, offset in a slot)]
+    fields: Dict[str, List[Tuple[Tuple[str, Optional[int]], str, Tuple[int, ...], int]]]
+    # brain name -> number of agents of each worker
+    agent_counts: Dict[str, List[int]]
+    slot_size: int
+
+
+class SharedBrainInfo(NamedTuple):
+    """
+    Response of a worker whose array fields were written to shared memory (and are None here).
+    """
+    all_brain_info: AllBrainInfo
+
+
+def _get_field(brain_info, field):
+    name, index = field
+    value = getattr(brain_info, name)
+    if index is not None:
+        value = value[index] if value is not None and index < len(value) else None
+    return value
+
+
+def _set_field(brain_info, field, value):
+    name, index = field
+    if index is None:
+        setattr(brain_info, name, value)
+    else:
+        brain_info.visual_observations[index] = value
+
+
+def _as_array(value):
+    if value is None:
+        return None
+    try:
+        array = np.asarray(value)
+    except ValueError:
+        return None
+    return None if array.dtype == object else array
+
+
+def _fits(target, value):
+    return value.shape == target.shape and \
+        (value.dtype == target.dtype or np.can_cast(value.dtype, target.dtype, casting='same_kind'))
+
+
+def _copy_rows(target, value):
+    """
+    Copies one row per agent into target.
+    :return: Whether the value had the shape and a compatible dtype of target.
+    """
+    if isinstance(value, (list, tuple)) and len(value) > 0 and isinstance(value[0], np.ndarray):
+        # Per agent arrays (visual observations) are copied one by one instead of being stacked first.
+        if len(value) != len(target):
+            return False
+        for row, x in zip(target, value):
+            if not isinstance(x, np.ndarray) or not _fits(row, x):
+                return False
+            row[...] = x
+        return True
+    value = _as_array(value)
+    if value is None:
+        return False
+    if value.size == 0 and target.size == 0:
+        return True
+    if not _fits(target, value):
+        return False
+    target[...] = value
+    return True
+
+
+def _release(shm):
+    try:
+        shm.close()
+        return True
+    except BufferError:
+        return False
+
+
+class SharedBrainInfoBuffer(object):
+    def __init__(self, layout: SharedBrainInfoLayout, shm: shared_memory.SharedMemory, owner: bool):
+        """
+        Shared memory holding the array fields of the BrainInfos of all workers of a SubprocessUnityEnvironment,
+        laid out as the merged BrainInfo: worker i writes the rows of its agents after those of workers 0 to i-1,
+        so the merged fields are views into the buffer and nothing is copied or pickled after the worker's write.
+        Each worker uses two slots in turn, so a result stays valid until the step after the next one.
+
+        :param layout: Fields and agent counts, shared with the workers.
+        :param shm: The shared memory segment.
+        :param owner: Whether this side created the segment and unlinks it on close.
+        """
+        self.layout = layout
+        self.shm = shm
+        self.owner = owner
+        self._rows = {}
+        self.starts = {brain_name: np.concatenate([[0], np.cumsum(counts)]).tolist()
+                       for brain_name, counts in layout.agent_counts.items()}
+        # Workers may be stepped separately, so the current slot is kept per worker.
+        self.slots = [0] * len(next(iter(layout.agent_counts.values())))
+        self.arrays = []
+        for slot in range(2):
+            arrays = {}
+            for brain_name, fields in layout.fields.items():
+                num_agents = self.starts[brain_name][-1]
+                # frombuffer keeps the segment exported while an array is alive, so it cannot be unmapped under it.
+                arrays[brain_name] = {
+                    field: np.frombuffer(shm.buf, dtype=np.dtype(dtype), count=num_agents * int(np.prod(shape)),
+                                         offset=slot * layout.slot_size + offset).reshape((num_agents,) + tuple(shape))
+                    for field, dtype, shape, offset in fields}
+            self.arrays.append(arrays)
+
+    @staticmethod
+    def _field_spec(arrays, counts):
+        """
+        :return: dtype and row shape if every worker has one row per agent of the same shape, else None.
+        """
+        spec = None
+        for array, count in zip(arrays, counts):
+            if array is None or array.ndim == 0:
+                return None
+            if count == 0:
+                if array.size != 0:
+                    return None
+                continue
+            if array.shape[0] != count:
+                return None
+            if spec is None:
+                spec = (array.dtype, array.shape[1:])
+            elif array.shape[1:] != spec[1] or not np.can_cast(array.dtype, spec[0], casting='same_kind'):
+                return None
+        return spec
+
+    @classmethod
+    def create(cls, worker_infos: List[AllBrainInfo]) -> Optional['SharedBrainInfoBuffer']:
+        """
+        Creates a buffer for the fields of the given BrainInfos (one AllBrainInfo per worker) that can be shared.
+        :return: The buffer, or None if there is nothing to share.
+        """
+        if len(worker_infos) == 0 or any(set(x) != set(worker_infos[0]) for x in worker_infos):
+            return None
+        fields = {}
+        agent_counts = {}
+        offset = 0
+        for brain_name in worker_infos[0]:
+            infos = [all_brain_info[brain_name] for all_brain_info in worker_infos]
+            counts = [len(info.agents) for info in infos]
+            num_cameras = len(infos[0].visual_observations or [])
+            candidates = [(name, None) for name in ARRAY_FIELDS] + \
+                         [("visual_observations", i) for i in range(num_cameras)]
+            brain_fields = []
+            for field in candidates:
+                spec = cls._field_spec([_as_array(_get_field(info, field)) for info in infos], counts)
+                if spec is None:
+                    continue
+                dtype, shape = spec
+                brain_fields.append((field, dtype.str, tuple(shape), offset))
+                size = sum(counts) * int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+                offset += -(-size // ALIGNMENT) * ALIGNMENT
+            fields[brain_name] = brain_fields
+            agent_counts[brain_name] = counts
+        if offset == 0:
+            return None
+        shm = shared_memory.SharedMemory(create=True, size=2 * offset)
+        layout = SharedBrainInfoLayout(shm.name, fields, agent_counts, offset)
+        return cls(layout, shm, owner=True)
+
+    @classmethod
+    def attach(cls, layout: SharedBrainInfoLayout) -> 'SharedBrainInfoBuffer':
+        return cls(layout, attach_shared_memory(layout.name), owner=False)
+
+    def _worker_rows(self, worker_id):
+        """
+        :return: For each slot, the rows of the worker's agents in each shared field of each brain.
+        """
+        rows = self._rows.get(worker_id)
+        if rows is None:
+            rows = [{brain_name: [(field, array[self.starts[brain_name][worker_id]:
+                                                self.starts[brain_name][worker_id + 1]])
+                                  for field, array in brain_arrays.items()]
+                     for brain_name, brain_arrays in arrays.items()}
+                    for arrays in self.arrays]
+            self._rows[worker_id] = rows
+        return rows
+
+    def write(self, worker_id: int, all_brain_info: AllBrainInfo) -> Optional[AllBrainInfo]:
+        """
+        Writes the array fields of a worker's BrainInfos into the next slot.
+        :return: Copies of the BrainInfos without the written fields, or None if they do not fit the layout.
+        """
+        if all_brain_info.keys() != self.layout.fields.keys():
+            return None
+        rows = self._worker_rows(worker_id)[self.slots[worker_id]]
+        stripped = {}
+        for brain_name, brain_info in all_brain_info.items():
+            brain_rows = rows[brain_name]
+            if brain_rows and len(brain_info.agents) != len(brain_rows[0][1]):
+                return None
+            brain_info = copy.copy(brain_info)
+            if brain_info.visual_observations is not None:
+                brain_info.visual_observations = list(brain_info.visual_observations)
+            for field, target in brain_rows:
+                if not _copy_rows(target, _get_field(brain_info, field)):
+                    return None
+                _set_field(brain_info, field, None)
+            stripped[brain_name] = brain_info
+        self.slots[worker_id] = 1 - self.slots[worker_id]
+        return stripped
+
+    def restore(self, worker_id: int, all_brain_info: AllBrainInfo) -> AllBrainInfo:
+        """
+        Fills the fields of a worker's stripped BrainInfos back in with copies from the worker's current slot.
+        """
+        arrays = self.arrays[self.slots[worker_id]]
+        self.slots[worker_id] = 1 - self.slots[worker_id]
+        for brain_name, brain_info in all_brain_info.items():
+            start, end = self.starts[brain_name][worker_id], self.starts[brain_name][worker_id + 1]
+            for field, rows in arrays[brain_name].items():
+                value = rows[start:end].copy()
+                if field[1] is not None:
+                    value = list(value)
+                elif field[0] in LISTED_ARRAY_FIELDS:
+                    value = value.tolist()
+                _set_field(brain_info, field, value)
+        return all_brain_info
+
+    def can_read(self, worker_ids: List[int]) -> bool:
+        """
+        :return: Whether the responses of the given workers can be merged by read, that is, they are all the
+        workers in order and the workers wrote into the same slot.
+        """
+        return list(worker_ids) == list(range(len(self.slots))) and len(set(self.slots)) == 1
+
+    def read(self, worker_infos: List[AllBrainInfo], worker_ids: List[int]) -> AllBrainInfo:
+        """
+        Merges the stripped BrainInfos of all workers. The array fields are views into the current slot.
+        """
+        arrays = self.arrays[self.slots[0]]
+        self.slots = [1 - slot for slot in self.slots]
+        merged = {}
+        for brain_name in self.layout.fields:
+            infos = [all_brain_info[brain_name] for all_brain_info in worker_infos]
+            agents = [(worker_id, agent) for worker_id, info in zip(worker_ids, infos) for agent in info.agents]
+            brain_info = BrainInfo.merge_all(infos, agents)
+            for field, value in arrays[brain_name].items():
+                _set_field(brain_info, field, value)
+            merged[brain_name] = brain_info
+        return merged
+
+    def close(self):
+        """
+        Detaches from the segment (and unlinks it if this side created it).
+        """
+        self.arrays = None
+        global _retired_segments
+        _retired_segments = [shm for shm in _retired_segments if not _release(shm)]
+        if not _release(self.shm):
+            _retired_segments.append(self.shm)
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,230 @@
+import logging
+import os
+import select
+import struct
+import tempfile
+import time
+from multiprocessing import shared_memory
+
+from .communicator import Communicator
+from .communicator_objects import UnityMessage, UnityOutput, UnityInput
+from .socket_communicator import SocketCommunicator, TIMEOUT_MESSAGE
+from .exception import UnityTimeOutException, UnityEnvironmentException, UnityWorkerInUseException
+
+logger = logging.getLogger("mlagents.envs")
+
+# Each direction has one region in the shared memory segment: the total length of the message being sent
+# followed by up to `capacity` bytes of it.
+HEADER = struct.Struct("Q")
+
+
+def attach_shared_memory(name):
+    """
+    Attaches to a shared memory segment created by another process, which is responsible for unlinking it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching also registers the segment to be unlinked when the resource tracker
+        # (shared with multiprocessing children) exits, which is harmless once the creator unlinked it.
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedMemoryChannel(object):
+    def __init__(self, shm, capacity, send_region, receive_region, doorbell_out, doorbell_in, timeout_wait):
+        """
+        One end of a message channel over a shared memory segment.
+        A message is copied into the sending region and the peer is notified by writing a single byte to its doorbell
+        (a named pipe). Exchanges are strictly request / reply, so a region is always free when a message starts.
+        Messages larger than the region are sent in chunks of `capacity` bytes, each acknowledged through the doorbell.
+
+        :SharedMemory shm: The shared memory segment holding both regions.
+        :int capacity: Number of message bytes a region holds.
+        :int send_region: Index of the region this end writes to.
+        :int receive_region: Index of the region this end reads from.
+        :int doorbell_out: File descriptor of the peer's doorbell, opened for writing.
+        :int doorbell_in: File descriptor of this end's doorbell, opened for reading.
+        :int timeout_wait: Time (in seconds) to wait for the peer.
+        """
+        self.shm = shm
+        self.capacity = capacity
+        self.doorbell_out = doorbell_out
+        self.doorbell_in = doorbell_in
+        self.timeout_wait = timeout_wait
+        region_size = HEADER.size + capacity
+        self._send_offset = send_region * region_size
+        self._receive_offset = receive_region * region_size
+        self._buffer = bytearray(0)
+
+    @staticmethod
+    def segment_size(capacity):
+        return 2 * (HEADER.size + capacity)
+
+    def ring(self):
+        try:
+            os.write(self.doorbell_out, b"\0")
+        except BrokenPipeError:
+            raise UnityEnvironmentException("The environment closed the connection.")
+
+    def wait(self):
+        ready, _, _ = select.select([self.doorbell_in], [], [], self.timeout_wait)
+        if not ready:
+            raise UnityTimeOutException("The environment took too long to respond.")
+        if not os.read(self.doorbell_in, 1):
+            raise UnityEnvironmentException("The environment closed the connection.")
+
+    def send(self, message):
+        buf = self.shm.buf
+        data = memoryview(message)
+        HEADER.pack_into(buf, self._send_offset, len(data))
+        start = self._send_offset + HEADER.size
+        for offset in range(0, max(len(data), 1), self.capacity):
+            if offset > 0:
+                self.wait()
+            chunk = data[offset:offset + self.capacity]
+            buf[start:start + len(chunk)] = chunk
+            self.ring()
+
+    def receive(self, message):
+        """
+        Waits for the next message and parses it into the given protobuf message.
+        """
+        self.wait()
+        buf = self.shm.buf
+        message_length = HEADER.unpack_from(buf, self._receive_offset)[0]
+        start = self._receive_offset + HEADER.size
+        if message_length <= self.capacity:
+            # Parse directly from shared memory. The region is not reused before the reply is sent.
+            view = buf[start:start + message_length]
+            try:
+                SocketCommunicator._parse(message, view)
+            finally:
+                view.release()
+            return message
+
+        if message_length > len(self._buffer):
+            self._buffer = bytearray(message_length)
+        view = memoryview(self._buffer)[:message_length]
+        for offset in range(0, message_length, self.capacity):
+            if offset > 0:
+                self.ring()
+                self.wait()
+            n = min(self.capacity, message_length - offset)
+            view[offset:offset + n] = buf[start:start + n]
+        SocketCommunicator._parse(message, view)
+        return message
+
+    def close(self):
+        for fd in (self.doorbell_out, self.doorbell_in):
+            if fd is not None:
+                os.close(fd)
+        self.doorbell_out = None
+        self.doorbell_in = None
+
+
+class SharedMemoryCommunicator(Communicator):
+    def __init__(self, worker_id=0,
+                 base_port=5005,
+                 timeout_wait=30,
+                 capacity=4 * 1024 * 1024):
+        """
+        Python side of the shared memory communication. Python creates the shared memory segment and the doorbells
+        (see names), Unity attaches to them. Messages are the same serialized UnityMessages as the other communicators,
+        but are copied once into shared memory instead of through the kernel.
+
+        :int base_port: Baseline port number to connect to Unity environment over. worker_id increments over this.
+        The shared memory segment and doorbells are named after the resulting port number.
+        :int worker_id: Number to add to communication port (5005) [0]. Used for asynchronous agent scenarios.
+        :int timeout_wait: Time (in seconds) to wait for the environment to connect and to respond.
+        :int capacity: Size (in bytes) of the shared memory region of each direction.
+        Larger messages are sent in several chunks.
+        """
+        if not hasattr(os, "mkfifo"):
+            raise UnityEnvironmentException("Shared memory communication is not supported on this platform.")
+        self.port = base_port + worker_id
+        self.worker_id = worker_id
+        self.timeout_wait = timeout_wait
+        self.capacity = capacity
+        self.channel = None
+        self.shm_name, self.doorbell_unity, self.doorbell_python = self.names(self.port)
+
+        try:
+            self.shm = shared_memory.SharedMemory(name=self.shm_name, create=True,
+                                                  size=SharedMemoryChannel.segment_size(capacity))
+        except FileExistsError:
+            raise UnityWorkerInUseException(self.worker_id)
+
+        # The segment name is free, so doorbells left over by a crashed environment can be replaced.
+        for path in (self.doorbell_unity, self.doorbell_python):
+            if os.path.exists(path):
+                os.unlink(path)
+            os.mkfifo(path, 0o600)
+        self._doorbell_in = os.open(self.doorbell_python, os.O_RDONLY | os.O_NONBLOCK)
+
+    @staticmethod
+    def names(port):
+        """
+        Names of the shared memory segment, the doorbell of Unity and the doorbell of Python for the given port number.
+        Unity opens the doorbell of Python for writing before opening its own doorbell for reading.
+        The first region of the segment holds the messages to Unity, the second the messages to Python.
+        """
+        prefix = os.path.join(tempfile.gettempdir(), "ml-agents-{}".format(port))
+        return "ml-agents-{}".format(port), prefix + ".unity", prefix + ".python"
+
+    def _connect(self):
+        # Opening the doorbell of Unity succeeds once Unity has opened it for reading,
+        # and by then Unity has opened the doorbell of Python for writing.
+        deadline = time.time() + self.timeout_wait
+        while True:
+            try:
+                doorbell_out = os.open(self.doorbell_unity, os.O_WRONLY | os.O_NONBLOCK)
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise UnityTimeOutException(TIMEOUT_MESSAGE)
+                time.sleep(0.01)
+        self.channel = SharedMemoryChannel(self.shm, self.capacity, 0, 1, doorbell_out, self._doorbell_in,
+                                           self.timeout_wait)
+        self._doorbell_in = None
+
+    def initialize(self, inputs: UnityInput) -> UnityOutput:
+        self._connect()
+        message = UnityMessage()
+        message.header.status = 200
+        message.unity_input.CopyFrom(inputs)
+        self.channel.send(message.SerializeToString())
+        return self.channel.receive(UnityMessage()).unity_output
+
+    def exchange(self, inputs: UnityInput) -> UnityOutput:
+        message = UnityMessage()
+        message.header.status = 200
+        message.unity_input.CopyFrom(inputs)
+        self.channel.send(message.SerializeToString())
+        outputs = self.channel.receive(UnityMessage())
+        if outputs.header.status != 200:
+            return None
+        return outputs.unity_output
+
+    def close(self):
+        """
+        Sends a shutdown signal to the unity environment, and removes the shared memory segment and the doorbells.
+        """
+        if self.channel is not None:
+            message_input = UnityMessage()
+            message_input.header.status = 400
+            try:
+                self.channel.send(message_input.SerializeToString())
+            except UnityEnvironmentException:
+                pass
+            self.channel.close()
+            self.channel = None
+        if self._doorbell_in is not None:
+            os.close(self._doorbell_in)
+            self._doorbell_in = None
+        if self.shm is not None:
+            for path in (self.doorbell_unity, self.doorbell_python):
+                if os.path.exists(path):
+                    os.unlink(path)
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
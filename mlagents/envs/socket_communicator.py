@@ -4,71 +4,119 @@ import struct
 
 from .communicator import Communicator
 from .communicator_objects import UnityMessage, UnityOutput, UnityInput
-from .exception import UnityTimeOutException
+from .exception import UnityTimeOutException, UnityEnvironmentException
 
 
 logger = logging.getLogger("mlagents.envs")
 
+TIMEOUT_MESSAGE = ("The Unity environment took too long to respond. Make sure that :\n"
+                   "\t The environment does not need user interaction to launch\n"
+                   "\t The Academy's Broadcast Hub is configured correctly\n"
+                   "\t The Agents are linked to the appropriate Brains\n"
+                   "\t The environment and the Python interface have compatible versions.")
+
 
 class SocketCommunicator(Communicator):
     def __init__(self, worker_id=0,
-                 base_port=5005):
+                 base_port=5005,
+                 timeout_wait=30):
         """
-        Python side of the socket communication
+        Python side of the socket communication. Python is the server and Unity the client
 
         :int base_port: Baseline port number to connect to Unity environment over. worker_id increments over this.
         :int worker_id: Number to add to communication port (5005) [0]. Used for asynchronous agent scenarios.
+        :int timeout_wait: Time (in seconds) to wait for the environment to connect and to respond.
         """
 
         self.port = base_port + worker_id
         self._buffer_size = 12000
         self.worker_id = worker_id
+        self.timeout_wait = timeout_wait
         self._socket = None
         self._conn = None
 
-    def initialize(self, inputs: UnityInput) -> UnityOutput:
+        # Messages are received into one reusable buffer that grows to the largest message seen.
+        self._header = bytearray(4)
+        self._buffer = bytearray(self._buffer_size)
+
+    def _create_socket(self):
+        """
+        Creates the socket Unity connects to. Subclasses override this to listen on another address family.
+        """
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind(("localhost", self.port))
+        return s
+
+    def _connect(self):
         try:
             # Establish communication socket
-            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self._socket.bind(("localhost", self.port))
+            self._socket = self._create_socket()
         except:
             raise UnityTimeOutException("Couldn't start socket communication because worker number {} is still in use. "
                                         "You may need to manually close a previously opened environment "
                                         "or use a different worker number.".format(str(self.worker_id)))
         try:
-            self._socket.settimeout(30)
+            self._socket.settimeout(self.timeout_wait)
             self._socket.listen(1)
             self._conn, _ = self._socket.accept()
-            self._conn.settimeout(30)
+            self._conn.settimeout(self.timeout_wait)
+            if self._conn.family == socket.AF_INET:
+                # Each exchange is a single small request followed by a reply, so do not wait to coalesce packets.
+                self._conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         except :
-            raise UnityTimeOutException(
-                "The Unity environment took too long to respond. Make sure that :\n"
-                "\t The environment does not need user interaction to launch\n"
-                "\t The Academy's Broadcast Hub is configured correctly\n"
-                "\t The Agents are linked to the appropriate Brains\n"
-                "\t The environment and the Python interface have compatible versions.")
+            raise UnityTimeOutException(TIMEOUT_MESSAGE)
+
+    def initialize(self, inputs: UnityInput) -> UnityOutput:
+        self._connect()
         message = UnityMessage()
         message.header.status = 200
         message.unity_input.CopyFrom(inputs)
         self._communicator_send(message.SerializeToString())
         initialization_output = UnityMessage()
-        initialization_output.ParseFromString(self._communicator_receive())
+        self._parse(initialization_output, self._communicator_receive())
         return initialization_output.unity_output
 
+    def _recv_into(self, view):
+        received = 0
+        while received < len(view):
+            n = self._conn.recv_into(view[received:])
+            if n == 0:
+                raise UnityEnvironmentException("The environment closed the connection.")
+            received += n
+
     def _communicator_receive(self):
+        """
+        Receives one length-prefixed message.
+        :return: A memoryview of the message in the reusable receive buffer, valid until the next receive.
+        """
         try:
-            s = self._conn.recv(self._buffer_size)
-            message_length = struct.unpack("I", bytearray(s[:4]))[0]
-            s = s[4:]
-            while len(s) != message_length:
-                s += self._conn.recv(self._buffer_size)
+            self._recv_into(memoryview(self._header))
+            message_length = struct.unpack("I", self._header)[0]
+            if message_length > len(self._buffer):
+                self._buffer = bytearray(max(message_length, 2 * len(self._buffer)))
+            view = memoryview(self._buffer)[:message_length]
+            self._recv_into(view)
         except socket.timeout as e:
             raise UnityTimeOutException("The environment took too long to respond.")
-        return s
+        return view
+
+    @staticmethod
+    def _parse(message, view):
+        try:
+            message.ParseFromString(view)
+        except TypeError:
+            # Protobuf implementations that only accept bytes.
+            message.ParseFromString(view.tobytes())
 
     def _communicator_send(self, message):
-        self._conn.send(struct.pack("I", len(message)) + message)
+        header = struct.pack("I", len(message))
+        if len(message) <= self._buffer_size:
+            self._conn.sendall(header + message)
+        else:
+            # Avoid copying large messages just to prepend the header.
+            self._conn.sendall(header)
+            self._conn.sendall(message)
 
     def exchange(self, inputs: UnityInput) -> UnityOutput:
         message = UnityMessage()
@@ -76,7 +124,7 @@ class SocketCommunicator(Communicator):
         message.unity_input.CopyFrom(inputs)
         self._communicator_send(message.SerializeToString())
         outputs = UnityMessage()
-        outputs.ParseFromString(self._communicator_receive())
+        self._parse(outputs, self._communicator_receive())
         if outputs.header.status != 200:
             return None
         return outputs.unity_output
@@ -89,10 +137,13 @@ class SocketCommunicator(Communicator):
             message_input = UnityMessage()
             message_input.header.status = 400
             self._communicator_send(message_input.SerializeToString())
+        self._disconnect()
+
+    def _disconnect(self):
         if self._socket is not None:
             self._socket.close()
             self._socket = None
-        if self._socket is not None:
+        if self._conn is not None:
             self._conn.close()
             self._conn = None
 
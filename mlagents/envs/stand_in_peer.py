@@ -0,0 +1,209 @@
+import os
+import socket
+import struct
+import time
+
+import grpc
+
+from .communicator_objects import UnityMessage, UnityOutput, UnityToExternalStub
+from .exception import UnityTimeOutException, UnityEnvironmentException
+from .shared_memory_communicator import SharedMemoryChannel, SharedMemoryCommunicator, attach_shared_memory
+from .unix_socket_communicator import UnixSocketCommunicator
+
+
+class StandInPeer(object):
+    def __init__(self, port, timeout_wait=30):
+        """
+        Python stand-in for the Unity side of a communicator, used to test and benchmark the transports
+        without a Unity build.
+
+        :int port: Port number of the communicator (base_port + worker_id).
+        :int timeout_wait: Time (in seconds) to wait for the Python side.
+        """
+        self.port = port
+        self.timeout_wait = timeout_wait
+
+    def serve(self, initialization_output: UnityOutput, handler):
+        """
+        Answers the initialization message with initialization_output and every following message with
+        handler(unity_input), until the Python side sends a shutdown signal or closes the connection.
+        A MockCommunicator provides both: serve(mock.initialize(None), mock.exchange).
+        """
+        self.connect()
+        try:
+            message = self.receive()
+            output = initialization_output
+            while message is not None and message.header.status == 200:
+                self.send(self.reply(output))
+                message = self.receive()
+                if message is not None and message.header.status == 200:
+                    output = handler(message.unity_input)
+        finally:
+            self.close()
+
+    @staticmethod
+    def reply(output: UnityOutput):
+        message = UnityMessage()
+        message.header.status = 200
+        message.unity_output.CopyFrom(output)
+        return message
+
+    def _retry(self, attempt):
+        """
+        Calls attempt until it stops raising OSError, as the Python side may not be listening yet.
+        """
+        deadline = time.time() + self.timeout_wait
+        while True:
+            try:
+                return attempt()
+            except OSError:
+                if time.time() > deadline:
+                    raise UnityTimeOutException("The Python side took too long to start.")
+                time.sleep(0.01)
+
+    def connect(self):
+        raise NotImplementedError
+
+    def receive(self):
+        """
+        :return: The next UnityMessage, or None if the Python side closed the connection.
+        """
+        raise NotImplementedError
+
+    def send(self, message: UnityMessage):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class SocketPeer(StandInPeer):
+    """
+    Unity side of the SocketCommunicator.
+    """
+
+    def __init__(self, port, timeout_wait=30):
+        super(SocketPeer, self).__init__(port, timeout_wait)
+        self.conn = None
+
+    def _create_connection(self):
+        conn = socket.create_connection(("localhost", self.port))
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn
+
+    def connect(self):
+        self.conn = self._retry(self._create_connection)
+
+    def _recv_exactly(self, n):
+        data = bytearray(n)
+        view = memoryview(data)
+        received = 0
+        while received < n:
+            count = self.conn.recv_into(view[received:])
+            if count == 0:
+                return None
+            received += count
+        return data
+
+    def receive(self):
+        header = self._recv_exactly(4)
+        if header is None:
+            return None
+        data = self._recv_exactly(struct.unpack("I", header)[0])
+        if data is None:
+            return None
+        message = UnityMessage()
+        message.ParseFromString(bytes(data))
+        return message
+
+    def send(self, message: UnityMessage):
+        data = message.SerializeToString()
+        self.conn.sendall(struct.pack("I", len(data)) + data)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class UnixSocketPeer(SocketPeer):
+    """
+    Unity side of the UnixSocketCommunicator.
+    """
+
+    def _create_connection(self):
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(UnixSocketCommunicator.socket_path(self.port))
+        except OSError:
+            conn.close()
+            raise
+        return conn
+
+
+class SharedMemoryPeer(StandInPeer):
+    """
+    Unity side of the SharedMemoryCommunicator.
+    """
+
+    def __init__(self, port, timeout_wait=30, capacity=4 * 1024 * 1024):
+        super(SharedMemoryPeer, self).__init__(port, timeout_wait)
+        self.capacity = capacity
+        self.shm = None
+        self.channel = None
+
+    def connect(self):
+        shm_name, doorbell_unity, doorbell_python = SharedMemoryCommunicator.names(self.port)
+        self.shm = self._retry(lambda: attach_shared_memory(shm_name))
+        # Open the doorbell of Python for writing first, so that Python can rely on it once it reaches ours.
+        doorbell_out = self._retry(lambda: os.open(doorbell_python, os.O_WRONLY | os.O_NONBLOCK))
+        doorbell_in = os.open(doorbell_unity, os.O_RDONLY)
+        self.channel = SharedMemoryChannel(self.shm, self.capacity, 1, 0, doorbell_out, doorbell_in,
+                                           self.timeout_wait)
+
+    def receive(self):
+        try:
+            return self.channel.receive(UnityMessage())
+        except UnityEnvironmentException:
+            return None
+
+    def send(self, message: UnityMessage):
+        self.channel.send(message.SerializeToString())
+
+    def close(self):
+        if self.channel is not None:
+            self.channel.close()
+            self.channel = None
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+
+
+class RpcPeer(StandInPeer):
+    """
+    Unity side of the RpcCommunicator. Unity is the gRPC client and sends the initialization output first,
+    so handler is also called with the initialization input (whose output Python discards).
+    """
+
+    def __init__(self, port, timeout_wait=30):
+        super(RpcPeer, self).__init__(port, timeout_wait)
+        self.channel = None
+
+    def serve(self, initialization_output: UnityOutput, handler):
+        self.channel = grpc.insecure_channel("localhost:{}".format(self.port))
+        try:
+            grpc.channel_ready_future(self.channel).result(timeout=self.timeout_wait)
+            stub = UnityToExternalStub(self.channel)
+            response = stub.Exchange(self.reply(initialization_output))
+            while response.header.status == 200:
+                response = stub.Exchange(self.reply(handler(response.unity_input)))
+        finally:
+            self.close()
+
+    def close(self):
+        if self.channel is not None:
+            self.channel.close()
+            self.channel = None
+
+
+PEERS = {"rpc": RpcPeer, "socket": SocketPeer, "unix": UnixSocketPeer, "shm": SharedMemoryPeer}
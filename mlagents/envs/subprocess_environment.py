@@ -1,13 +1,13 @@
 from typing import *
-import copy
 import numpy as np
 import cloudpickle
 
 from mlagents.envs import UnityEnvironment
-from multiprocessing import Process, Pipe
-from multiprocessing.connection import Connection
+from multiprocessing import Process, Pipe, resource_tracker
+from multiprocessing.connection import Connection, wait
 from mlagents.envs.base_unity_environment import BaseUnityEnvironment
-from mlagents.envs import AllBrainInfo, UnityEnvironmentException
+from mlagents.envs import AllBrainInfo, BrainInfo, UnityEnvironmentException
+from mlagents.envs.shared_brain_info import SharedBrainInfoBuffer, SharedBrainInfo
 
 
 class EnvironmentCommand(NamedTuple):
@@ -51,42 +51,74 @@ class UnityEnvWorker(NamedTuple):
 def worker(parent_conn: Connection, pickled_env_factory: str, worker_id: int):
     env_factory: Callable[[int], UnityEnvironment] = cloudpickle.loads(pickled_env_factory)
     env = env_factory(worker_id)
+    shared_buffer: Optional[SharedBrainInfoBuffer] = None
 
     def _send_response(cmd_name, payload):
         parent_conn.send(
             EnvironmentResponse(cmd_name, worker_id, payload)
         )
+
+    def _send_brain_info(cmd_name, all_brain_info):
+        # Only the fields that do not fit the shared buffer are pickled.
+        if shared_buffer is not None:
+            stripped = shared_buffer.write(worker_id, all_brain_info)
+            if stripped is not None:
+                all_brain_info = SharedBrainInfo(stripped)
+        _send_response(cmd_name, all_brain_info)
     try:
         while True:
             cmd: EnvironmentCommand = parent_conn.recv()
             if cmd.name == 'step':
                 vector_action, memory, text_action, value = cmd.payload
                 all_brain_info = env.step(vector_action, memory, text_action, value)
-                _send_response('step', all_brain_info)
+                _send_brain_info('step', all_brain_info)
             elif cmd.name == 'external_brains':
                 _send_response('external_brains', env.external_brains)
             elif cmd.name == 'reset_parameters':
                 _send_response('reset_parameters', env.reset_parameters)
             elif cmd.name == 'reset':
                 all_brain_info = env.reset(cmd.payload[0], cmd.payload[1])
-                _send_response('reset', all_brain_info)
+                _send_brain_info('reset', all_brain_info)
             elif cmd.name == 'global_done':
                 _send_response('global_done', env.global_done)
+            elif cmd.name == 'shared_memory':
+                if shared_buffer is not None:
+                    shared_buffer.close()
+                shared_buffer = SharedBrainInfoBuffer.attach(cmd.payload) if cmd.payload is not None else None
             elif cmd.name == 'close':
                 break
     except KeyboardInterrupt:
         print('UnityEnvironment worker: keyboard interrupt')
     finally:
+        if shared_buffer is not None:
+            shared_buffer.close()
         env.close()
 
 
 class SubprocessUnityEnvironment(BaseUnityEnvironment):
     def __init__(self,
                  env_factory: Callable[[int], BaseUnityEnvironment],
-                 n_env: int = 1):
+                 n_env: int = 1,
+                 shared_memory: bool = False):
+        """
+        Runs each environment in its own process and steps them together.
+
+        :param env_factory: Creates the environment of the given worker id.
+        :param n_env: Number of environments.
+        :param shared_memory: Whether the workers write the array fields of their BrainInfos (observations,
+        rewards, dones, ...) into shared memory instead of pickling them. The merged BrainInfo fields are then
+        views into the shared memory that stay valid until the step after the next one.
+        """
         self.envs = []
         self.env_agent_counts = {}
         self.waiting = False
+        # Environments started with step_send whose results were not received yet
+        self.stepping: Set[int] = set()
+        self.shared_memory = shared_memory
+        self.shared_buffer: Optional[SharedBrainInfoBuffer] = None
+        if shared_memory:
+            # Started before the workers so that they share it and leave the segments to this process.
+            resource_tracker.ensure_running()
         for worker_id in range(n_env):
             self.envs.append(self.create_worker(worker_id, env_factory))
 
@@ -109,33 +141,13 @@ class SubprocessUnityEnvironment(BaseUnityEnvironment):
             raise UnityEnvironmentException(
                 'Tried to take an environment step bore previous step has completed.'
             )
-
-        agent_counts_cum = {}
-        for brain_name in self.env_agent_counts.keys():
-            agent_counts_cum[brain_name] = np.cumsum(self.env_agent_counts[brain_name])
+        self._check_not_stepping()
 
         # Split the actions provided by the previous set of agent counts, and send the step
         # commands to the workers.
-        for worker_id, env in enumerate(self.envs):
-            env_actions = {}
-            env_memory = {}
-            env_text_action = {}
-            env_value = {}
-            for brain_name in self.env_agent_counts.keys():
-                start_ind = 0
-                if worker_id > 0:
-                    start_ind = agent_counts_cum[brain_name][worker_id - 1]
-                end_ind = agent_counts_cum[brain_name][worker_id]
-                if vector_action.get(brain_name) is not None:
-                    env_actions[brain_name] = vector_action[brain_name][start_ind:end_ind]
-                if memory and memory.get(brain_name) is not None:
-                    env_memory[brain_name] = memory[brain_name][start_ind:end_ind]
-                if text_action and text_action.get(brain_name) is not None:
-                    env_text_action[brain_name] = text_action[brain_name][start_ind:end_ind]
-                if value and value.get(brain_name) is not None:
-                    env_value[brain_name] = value[brain_name][start_ind:end_ind]
-
-            env.send('step', (env_actions, env_memory, env_text_action, env_value))
+        env_ids = list(range(len(self.envs)))
+        for worker_id, payload in self._split_actions(env_ids, vector_action, memory, text_action, value):
+            self.envs[worker_id].send('step', payload)
         self.waiting = True
 
     def step_await(self) -> AllBrainInfo:
@@ -143,24 +155,68 @@ class SubprocessUnityEnvironment(BaseUnityEnvironment):
             raise UnityEnvironmentException('Tried to await an environment step, but no async step was taken.')
 
         steps = [self.envs[i].recv() for i in range(len(self.envs))]
-        self._get_agent_counts(map(lambda s: s.payload, steps))
-        combined_brain_info = self._merge_step_info(steps)
+        combined_brain_info = self._collect_brain_info(steps)
         self.waiting = False
         return combined_brain_info
 
+    def step_send(self, env_ids: List[int], vector_action, memory=None, text_action=None, value=None) -> None:
+        """
+        Starts a step of some of the environments without waiting for the others (envpool style).
+        The results are collected with step_recv, so the policy can act on the environments that are ready
+        while the slower ones are still stepping.
+
+        :param env_ids: Environments to step. None of them may be stepping already.
+        :param vector_action: For each brain, the actions of the agents of env_ids, in the order of env_ids
+        (the order of the BrainInfos returned by step_recv or reset).
+        """
+        if self.waiting:
+            raise UnityEnvironmentException(
+                'Tried to take an environment step before previous step has completed.'
+            )
+        stepping = [env_id for env_id in env_ids if env_id in self.stepping]
+        if stepping:
+            raise UnityEnvironmentException(
+                'Tried to step environments {} before their previous step has completed.'.format(stepping)
+            )
+        for worker_id, payload in self._split_actions(env_ids, vector_action, memory, text_action, value):
+            self.envs[worker_id].send('step', payload)
+            self.stepping.add(worker_id)
+
+    def step_recv(self, batch_size: Optional[int] = None) -> Tuple[List[int], AllBrainInfo]:
+        """
+        Waits for environments started with step_send to finish their step.
+
+        :param batch_size: Maximum number of environments to return. Waits until this many environments
+        (or all the stepping ones, if fewer) have finished. All stepping environments if None.
+        :return: The ids of the finished environments in increasing order, and their merged BrainInfos.
+        """
+        if not self.stepping:
+            raise UnityEnvironmentException('Tried to receive an environment step, but no environment is stepping.')
+        batch_size = len(self.stepping) if batch_size is None else min(batch_size, len(self.stepping))
+
+        ready = []
+        while len(ready) < batch_size:
+            conns = {self.envs[i].conn: i for i in self.stepping if i not in ready}
+            ready += [conns[conn] for conn in wait(list(conns.keys()))]
+        env_ids = sorted(ready[:batch_size])
+
+        responses = [self.envs[i].recv() for i in env_ids]
+        self.stepping.difference_update(env_ids)
+        return env_ids, self._collect_brain_info(responses)
+
     def step(self, vector_action=None, memory=None, text_action=None, value=None) -> AllBrainInfo:
         self.step_async(vector_action, memory, text_action, value)
         return self.step_await()
 
     def reset(self, config=None, train_mode=True) -> AllBrainInfo:
+        self._check_not_stepping()
         self._broadcast_message('reset', (config, train_mode))
         reset_results = [self.envs[i].recv() for i in range(len(self.envs))]
-        self._get_agent_counts(map(lambda r: r.payload, reset_results))
-
-        return self._merge_step_info(reset_results)
+        return self._collect_brain_info(reset_results)
 
     @property
     def global_done(self):
+        self._check_not_stepping()
         self._broadcast_message('global_done')
         dones: List[EnvironmentResponse] = [
             self.envs[i].recv().payload for i in range(len(self.envs))
@@ -169,37 +225,108 @@ class SubprocessUnityEnvironment(BaseUnityEnvironment):
 
     @property
     def external_brains(self):
+        self._check_not_stepping()
         self.envs[0].send('external_brains')
         return self.envs[0].recv().payload
 
     @property
     def reset_parameters(self):
+        self._check_not_stepping()
         self.envs[0].send('reset_parameters')
         return self.envs[0].recv().payload
 
     def close(self):
         for env in self.envs:
             env.close()
-
-    def _get_agent_counts(self, step_list: Iterable[AllBrainInfo]):
-        for i, step in enumerate(step_list):
+        if self.shared_buffer is not None:
+            self.shared_buffer.close()
+            self.shared_buffer = None
+
+    def _collect_brain_info(self, responses: List[EnvironmentResponse]) -> AllBrainInfo:
+        shared = [isinstance(r.payload, SharedBrainInfo) for r in responses]
+        worker_ids = [r.worker_id for r in responses]
+        if responses and all(shared) and self.shared_buffer.can_read(worker_ids):
+            worker_infos = [r.payload.all_brain_info for r in responses]
+            self._get_agent_counts(worker_infos, worker_ids)
+            return self.shared_buffer.read(worker_infos, worker_ids)
+
+        # Only some of the workers stepped, or some did not fit the shared buffer: merge as usual.
+        responses = [
+            EnvironmentResponse(r.name, r.worker_id, self.shared_buffer.restore(r.worker_id, r.payload.all_brain_info))
+            if is_shared else r for r, is_shared in zip(responses, shared)
+        ]
+        self._get_agent_counts([r.payload for r in responses], worker_ids)
+        # The buffer is changed only when every worker is idle, so none is still writing into it.
+        if self.shared_memory and len(responses) == len(self.envs) and not self.stepping:
+            if responses and all(shared):
+                # Partial steps left the workers in different slots: start them all over from the first one.
+                self.shared_buffer.slots = [0] * len(self.envs)
+                self._broadcast_message('shared_memory', self.shared_buffer.layout)
+            else:
+                self._update_shared_buffer([r.payload for r in responses])
+        return self._merge_step_info(responses)
+
+    def _update_shared_buffer(self, worker_infos: List[AllBrainInfo]):
+        if self.shared_buffer is not None:
+            self.shared_buffer.close()
+        self.shared_buffer = SharedBrainInfoBuffer.create(worker_infos)
+        layout = self.shared_buffer.layout if self.shared_buffer is not None else None
+        self._broadcast_message('shared_memory', layout)
+
+    def _get_agent_counts(self, step_list: Iterable[AllBrainInfo], worker_ids: Optional[List[int]] = None):
+        if worker_ids is None:
+            worker_ids = range(len(self.envs))
+        for i, step in zip(worker_ids, step_list):
             for brain_name, brain_info in step.items():
                 if brain_name not in self.env_agent_counts.keys():
                     self.env_agent_counts[brain_name] = [0] * len(self.envs)
                 self.env_agent_counts[brain_name][i] = len(brain_info.agents)
 
+    def _split_actions(self, env_ids, vector_action, memory, text_action, value):
+        """
+        Splits the inputs of the agents of env_ids (in that order) by the last agent counts of the environments.
+        :return: Generator of (environment id, step payload).
+        """
+        start_inds = {brain_name: 0 for brain_name in self.env_agent_counts.keys()}
+        for worker_id in env_ids:
+            env_actions = {}
+            env_memory = {}
+            env_text_action = {}
+            env_value = {}
+            for brain_name in self.env_agent_counts.keys():
+                start_ind = start_inds[brain_name]
+                end_ind = start_ind + self.env_agent_counts[brain_name][worker_id]
+                start_inds[brain_name] = end_ind
+                if vector_action.get(brain_name) is not None:
+                    env_actions[brain_name] = vector_action[brain_name][start_ind:end_ind]
+                if memory and memory.get(brain_name) is not None:
+                    env_memory[brain_name] = memory[brain_name][start_ind:end_ind]
+                if text_action and text_action.get(brain_name) is not None:
+                    env_text_action[brain_name] = text_action[brain_name][start_ind:end_ind]
+                if value and value.get(brain_name) is not None:
+                    env_value[brain_name] = value[brain_name][start_ind:end_ind]
+            yield worker_id, (env_actions, env_memory, env_text_action, env_value)
+
+    def _check_not_stepping(self):
+        if self.stepping:
+            raise UnityEnvironmentException(
+                'Environments {} are still stepping; receive their results with step_recv first.'
+                .format(sorted(self.stepping))
+            )
+
     @staticmethod
     def _merge_step_info(env_steps: List[EnvironmentResponse]) -> AllBrainInfo:
-        accumulated_brain_info: AllBrainInfo = None
-        for env_step in env_steps:
-            all_brain_info: AllBrainInfo = env_step.payload
-            for brain_name, brain_info in all_brain_info.items():
-                for i in range(len(brain_info.agents)):
-                    brain_info.agents[i] = str(env_step.worker_id) + '-' + str(brain_info.agents[i])
-                if accumulated_brain_info:
-                    accumulated_brain_info[brain_name].merge(brain_info)
-            if not accumulated_brain_info:
-                accumulated_brain_info = copy.deepcopy(all_brain_info)
+        """
+        Merges the BrainInfos of the workers in one pass. Agents are identified by (worker id, agent id).
+        """
+        if not env_steps:
+            return None
+        accumulated_brain_info: AllBrainInfo = {}
+        for brain_name in env_steps[0].payload:
+            steps = [env_step for env_step in env_steps if brain_name in env_step.payload]
+            infos = [env_step.payload[brain_name] for env_step in steps]
+            agents = [(env_step.worker_id, agent) for env_step, info in zip(steps, infos) for agent in info.agents]
+            accumulated_brain_info[brain_name] = BrainInfo.merge_all(infos, agents)
         return accumulated_brain_info
 
     def _broadcast_message(self, name: str, payload = None):
@@ -0,0 +1,154 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from mlagents.envs import BrainInfo, BrainParameters, ImageDecoder, ThreadPoolImageDecoder
+from mlagents.envs.communicator_objects import AgentInfoProto
+
+
+def png_bytes(pixels):
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def random_pixels(height=12, width=10):
+    return np.random.RandomState(0).randint(0, 256, (height, width, 3)).astype(np.uint8)
+
+
+def test_process_pixels_uint8_is_chw():
+    pixels = random_pixels()
+    s = BrainInfo.process_pixels(png_bytes(pixels), False, uint8=True)
+    assert s.dtype == np.uint8
+    assert s.shape == (3, 12, 10)
+    assert s.flags['C_CONTIGUOUS']
+    np.testing.assert_array_equal(s, pixels.transpose(2, 0, 1))
+
+    # Same pixels as the float observation scaled back to [0, 255].
+    s_float = BrainInfo.process_pixels(png_bytes(pixels), False)
+    np.testing.assert_array_equal(s, np.round(255 * s_float).astype(np.uint8).transpose(2, 0, 1))
+
+
+def test_process_pixels_uint8_gray_scale():
+    pixels = random_pixels()
+    s = BrainInfo.process_pixels(png_bytes(pixels), True, uint8=True)
+    assert s.dtype == np.uint8
+    assert s.shape == (1, 12, 10)
+    np.testing.assert_array_equal(s[0], pixels.sum(axis=2) // 3)
+
+    # Within one gray level of the float observation.
+    s_float = BrainInfo.process_pixels(png_bytes(pixels), True)
+    assert np.abs(s[0] - 255 * s_float[:, :, 0]).max() <= 1
+
+
+def test_from_agent_proto_uint8_visual():
+    pixels = random_pixels()
+    brain_params = BrainParameters("RealFakeBrain", 3, 1, [{"height": 12, "width": 10, "blackAndWhite": False}],
+                                   [2], ["", ""], 0)
+    agent_infos = [AgentInfoProto(stacked_vector_observation=[1, 2, 3], visual_observations=[png_bytes(pixels)],
+                                  reward=1, done=False, id=i) for i in range(2)]
+
+    brain_info = BrainInfo.from_agent_proto(agent_infos, brain_params, uint8_visual=True)
+    obs = np.asarray(brain_info.visual_observations[0])
+    assert obs.dtype == np.uint8
+    assert obs.shape == (2, 3, 12, 10)
+
+    brain_info = BrainInfo.from_agent_proto(agent_infos, brain_params)
+    obs = np.asarray(brain_info.visual_observations[0])
+    assert obs.dtype == np.float64
+    assert obs.shape == (2, 12, 10, 3)
+
+
+def test_thread_pool_image_decoder_matches_serial():
+    images = [png_bytes(np.random.RandomState(i).randint(0, 256, (12, 10, 3)).astype(np.uint8)) for i in range(5)]
+    decoder = ThreadPoolImageDecoder(3)
+    for gray_scale in [False, True]:
+        for uint8 in [False, True]:
+            expected = ImageDecoder().decode(images, gray_scale, uint8)
+            result = decoder.decode(images, gray_scale, uint8)
+            assert len(result) == len(expected)
+            for a, b in zip(result, expected):
+                assert a.dtype == b.dtype
+                np.testing.assert_array_equal(a, b)
+    assert decoder.decode([], False) == []
+    decoder.close()
+
+
+def test_thread_pool_image_decoder_reuses_output():
+    images = [png_bytes(np.random.RandomState(i).randint(0, 256, (12, 10, 3)).astype(np.uint8)) for i in range(4)]
+    decoder = ThreadPoolImageDecoder(2, reuse_output=True)
+    for gray_scale in [False, True]:
+        expected = ImageDecoder().decode(images, gray_scale, True)
+        first = decoder.decode(images, gray_scale, True, key=("brain", 0))
+        second = decoder.decode(images[::-1], gray_scale, True, key=("brain", 0))
+
+        # The second decode of the same camera overwrites the first one.
+        assert first[0].base is second[0].base
+        for a, b in zip(second, expected[::-1]):
+            np.testing.assert_array_equal(a, b)
+        np.testing.assert_array_equal(first[0], expected[-1])
+
+        # Other cameras have their own array.
+        other = decoder.decode(images, gray_scale, True, key=("brain", 1))
+        assert other[0].base is not second[0].base
+    decoder.close()
+
+
+def test_from_agent_proto_multiple_cameras_with_decoder():
+    brain_params = BrainParameters("RealFakeBrain", 3, 1, [{"height": 12, "width": 10, "blackAndWhite": False},
+                                                           {"height": 12, "width": 10, "blackAndWhite": True}],
+                                   [2], ["", ""], 0)
+    cameras = [[png_bytes(np.random.RandomState(3 * i + j).randint(0, 256, (12, 10, 3)).astype(np.uint8))
+                for j in range(2)] for i in range(3)]
+    agent_infos = [AgentInfoProto(stacked_vector_observation=[1, 2, 3], visual_observations=images,
+                                  reward=1, done=False, id=i) for i, images in enumerate(cameras)]
+
+    expected = BrainInfo.from_agent_proto(agent_infos, brain_params, uint8_visual=True)
+    decoder = ThreadPoolImageDecoder(2, reuse_output=True)
+    brain_info = BrainInfo.from_agent_proto(agent_infos, brain_params, uint8_visual=True, image_decoder=decoder)
+    decoder.close()
+
+    assert len(brain_info.visual_observations) == 2
+    assert np.asarray(brain_info.visual_observations[0]).shape == (3, 3, 12, 10)
+    assert np.asarray(brain_info.visual_observations[1]).shape == (3, 1, 12, 10)
+    for obs, expected_obs in zip(brain_info.visual_observations, expected.visual_observations):
+        np.testing.assert_array_equal(np.asarray(obs), np.asarray(expected_obs))
+
+
+def make_brain_info(num_agents, memory_size, seed):
+    random = np.random.RandomState(seed)
+    memory = random.rand(num_agents, memory_size) if memory_size else np.zeros((0, 0))
+    return BrainInfo([[random.rand(4, 5, 3) for _ in range(num_agents)]], random.rand(num_agents, 6),
+                     ['text'] * num_agents, memory=memory, reward=random.rand(num_agents).tolist(),
+                     agents=list(range(num_agents)), local_done=[False] * num_agents,
+                     vector_action=random.rand(num_agents, 2), text_action=[[]] * num_agents,
+                     max_reached=[True] * num_agents, action_mask=random.rand(num_agents, 3))
+
+
+def test_merge_all_matches_merge():
+    infos = [make_brain_info(num_agents, memory_size, seed)
+             for seed, (num_agents, memory_size) in enumerate([(2, 0), (1, 4), (3, 2), (0, 0), (2, 4)])]
+    merged = BrainInfo.merge_all(infos)
+
+    expected = make_brain_info(2, 0, 0)
+    for seed, (num_agents, memory_size) in enumerate([(1, 4), (3, 2), (0, 0), (2, 4)]):
+        expected.merge(make_brain_info(num_agents, memory_size, seed + 1))
+    for name in ['vector_observations', 'memories', 'rewards', 'local_done', 'max_reached', 'agents',
+                 'previous_vector_actions', 'previous_text_actions', 'text_observations', 'action_masks']:
+        np.testing.assert_array_equal(getattr(merged, name), getattr(expected, name))
+    np.testing.assert_array_equal(merged.visual_observations[0], expected.visual_observations[0])
+    assert merged.custom_observations is None
+
+    # The merged BrainInfo does not share lists or arrays with the merged ones.
+    merged.visual_observations[0].clear()
+    merged.vector_observations[...] = 0
+    assert len(infos[0].visual_observations[0]) == 2
+    assert infos[0].vector_observations.any()
+
+
+def test_merge_all_agent_ids():
+    infos = [make_brain_info(2, 0, 0), make_brain_info(1, 0, 1)]
+    merged = BrainInfo.merge_all(infos, [(0, 0), (0, 1), (5, 0)])
+    assert merged.agents == [(0, 0), (0, 1), (5, 0)]
+    assert merged.memories.shape == (0, 0)
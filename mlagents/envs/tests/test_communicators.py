@@ -0,0 +1,111 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from mlagents.envs import UnityEnvironment, UnityEnvironmentException, UnityWorkerInUseException
+from mlagents.envs.mock_communicator import MockCommunicator
+from mlagents.envs.shared_memory_communicator import SharedMemoryCommunicator
+from mlagents.envs.unix_socket_communicator import UnixSocketCommunicator
+from mlagents.envs.stand_in_peer import PEERS, SharedMemoryPeer
+from mlagents.envs.communicator_objects import UnityInput, UnityOutput
+from mlagents.envs.tests.test_socket_communicator import free_port, make_output
+
+
+def serve(communicator, port, initialization_output, handler, **kwargs):
+    peer = PEERS[communicator](port, timeout_wait=10, **kwargs)
+    thread = threading.Thread(target=peer.serve, args=(initialization_output, handler), daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("communicator", ["rpc", "socket", "unix", "shm"])
+def test_environment_over_communicator(communicator):
+    port = free_port()
+    mock = MockCommunicator(discrete_action=False, visual_inputs=0)
+    peer = serve(communicator, port, mock.initialize(None), mock.exchange)
+    env = UnityEnvironment(file_name=None, base_port=port, timeout_wait=10, communicator=communicator)
+    assert env.brain_names == ["RealFakeBrain"]
+
+    brain_info = env.reset()["RealFakeBrain"]
+    assert len(brain_info.agents) == 3
+    brain_info = env.step([0] * 6)["RealFakeBrain"]
+    assert list(brain_info.local_done) == [False, False, True]
+    np.testing.assert_array_equal(brain_info.vector_observations[0], [1, 2, 3, 1, 2, 3])
+
+    env.close()
+    peer.join(timeout=10)
+    assert not peer.is_alive()
+
+
+def test_unknown_communicator():
+    with pytest.raises(UnityEnvironmentException):
+        UnityEnvironment.get_communicator(0, free_port(), 1, "carrier pigeon")
+
+
+@pytest.mark.parametrize("communicator,kwargs", [("unix", {}), ("shm", {"capacity": 64 * 1024})])
+def test_communicator_large_messages(communicator, kwargs):
+    sizes = [10, 64 * 1024, 5000000, 1000]
+    port = free_port()
+    outputs = [make_output(size, bytes([i + 1])).unity_output for i, size in enumerate(sizes)]
+    received = []
+
+    def handler(unity_input):
+        received.append(unity_input)
+        return outputs[len(received) - 1]
+
+    peer = serve(communicator, port, UnityOutput(), handler, **kwargs)
+    comm = UnityEnvironment.COMMUNICATORS[communicator](0, port, 10, **kwargs)
+    comm.initialize(UnityInput())
+    for i, size in enumerate(sizes):
+        unity_input = UnityInput()
+        unity_input.rl_input.command = i
+        output = comm.exchange(unity_input)
+        observation = output.rl_output.agentInfos["RealFakeBrain"].value[0].visual_observations[0]
+        assert observation == bytes([i + 1]) * size
+    assert [unity_input.rl_input.command for unity_input in received] == list(range(len(sizes)))
+
+    comm.close()
+    peer.join(timeout=10)
+    assert not peer.is_alive()
+
+
+def test_unix_socket_communicator_removes_socket_file():
+    port = free_port()
+    path = UnixSocketCommunicator.socket_path(port)
+    # A socket file left over by a crashed environment does not block the worker.
+    open(path, "w").close()
+    peer = serve("unix", port, UnityOutput(), lambda unity_input: UnityOutput())
+    comm = UnixSocketCommunicator(base_port=port, timeout_wait=10)
+    comm.initialize(UnityInput())
+    assert os.path.exists(path)
+    comm.close()
+    peer.join(timeout=10)
+    assert not os.path.exists(path)
+
+
+def test_shared_memory_communicator_worker_in_use():
+    port = free_port()
+    comm = SharedMemoryCommunicator(base_port=port, timeout_wait=10)
+    with pytest.raises(UnityWorkerInUseException):
+        SharedMemoryCommunicator(base_port=port, timeout_wait=10)
+    comm.close()
+    shm_name, doorbell_unity, doorbell_python = SharedMemoryCommunicator.names(port)
+    assert not os.path.exists(doorbell_unity)
+    assert not os.path.exists(doorbell_python)
+    SharedMemoryCommunicator(base_port=port, timeout_wait=10).close()
+
+
+def test_shared_memory_communicator_closed_peer():
+    port = free_port()
+    peer = SharedMemoryPeer(port, timeout_wait=10)
+    thread = threading.Thread(target=peer.connect, daemon=True)
+    thread.start()
+    comm = SharedMemoryCommunicator(base_port=port, timeout_wait=10)
+    comm._connect()
+    thread.join(timeout=10)
+    peer.close()
+    with pytest.raises(UnityEnvironmentException):
+        comm.exchange(UnityInput())
+    comm.close()
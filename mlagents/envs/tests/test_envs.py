@@ -91,5 +91,38 @@ def test_close(mock_communicator, mock_launcher):
     assert comm.has_been_closed
 
 
+class RecordingCommunicator(MockCommunicator):
+    def __init__(self, **kwargs):
+        super(RecordingCommunicator, self).__init__(**kwargs)
+        self.inputs = []
+
+    def exchange(self, inputs):
+        self.inputs.append(inputs)
+        return super(RecordingCommunicator, self).exchange(inputs)
+
+
+@mock.patch('mlagents.envs.UnityEnvironment.executable_launcher')
+@mock.patch('mlagents.envs.UnityEnvironment.get_communicator')
+def test_step_numpy_actions(mock_communicator, mock_launcher):
+    comm = RecordingCommunicator(discrete_action=False, visual_inputs=0)
+    mock_communicator.return_value = comm
+    env = UnityEnvironment(' ')
+    env.reset()
+    actions = np.array([[0.5, 1.0], [1.5, 2.0], [2.5, 3.0]])
+    memories = np.arange(6).reshape(3, 2)
+    env.step(actions.tolist(), memory=memories.tolist(), text_action=["a", "", "c"], value=[0.1, 0.2, 0.3])
+    env.step(actions.astype(np.float32), memory=memories, text_action=["a", "", "c"], value=np.array([0.1, 0.2, 0.3]))
+    # Numpy arrays produce the same input as lists.
+    assert comm.inputs[-1] == comm.inputs[-2]
+    agent_actions = comm.inputs[-1].rl_input.agent_actions['RealFakeBrain'].value
+    assert [list(action.vector_actions) for action in agent_actions] == actions.tolist()
+    assert [list(action.memories) for action in agent_actions] == memories.tolist()
+    assert [action.text_actions for action in agent_actions] == ["a", "", "c"]
+
+    with pytest.raises(UnityActionException):
+        env.step(np.zeros((3, 3), dtype=np.float32))
+    env.close()
+
+
 if __name__ == '__main__':
     pytest.main()
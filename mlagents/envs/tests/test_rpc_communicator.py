@@ -1,7 +1,13 @@
+import threading
+
 import pytest
 
 from mlagents.envs import RpcCommunicator
 from mlagents.envs import UnityWorkerInUseException
+from mlagents.envs.rpc_communicator import UnityToExternalServicerImplementation
+from mlagents.envs.stand_in_peer import RpcPeer
+from mlagents.envs.communicator_objects import UnityMessage, UnityInput, UnityOutput
+from mlagents.envs.tests.test_socket_communicator import free_port, make_output
 
 
 def test_rpc_communicator_checks_port_on_create():
@@ -29,3 +35,40 @@ def test_rpc_communicator_create_multiple_workers():
     first_comm.close()
     second_comm.close()
 
+
+
+def test_rpc_communicator_exchange():
+    port = free_port()
+    received = []
+
+    def handler(unity_input):
+        received.append(unity_input)
+        return make_output(len(received)).unity_output
+
+    peer = threading.Thread(target=RpcPeer(port, timeout_wait=10).serve, args=(UnityOutput(), handler), daemon=True)
+    peer.start()
+    comm = RpcCommunicator(base_port=port, timeout_wait=10)
+    comm.initialize(UnityInput())
+    for i in range(3):
+        unity_input = UnityInput()
+        unity_input.rl_input.command = i
+        output = comm.exchange(unity_input)
+        # The output Unity sends for the initialization input is discarded.
+        assert output.rl_output.agentInfos["RealFakeBrain"].value[0].visual_observations[0] == b"x" * (i + 2)
+    assert [unity_input.rl_input.command for unity_input in received[1:]] == [0, 1, 2]
+    comm.close()
+    peer.join(timeout=10)
+    assert not peer.is_alive()
+
+
+def test_servicer_close_releases_pending_exchange():
+    servicer = UnityToExternalServicerImplementation()
+    replies = []
+    unity = threading.Thread(target=lambda: replies.append(servicer.Exchange(UnityMessage(), None)))
+    unity.start()
+    assert servicer.receive(timeout=10) is not None
+    servicer.close()
+    unity.join(timeout=10)
+    assert replies[0].header.status == 400
+    assert servicer.Exchange(UnityMessage(), None).header.status == 400
+    assert servicer.receive(timeout=0.01) is not None
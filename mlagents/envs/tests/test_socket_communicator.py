@@ -0,0 +1,105 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+from mlagents.envs.socket_communicator import SocketCommunicator
+from mlagents.envs.communicator_objects import UnityMessage, UnityInput, UnityOutput, AgentInfoProto
+from mlagents.envs.exception import UnityEnvironmentException
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def make_output(size, fill=b"x"):
+    message = UnityMessage()
+    message.header.status = 200
+    agent_info = AgentInfoProto(visual_observations=[fill * size], id=0)
+    message.unity_output.rl_output.agentInfos["RealFakeBrain"].value.extend([agent_info])
+    return message
+
+
+def recv_exactly(conn, n):
+    data = b""
+    while len(data) < n:
+        chunk = conn.recv(n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+class FakeUnity(threading.Thread):
+    """
+    Unity side of the socket communication: answers every message with the next reply (closes when none are left).
+    """
+
+    def __init__(self, port, replies):
+        super(FakeUnity, self).__init__(daemon=True)
+        self.port = port
+        self.replies = list(replies)
+        self.received = []
+
+    def run(self):
+        conn = None
+        while conn is None:
+            try:
+                conn = socket.create_connection(("localhost", self.port))
+            except ConnectionRefusedError:
+                continue
+        with conn:
+            while True:
+                header = recv_exactly(conn, 4)
+                if header is None:
+                    return
+                message = UnityMessage()
+                message.ParseFromString(recv_exactly(conn, struct.unpack("I", header)[0]))
+                self.received.append(message)
+                if not self.replies:
+                    return
+                reply = self.replies.pop(0).SerializeToString()
+                conn.sendall(struct.pack("I", len(reply)) + reply)
+
+
+def start(replies):
+    port = free_port()
+    unity = FakeUnity(port, replies)
+    unity.start()
+    comm = SocketCommunicator(base_port=port)
+    return comm, unity
+
+
+def test_socket_communicator_exchange_sizes():
+    sizes = [1000, 100000, 5000000, 10]
+    comm, unity = start([make_output(1)] + [make_output(size, bytes([i + 1])) for i, size in enumerate(sizes)])
+    comm.initialize(UnityInput())
+    assert comm._conn.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY) != 0
+
+    outputs = []
+    for _ in sizes:
+        output = comm.exchange(UnityInput())
+        assert isinstance(output, UnityOutput)
+        outputs.append(output)
+
+    # Earlier outputs stay valid after the receive buffer is reused.
+    for i, (size, output) in enumerate(zip(sizes, outputs)):
+        observation = output.rl_output.agentInfos["RealFakeBrain"].value[0].visual_observations[0]
+        assert observation == bytes([i + 1]) * size
+    assert len(comm._buffer) >= 5000000
+
+    comm.close()
+    unity.join(timeout=10)
+    assert unity.received[-1].header.status == 400
+
+
+def test_socket_communicator_closed_connection():
+    comm, unity = start([make_output(1)])
+    comm.initialize(UnityInput())
+    with pytest.raises(UnityEnvironmentException):
+        comm.exchange(UnityInput())
+    comm.close()
+    unity.join(timeout=10)
@@ -1,10 +1,17 @@
 import unittest.mock as mock
 from unittest.mock import MagicMock
 import unittest
+import copy
+import time
+
+import pytest
 
 from mlagents.envs.subprocess_environment import *
 from mlagents.envs import UnityEnvironmentException, BrainInfo
 
+# test_environments_are_created replaces create_worker with a mock.
+create_worker = SubprocessUnityEnvironment.create_worker
+
 
 def mock_env_factory(worker_id: int):
     return mock.create_autospec(spec=BaseUnityEnvironment)
@@ -87,4 +94,180 @@ class SubprocessEnvironmentTest(unittest.TestCase):
             combined_braininfo.vector_observations.tolist(),
             [[1.0, 2.0], [1.0, 2.0], [3.0, 4.0]]
         )
-        self.assertEqual(combined_braininfo.agents, ['0-1', '0-2', '1-3'])
+        self.assertEqual(combined_braininfo.agents, [(0, 1), (0, 2), (1, 3)])
+
+    @staticmethod
+    def test_step_send_splits_input_by_env_ids():
+        env = SubprocessUnityEnvironment(mock_env_factory, 0)
+        env.env_agent_counts = {
+            'MockBrain': [1, 3, 5]
+        }
+        env.envs = [
+            MockEnvWorker(0),
+            MockEnvWorker(1),
+            MockEnvWorker(2),
+        ]
+        env_2_actions = ([[5.0, 6.0]] * 5)
+        env_0_actions = [[1.0, 2.0]]
+        env.step_send([2, 0], vector_action={'MockBrain': env_2_actions + env_0_actions})
+        env.envs[0].send.assert_called_with('step', ({'MockBrain': env_0_actions}, {}, {}, {}))
+        env.envs[1].send.assert_not_called()
+        env.envs[2].send.assert_called_with('step', ({'MockBrain': env_2_actions}, {}, {}, {}))
+        assert env.stepping == {0, 2}
+
+    def test_step_send_fails_when_env_is_stepping(self):
+        env = SubprocessUnityEnvironment(mock_env_factory, 0)
+        env.envs = [MockEnvWorker(0), MockEnvWorker(1)]
+        env.stepping = {1}
+        with self.assertRaises(UnityEnvironmentException):
+            env.step_send([0, 1], vector_action={})
+        with self.assertRaises(UnityEnvironmentException):
+            env.step_async(vector_action={})
+        with self.assertRaises(UnityEnvironmentException):
+            env.reset()
+
+    def test_step_recv_fails_if_not_stepping(self):
+        env = SubprocessUnityEnvironment(mock_env_factory, 0)
+        with self.assertRaises(UnityEnvironmentException):
+            env.step_recv()
+
+
+class CountingEnv(BaseUnityEnvironment):
+    """
+    Worker i has i + 1 agents whose observations encode the worker and step (agents are added at grow_step).
+    """
+
+    def __init__(self, worker_id, grow_step=None, step_latency=0.0):
+        self.worker_id = worker_id
+        self.grow_step = grow_step
+        self.step_latency = step_latency
+        self.steps = 0
+
+    def _brain_info(self):
+        n = self.worker_id + 1 + int(self.grow_step is not None and self.steps >= self.grow_step)
+        value = 10 * self.steps + self.worker_id
+        return {'MockBrain': BrainInfo(
+            [[np.full((3, 4, 5), value, dtype=np.uint8) for _ in range(n)]],
+            np.full((n, 2), value, dtype=np.float32), ['text'] * n, memory=np.zeros((0, 0)),
+            reward=[float(value)] * n, agents=list(range(n)), local_done=[value % 2 == 0] * n,
+            vector_action=np.zeros((n, 1)), text_action=[[]] * n, max_reached=[False] * n)}
+
+    def reset(self, config=None, train_mode=True):
+        self.steps = 0
+        return self._brain_info()
+
+    def step(self, vector_action=None, memory=None, text_action=None, value=None):
+        time.sleep(self.step_latency)
+        self.steps += 1
+        return self._brain_info()
+
+    @property
+    def global_done(self):
+        return False
+
+    @property
+    def external_brains(self):
+        return {}
+
+    @property
+    def reset_parameters(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+def counting_env_factory(worker_id):
+    return CountingEnv(worker_id)
+
+
+def growing_env_factory(worker_id):
+    return CountingEnv(worker_id, grow_step=2)
+
+
+def straggling_env_factory(worker_id):
+    return CountingEnv(worker_id, step_latency=1.0 if worker_id == 2 else 0.0)
+
+
+def run_counting_envs(env_factory, shared_memory, num_steps=4):
+    env = SubprocessUnityEnvironment(env_factory, 3, shared_memory=shared_memory)
+    try:
+        infos = [env.reset()['MockBrain']]
+        for _ in range(num_steps):
+            num_agents = len(infos[-1].agents)
+            infos.append(env.step({'MockBrain': np.zeros((num_agents, 1))})['MockBrain'])
+        # Copy the results that are still valid (the last two).
+        return [copy.deepcopy(info) for info in infos[-2:]], infos
+    finally:
+        env.close()
+
+
+def assert_brain_info_equal(a, b):
+    assert a.agents == b.agents
+    assert a.text_observations == b.text_observations
+    np.testing.assert_array_equal(np.asarray(a.visual_observations[0]), np.asarray(b.visual_observations[0]))
+    for name in ['vector_observations', 'rewards', 'local_done', 'max_reached', 'previous_vector_actions',
+                 'memories']:
+        np.testing.assert_array_equal(np.asarray(getattr(a, name)), np.asarray(getattr(b, name)))
+
+
+def test_shared_memory_matches_pickled_brain_info():
+    SubprocessUnityEnvironment.create_worker = staticmethod(create_worker)
+    expected, _ = run_counting_envs(counting_env_factory, shared_memory=False)
+    env = SubprocessUnityEnvironment(counting_env_factory, 3, shared_memory=True)
+    try:
+        env.reset()
+        previous = env.step({'MockBrain': np.zeros((6, 1))})['MockBrain']
+        current = env.step({'MockBrain': np.zeros((6, 1))})['MockBrain']
+        # The merged fields are views into shared memory, and the previous result is still valid.
+        assert not current.vector_observations.flags.owndata
+        assert not current.visual_observations[0].flags.owndata
+        assert previous.vector_observations[0, 0] == 10
+        assert current.vector_observations[0, 0] == 20
+        assert_brain_info_equal(current, run_counting_envs(counting_env_factory, False, num_steps=2)[0][1])
+    finally:
+        env.close()
+    actual, _ = run_counting_envs(counting_env_factory, shared_memory=True)
+    for a, b in zip(actual, expected):
+        assert_brain_info_equal(a, b)
+
+
+def test_shared_memory_falls_back_when_agents_change():
+    SubprocessUnityEnvironment.create_worker = staticmethod(create_worker)
+    expected, _ = run_counting_envs(growing_env_factory, shared_memory=False)
+    actual, infos = run_counting_envs(growing_env_factory, shared_memory=True)
+    for a, b in zip(actual, expected):
+        assert_brain_info_equal(a, b)
+    assert len(infos[-1].agents) == 9
+
+
+@pytest.mark.parametrize("shared_memory", [False, True])
+def test_step_recv_returns_finished_envs(shared_memory):
+    SubprocessUnityEnvironment.create_worker = staticmethod(create_worker)
+    env = SubprocessUnityEnvironment(straggling_env_factory, 3, shared_memory=shared_memory)
+    try:
+        env.reset()
+        env.step_send([0, 1, 2], {'MockBrain': np.zeros((6, 1))})
+        # Environment 2 is still stepping, so the first two are returned without it.
+        env_ids, brain_info = env.step_recv(batch_size=2)
+        brain_info = brain_info['MockBrain']
+        assert env_ids == [0, 1]
+        assert brain_info.agents == [(0, 0), (1, 0), (1, 1)]
+        assert brain_info.vector_observations[:, 0].tolist() == [10, 11, 11]
+        assert [x[0, 0, 0] for x in brain_info.visual_observations[0]] == [10, 11, 11]
+
+        env.step_send([1, 0], {'MockBrain': np.zeros((3, 1))})
+        env_ids, brain_info = env.step_recv()
+        brain_info = brain_info['MockBrain']
+        assert env_ids == [0, 1, 2]
+        assert brain_info.agents == [(0, 0), (1, 0), (1, 1), (2, 0), (2, 1), (2, 2)]
+        assert brain_info.rewards == [20, 21, 21, 12, 12, 12]
+
+        # All environments can be stepped together again.
+        env.step({'MockBrain': np.zeros((6, 1))})
+        brain_info = env.step({'MockBrain': np.zeros((6, 1))})['MockBrain']
+        assert brain_info.vector_observations[:, 0].tolist() == [40, 41, 41, 32, 32, 32]
+        if shared_memory:
+            assert not brain_info.vector_observations.flags.owndata
+    finally:
+        env.close()
@@ -0,0 +1,60 @@
+import logging
+import os
+import socket
+import tempfile
+
+from .socket_communicator import SocketCommunicator
+from .exception import UnityEnvironmentException
+
+logger = logging.getLogger("mlagents.envs")
+
+
+class UnixSocketCommunicator(SocketCommunicator):
+    def __init__(self, worker_id=0,
+                 base_port=5005,
+                 timeout_wait=30):
+        """
+        Python side of the socket communication over a Unix domain socket. Python is the server and Unity the client.
+        Uses the same length-prefixed messages as the SocketCommunicator, but skips the TCP/IP stack.
+
+        :int base_port: Baseline port number to connect to Unity environment over. worker_id increments over this.
+        The socket file is named after the resulting port number (see socket_path).
+        :int worker_id: Number to add to communication port (5005) [0]. Used for asynchronous agent scenarios.
+        :int timeout_wait: Time (in seconds) to wait for the environment to connect and to respond.
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            raise UnityEnvironmentException("Unix domain sockets are not supported on this platform.")
+        super(UnixSocketCommunicator, self).__init__(worker_id, base_port, timeout_wait)
+        self.path = self.socket_path(self.port)
+
+    @staticmethod
+    def socket_path(port):
+        """
+        Path of the socket file Unity connects to for the given port number.
+        """
+        return os.path.join(tempfile.gettempdir(), "ml-agents-{}.sock".format(port))
+
+    def _create_socket(self):
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.bind(self.path)
+        except OSError:
+            # The socket file outlives a crashed environment. It is only in use if something still accepts connections.
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(self.path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    pass
+                else:
+                    s.close()
+                    raise
+            logger.debug("Removing stale socket file {}".format(self.path))
+            os.unlink(self.path)
+            s.bind(self.path)
+        return s
+
+    def _disconnect(self):
+        bound = self._socket is not None
+        super(UnixSocketCommunicator, self)._disconnect()
+        if bound and os.path.exists(self.path):
+            os.unlink(self.path)
@@ -69,68 +69,60 @@ class DuelingDQN(nn.Module):
         out = x_a + x_v # [bs, num_action]
         return out
 
+# NoisyLinearHay 클래스 -> factorized Gaussian noise 를 사용하는 noisy linear layer
+# 가중치 noise 를 n_out x n_in 개 sampling 하는 대신 입력 / 출력 크기의 noise (n_in + n_out 개) 의 외적을 사용
+# noise 는 forward 마다 sampling 하지 않고 reset_noise 를 호출할 때만 새로 sampling (행동 결정 step / 학습 update 마다)
+# noise 버퍼는 state_dict 에 저장하지 않으므로 기존 모델 파일과 호환되고, 모델과 함께 .to(device) 로 이동
 class NoisyLinearHay(nn.Module):
-    def __init__(self, n_in, n_out, use_cuda=True):
+    def __init__(self, n_in, n_out, sigma_zero=0.5):
         super(NoisyLinearHay, self).__init__()
         self.n_in = n_in
         self.n_out = n_out
-        self.use_cuda = use_cuda
 
-        self.w_mu  = -np.sqrt(3/n_out) + torch.rand(n_out, n_in, requires_grad=True) * 2 * np.sqrt(3/n_out)
-        self.w_sig = torch.ones((n_out, n_in), requires_grad=True) * 0.017
+        self.w_mu  = nn.Parameter(-np.sqrt(3/n_out) + torch.rand(n_out, n_in) * 2 * np.sqrt(3/n_out))
+        self.w_sig = nn.Parameter(torch.full((n_out, n_in), sigma_zero / np.sqrt(n_in)))
 
-        self.b_mu  = -np.sqrt(3/n_out) + torch.rand(n_out, requires_grad=True) * 2 * np.sqrt(3/n_out)
-        self.b_sig = torch.ones((n_out), requires_grad=True) * 0.017
+        self.b_mu  = nn.Parameter(-np.sqrt(3/n_out) + torch.rand(n_out) * 2 * np.sqrt(3/n_out))
+        self.b_sig = nn.Parameter(torch.full((n_out,), sigma_zero / np.sqrt(n_in)))
 
-        if use_cuda:
-            self.w_mu = self.w_mu.cuda()
-            self.w_sig = self.w_sig.cuda()
-            self.b_mu = self.b_mu.cuda()
-            self.b_sig = self.b_sig.cuda()
+        self.register_buffer("eps_in", torch.zeros(n_in), persistent=False)
+        self.register_buffer("eps_out", torch.zeros(n_out), persistent=False)
+        self.reset_noise()
 
-        self.w_mu = nn.Parameter(self.w_mu)
-        self.w_sig = nn.Parameter(self.w_sig)
-        self.b_mu = nn.Parameter(self.b_mu)
-        self.b_sig = nn.Parameter(self.b_sig)
+    @staticmethod
+    def _scale_noise(eps):
+        return eps.sign().mul_(eps.abs().sqrt_())
+
+    def reset_noise(self):
+        with torch.no_grad():
+            self.eps_in.copy_(self._scale_noise(self.eps_in.normal_()))
+            self.eps_out.copy_(self._scale_noise(self.eps_out.normal_()))
 
     def forward(self, x, train):
-        if self.use_cuda:
-            w_eps = torch.randn((self.n_out, self.n_in)).cuda()
-            b_eps = torch.randn((self.n_out)).cuda()
-        else:
-            w_eps = torch.randn((self.n_out, self.n_in))
-            b_eps = torch.randn((self.n_out))
-
-        if train:
-            w = self.w_mu + F.relu(self.w_sig) * w_eps
-            b = self.b_mu + F.relu(self.b_sig) * b_eps
-        else:
-            w = self.w_mu
-            b = self.b_mu
-
-        return F.linear(x, w, b)
+        # train 일 때만 noise 사용 (evaluation 시에는 평균 가중치만 사용)
+        if not train:
+            return F.linear(x, self.w_mu, self.b_mu)
+
+        # (w_mu + w_sig * eps_out eps_in^T) x = w_mu x + eps_out * (w_sig (eps_in * x)) -> n_out x n_in 크기의 noisy 가중치를 만들지 않음
+        b = torch.addcmul(self.b_mu, F.relu(self.b_sig), self.eps_out)
+        return F.linear(x, self.w_mu, b) + F.linear(x * self.eps_in, F.relu(self.w_sig)) * self.eps_out
 
 class NoisyDQNHay(nn.Module):
-    def __init__(self, num_action, use_cuda=True):
+    def __init__(self, num_action):
         super(NoisyDQNHay, self).__init__()
-        self.use_cuda = use_cuda
 
         input_channel = config.state_size[2] * config.stack_frame
         self.conv1 = nn.Conv2d(in_channels=input_channel, out_channels=32, kernel_size=8, stride=4, padding=4)
         self.conv2 = nn.Conv2d(in_channels=32, out_channels=64, kernel_size=4, stride=2, padding=2)
         self.conv3 = nn.Conv2d(in_channels=64, out_channels=64, kernel_size=4, stride=1, padding=1)
 
-        self.linear1 = NoisyLinearHay(
-            n_in=64*int(config.state_size[0]/8)*int(config.state_size[1]/8),
-            n_out=512,
-            use_cuda=use_cuda
-        )
-        self.linear2 = NoisyLinearHay(n_in=512, n_out=num_action, use_cuda=use_cuda)
+        self.linear1 = NoisyLinearHay(n_in=64*int(config.state_size[0]/8)*int(config.state_size[1]/8), n_out=512)
+        self.linear2 = NoisyLinearHay(n_in=512, n_out=num_action)
 
-        if use_cuda:
-            self.conv1.cuda()
-            self.conv2.cuda()
-            self.conv3.cuda()
+    # 모든 noisy linear layer 의 noise 를 새로 sampling
+    def reset_noise(self):
+        self.linear1.reset_noise()
+        self.linear2.reset_noise()
 
     def forward(self, x, train=True):
         x = (x-(255.0/2))/(255.0/2)
@@ -161,22 +153,18 @@ class ICM(nn.Module):
         self.fc1_im = nn.Linear(2*32*int(config.state_size[0]/16)*int(config.state_size[1]/16), 256)
         self.fc2_im = nn.Linear(256, num_action)
 
+    # 상태의 encoding vector
+    def encode(self, x):
+        x = (x-(255.0/2))/(255.0/2)
+        x = F.elu(self.conv1(x))
+        x = F.elu(self.conv2(x))
+        x = F.elu(self.conv3(x))
+        x = F.elu(self.conv4(x))
+        return x.view(-1, 32*int(config.state_size[0]/16)*int(config.state_size[1]/16))
+
     def forward(self, x_now, x_next, a_now):
-        # current state
-        x_now = (x_now-(255.0/2))/(255.0/2)
-        x_now = F.elu(self.conv1(x_now))
-        x_now = F.elu(self.conv2(x_now))
-        x_now = F.elu(self.conv3(x_now))
-        x_now = F.elu(self.conv4(x_now))
-        x_now_encode = x_now.view(-1, 32*int(config.state_size[0]/16)*int(config.state_size[1]/16)) # encoding vector of current state
-
-        # next state
-        x_next = (x_next-(255.0/2))/(255.0/2)
-        x_next = F.elu(self.conv1(x_next))
-        x_next = F.elu(self.conv2(x_next))
-        x_next = F.elu(self.conv3(x_next))
-        x_next = F.elu(self.conv4(x_next))
-        x_next_encode = x_next.view(-1, 32*int(config.state_size[0]/16)*int(config.state_size[1]/16)) # encoding vector of next state
+        # current state 와 next state 를 합쳐서 encoder 연산을 한번만 수행한 후 나눔
+        x_now_encode, x_next_encode = self.encode(torch.cat([x_now, x_next])).split(len(x_now)) # encoding vector of current / next state
 
         # forward model
         x_fm = torch.cat([x_now_encode, a_now.unsqueeze(1)], dim=1)
@@ -0,0 +1,434 @@
+import numpy as np
+import torch
+
+import queue
+import threading
+
+import segment_tree
+
+
+# ReplayMemory 클래스 -> 미리 할당된 numpy 배열 기반의 리플레이 메모리 (ring buffer)
+class ReplayMemory():
+    def __init__(self, maxlen, sampler=None):
+        self.maxlen = maxlen
+
+        # 우선순위에 따라 샘플링할 때 사용하는 PrioritizedSampler (None 이면 균등하게 샘플링)
+        self.sampler = sampler
+
+        # 다음에 데이터를 저장할 위치와 현재 저장된 데이터 수
+        self.index = 0
+        self.size = 0
+
+        # 다른 thread 에서 샘플링할 때 저장 중인 데이터를 읽지 않도록 lock 사용
+        self.lock = threading.Lock()
+
+        # 첫 샘플이 들어올 때 shape, dtype 에 맞게 배열을 할당
+        self.state = None
+        self.action = None
+        self.reward = None
+        self.next_state = None
+        self.done = None
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def _storage_dtype(value):
+        # float64 관측값은 float32 로 저장하여 메모리 사용량을 절반으로 줄임
+        dtype = np.asarray(value).dtype
+        if dtype == np.float64:
+            return np.float32
+        if dtype == np.bool_:
+            return np.float32
+        return dtype
+
+    def _allocate(self, state, action, reward, next_state, done):
+        def empty(value):
+            value = np.asarray(value)
+            return np.zeros((self.maxlen,) + value.shape, dtype=self._storage_dtype(value))
+
+        self.state = empty(state)
+        self.action = empty(action)
+        self.reward = np.zeros(self.maxlen, dtype=np.float32)
+        self.next_state = empty(next_state)
+        self.done = np.zeros(self.maxlen, dtype=np.float32)
+
+    # 리플레이 메모리에 데이터 추가 (상태, 행동, 보상, 다음 상태, 게임 종료 여부)
+    # stacked state 를 그대로 저장하므로 transition 을 만든 환경의 index (stream) 는 사용하지 않음
+    def append(self, state, action, reward, next_state, done, stream=0):
+        with self.lock:
+            if self.state is None:
+                self._allocate(state, action, reward, next_state, done)
+
+            i = self.index
+            self.state[i] = state
+            self.action[i] = action
+            self.reward[i] = reward
+            self.next_state[i] = next_state
+            self.done[i] = done
+            if self.sampler is not None:
+                self.sampler.add(i)
+
+            self.index = (self.index + 1) % self.maxlen
+            self.size = min(self.size + 1, self.maxlen)
+
+    # 저장된 데이터 중 batch_size 개의 index 를 샘플링 (복원 추출)
+    def sample_index(self, batch_size):
+        if self.sampler is not None:
+            return self.sampler.sample(batch_size)
+        return np.random.randint(0, self.size, size=batch_size)
+
+    # 샘플링한 index 에 대한 importance sampling weight (균등하게 샘플링할 때는 None)
+    def sample_weight(self, index):
+        if self.sampler is not None:
+            return self.sampler.weight(index)
+        return None
+
+    # 학습에 사용한 index 의 우선순위를 TD error 로 갱신
+    def update_priority(self, index, td_error):
+        if self.sampler is not None:
+            with self.lock:
+                self.sampler.update(index, td_error)
+
+    # index 에 해당하는 (상태, 행동, 보상, 다음 상태, 게임 종료 여부) 배열 반환
+    # out 이 주어지면 새 배열을 만들지 않고 out 의 배열들에 바로 복사
+    def get_batch(self, index, out=None):
+        fields = (self.state, self.action, self.reward, self.next_state, self.done)
+        if out is None:
+            return tuple(field[index] for field in fields)
+        for field, buffer in zip(fields, out):
+            np.take(field, index, axis=0, out=buffer, mode='clip')
+        return out
+
+    def sample(self, batch_size):
+        return self.get_batch(self.sample_index(batch_size))
+
+
+# FrameReplayMemory 클래스 -> 각 프레임을 한번만 저장하고 샘플링 시에 stacked state 를 재구성하는 리플레이 메모리
+# 하나의 slot 에 (다음 프레임, 행동, 보상, 게임 종료 여부) 를 저장하며 에피소드의 첫 프레임은 별도의 slot 에 저장
+# 여러 환경의 transition 을 번갈아 저장할 때는 환경 (stream) 마다 maxlen // num_streams 개의 slot 을 따로 사용하여
+# 각 환경의 프레임이 자신의 영역에 연속으로 저장되도록 함 (stacked state 는 같은 환경의 프레임으로만 재구성)
+class FrameReplayMemory():
+    def __init__(self, maxlen, frame_channel, stack_frame, skip_frame, sampler=None, num_streams=1):
+        self.maxlen = maxlen
+        self.sampler = sampler
+        self.frame_channel = frame_channel
+        self.stack_frame = stack_frame
+        self.skip_frame = skip_frame
+        self.num_streams = num_streams
+        self.stream_len = maxlen // num_streams
+        if self.stream_len <= skip_frame * (stack_frame - 1) + 1:
+            raise ValueError("maxlen {} is too small for {} streams".format(maxlen, num_streams))
+
+        # 지금까지 저장한 slot 의 수, stream 마다 저장한 slot 의 수 (global index) 와 현재 저장된 transition 의 수
+        self.count = 0
+        self.stream_count = np.zeros(num_streams, dtype=np.int64)
+        self.size = 0
+
+        self.new_episode = np.ones(num_streams, dtype=np.bool_)
+        self.episode_start = np.zeros(num_streams, dtype=np.int64)
+
+        # 다른 thread 에서 샘플링할 때 저장 중인 데이터를 읽지 않도록 lock 사용
+        self.lock = threading.Lock()
+
+        # stack 의 i 번째 프레임은 skip_frame*i step 이전의 프레임
+        self.frame_offset = self.skip_frame * np.arange(self.stack_frame)
+
+        self.frame = None
+        self.action = None
+        self.reward = np.zeros(self.maxlen, dtype=np.float32)
+        self.done = np.zeros(self.maxlen, dtype=np.float32)
+        self.first = np.ones(self.maxlen, dtype=np.bool_)
+        # global_index, episode_index 는 slot 이 속한 stream 안에서의 index
+        self.global_index = np.full(self.maxlen, -1, dtype=np.int64)
+        self.episode_index = np.zeros(self.maxlen, dtype=np.int64)
+
+    def __len__(self):
+        return self.size
+
+    def _allocate(self, frame, action):
+        action = np.asarray(action)
+        self.frame = np.zeros((self.maxlen,) + frame.shape, dtype=frame.dtype)
+        self.action = np.zeros((self.maxlen,) + action.shape, dtype=ReplayMemory._storage_dtype(action))
+
+    # stream 의 global index 에 해당하는 slot
+    def _slot(self, stream, global_index):
+        return stream * self.stream_len + global_index % self.stream_len
+
+    def _write(self, stream, frame, action, reward, done, first):
+        i = self._slot(stream, self.stream_count[stream])
+        # 덮어쓰는 slot 이 transition 이었다면 저장된 transition 수 감소
+        if self.global_index[i] >= 0 and not self.first[i]:
+            self.size -= 1
+
+        self.frame[i] = frame
+        self.action[i] = action
+        self.reward[i] = reward
+        self.done[i] = done
+        self.first[i] = first
+        self.global_index[i] = self.stream_count[stream]
+        self.episode_index[i] = self.episode_start[stream]
+
+        # 에피소드의 첫 프레임 slot 은 transition 이 아니므로 샘플링되지 않도록 우선순위를 0 으로 설정
+        if self.sampler is not None:
+            if first:
+                self.sampler.remove(i)
+            else:
+                self.sampler.add(i)
+
+        if not first:
+            self.size += 1
+        self.stream_count[stream] += 1
+        self.count += 1
+
+    # 리플레이 메모리에 데이터 추가 (상태, 행동, 보상, 다음 상태, 게임 종료 여부)
+    # state, next_state 는 skip_stack_frame 으로 만든 stacked state 이며 가장 최근 프레임만 저장
+    # stream : transition 을 만든 환경의 index (환경마다 에피소드의 프레임을 따로 이어서 저장)
+    def append(self, state, action, reward, next_state, done, stream=0):
+        frame = state[:self.frame_channel]
+        next_frame = next_state[:self.frame_channel]
+        with self.lock:
+            if self.frame is None:
+                self._allocate(frame, action)
+
+            if self.new_episode[stream]:
+                self.episode_start[stream] = self.stream_count[stream]
+                self._write(stream, frame, 0, 0, False, True)
+
+            self._write(stream, next_frame, action, reward, done, False)
+            self.new_episode[stream] = bool(done)
+
+    # 재구성할 프레임이 아직 덮어쓰이지 않은 transition 인지 확인
+    def _is_valid(self, index):
+        global_index = self.global_index[index]
+        stream = np.minimum(index // self.stream_len, self.num_streams - 1)
+        oldest = np.maximum(global_index - 1 - self.frame_offset[-1], self.episode_index[index])
+        return (global_index >= 0) & ~self.first[index] & (oldest >= self.stream_count[stream] - self.stream_len)
+
+    # 저장된 slot 중에서 균등하게 샘플링 (stream 마다 채워진 slot 수가 다르므로 채워진 slot 들을 이어 붙인 index 로 샘플링)
+    def _sample_slot(self, batch_size):
+        if self.sampler is not None:
+            return self.sampler.sample(batch_size)
+        filled = np.minimum(self.stream_count, self.stream_len)
+        end = np.cumsum(filled)
+        index = np.random.randint(0, end[-1], size=batch_size)
+        stream = np.searchsorted(end, index, side='right')
+        return stream * self.stream_len + index - (end - filled)[stream]
+
+    # 유효한 transition 중 batch_size 개의 index 를 샘플링 (복원 추출)
+    def sample_index(self, batch_size):
+        index = self._sample_slot(batch_size)
+        invalid = ~self._is_valid(index)
+        while invalid.any():
+            index[invalid] = self._sample_slot(int(invalid.sum()))
+            invalid = ~self._is_valid(index)
+        return index
+
+    # 샘플링한 index 에 대한 importance sampling weight (균등하게 샘플링할 때는 None)
+    def sample_weight(self, index):
+        if self.sampler is not None:
+            return self.sampler.weight(index)
+        return None
+
+    # 학습에 사용한 index 의 우선순위를 TD error 로 갱신
+    def update_priority(self, index, td_error):
+        if self.sampler is not None:
+            with self.lock:
+                # 학습하는 동안 다른 transition 으로 덮어쓰인 slot 은 제외
+                valid = self._is_valid(index)
+                self.sampler.update(index[valid], td_error[valid])
+
+    # 가장 최근 프레임의 global index 로부터 stacked state 재구성 (에피소드 시작 이전은 첫 프레임으로 채움)
+    # base : transition 이 속한 stream 의 첫 slot
+    def _stack(self, newest, episode_start, base, out=None):
+        frame_global = np.maximum(newest[:, None] - self.frame_offset[None, :], episode_start[:, None])
+        frame_slot = base[:, None] + frame_global % self.stream_len
+        if out is None:
+            frames = self.frame[frame_slot]
+            return frames.reshape((len(newest), -1) + frames.shape[3:])
+        np.take(self.frame, frame_slot, axis=0, out=out.reshape(frame_slot.shape + self.frame.shape[1:]), mode='clip')
+        return out
+
+    # index 에 해당하는 (상태, 행동, 보상, 다음 상태, 게임 종료 여부) 배열 반환
+    # out 이 주어지면 새 배열을 만들지 않고 out 의 배열들에 바로 복사
+    def get_batch(self, index, out=None):
+        global_index = self.global_index[index]
+        episode_start = self.episode_index[index]
+        base = index // self.stream_len * self.stream_len
+        if out is None:
+            state = self._stack(global_index - 1, episode_start, base)
+            next_state = self._stack(global_index, episode_start, base)
+            return state, self.action[index], self.reward[index], next_state, self.done[index]
+
+        self._stack(global_index - 1, episode_start, base, out[0])
+        for field, buffer in zip((self.action, self.reward), out[1:3]):
+            np.take(field, index, axis=0, out=buffer, mode='clip')
+        self._stack(global_index, episode_start, base, out[3])
+        np.take(self.done, index, axis=0, out=out[4], mode='clip')
+        return out
+
+    def sample(self, batch_size):
+        return self.get_batch(self.sample_index(batch_size))
+
+
+# PrioritizedSampler 클래스 -> Prioritized Experience Replay 를 위해 sum tree / min tree 로 우선순위에 비례하여 slot 을 샘플링
+class PrioritizedSampler():
+    def __init__(self, maxlen, alpha, beta, beta_increment=0.0, eps=1e-6):
+        self.sum_tree = segment_tree.SumTree(maxlen)
+        self.min_tree = segment_tree.MinTree(maxlen)
+
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.eps = eps
+
+        # 새로 저장된 transition 은 지금까지의 최대 우선순위로 저장하여 적어도 한번은 샘플링되도록 함
+        self.max_priority = 1.0
+
+    def add(self, index):
+        priority = self.max_priority ** self.alpha
+        self.sum_tree.update(index, priority)
+        self.min_tree.update(index, priority)
+
+    def remove(self, index):
+        self.sum_tree.update(index, 0.0)
+        self.min_tree.update(index, np.inf)
+
+    # 우선순위 합을 batch_size 개의 구간으로 나누고 각 구간에서 하나씩 샘플링
+    def sample(self, batch_size):
+        # 우선순위가 0 보다 큰 slot 이 없으면 (아무것도 추가하지 않았거나 모두 remove) 샘플링할 수 없음
+        if not self.sum_tree.sum() > 0:
+            raise ValueError("cannot sample from a PrioritizedSampler with no slot of positive priority")
+        segment = self.sum_tree.sum() / batch_size
+        prefix_sum = (np.arange(batch_size) + np.random.rand(batch_size)) * segment
+        index = self.sum_tree.find_prefix_sum_index(prefix_sum)
+
+        # 부동소수점 오차로 우선순위가 0 인 leaf 가 선택된 경우 다시 샘플링
+        empty = self.sum_tree[index] <= 0
+        while empty.any():
+            index[empty] = self.sum_tree.find_prefix_sum_index(np.random.rand(int(empty.sum())) * self.sum_tree.sum())
+            empty = self.sum_tree[index] <= 0
+
+        # importance sampling 의 보정 정도인 beta 를 학습이 진행될수록 1 까지 증가
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return index
+
+    # w_i = (N * P(i))^-beta / max_j w_j = (p_i / p_min)^-beta
+    def weight(self, index):
+        return (self.sum_tree[index] / self.min_tree.min()) ** -self.beta
+
+    # 여러 index 의 우선순위를 한번에 갱신
+    def update(self, index, td_error):
+        priority = np.abs(td_error) + self.eps
+        self.max_priority = max(self.max_priority, priority.max(initial=0.0))
+        self.sum_tree.update(index, priority ** self.alpha)
+        self.min_tree.update(index, priority ** self.alpha)
+
+
+# BatchCollator 클래스 -> 샘플링한 index 의 데이터를 필드별 버퍼에 한번에 모은 뒤 device 의 float tensor 로 변환
+# CUDA 를 사용할 때는 pinned memory 버퍼를 사용하여 device 로 비동기 복사
+class BatchCollator():
+    def __init__(self, device, pin_memory=False, num_buffers=1):
+        self.device = device
+        self.pin_memory = pin_memory and device.type == 'cuda'
+
+        # 이전에 반환한 batch 가 사용되는 동안 덮어쓰지 않도록 여러 버퍼를 돌아가며 사용
+        self.num_buffers = num_buffers
+        self.buffers = [None] * num_buffers
+        self.events = [None] * num_buffers
+        self.buffer_index = 0
+
+    # 한 개의 샘플로 필드별 shape, dtype 을 확인하여 batch_size 크기의 버퍼 할당
+    def _allocate(self, memory, index):
+        sample = memory.get_batch(index[:1])
+        tensors = tuple(torch.empty((len(index),) + field.shape[1:], dtype=torch.from_numpy(field).dtype,
+                                    pin_memory=self.pin_memory) for field in sample)
+        return tensors, tuple(tensor.numpy() for tensor in tensors)
+
+    # 다음 버퍼에 index 에 해당하는 데이터를 모음 (memory.lock 을 잡은 상태에서 호출)
+    def _gather(self, memory, index):
+        i = self.buffer_index
+        self.buffer_index = (self.buffer_index + 1) % self.num_buffers
+
+        if self.buffers[i] is None or len(self.buffers[i][1][0]) != len(index):
+            self.buffers[i] = self._allocate(memory, index)
+        tensors, arrays = self.buffers[i]
+
+        # 버퍼를 재사용하기 전에 이전 비동기 복사가 끝났는지 확인
+        if self.events[i] is not None:
+            self.events[i].synchronize()
+
+        memory.get_batch(index, out=arrays)
+        return i, tensors, memory.sample_weight(index)
+
+    def _transfer(self, i, tensors, weight, index):
+        batch = tuple(tensor.to(self.device, non_blocking=self.pin_memory).float() for tensor in tensors)
+
+        if self.pin_memory:
+            self.events[i] = torch.cuda.Event()
+            self.events[i].record()
+
+        # 균등하게 샘플링한 경우 모든 weight 는 1
+        if weight is None:
+            weight = torch.ones(len(index), device=self.device)
+        else:
+            weight = torch.from_numpy(weight).float().to(self.device)
+        return batch + (weight, index)
+
+    # index 에 해당하는 (상태, 행동, 보상, 다음 상태, 게임 종료 여부, importance sampling weight, index) 를 반환
+    def collate(self, memory, index):
+        with memory.lock:
+            i, tensors, weight = self._gather(memory, index)
+        return self._transfer(i, tensors, weight, index)
+
+    def sample(self, memory, batch_size):
+        with memory.lock:
+            index = memory.sample_index(batch_size)
+            i, tensors, weight = self._gather(memory, index)
+        return self._transfer(i, tensors, weight, index)
+
+
+# Prefetcher 클래스 -> worker thread 에서 다음 미니 배치들을 미리 샘플링하고 device 로 복사하여 queue 에 저장
+class Prefetcher():
+    def __init__(self, memory, batch_size, device, pin_memory=False, depth=2):
+        self.memory = memory
+        self.batch_size = batch_size
+
+        # queue 에 있는 batch, worker 가 만들고 있는 batch, 학습에 사용중인 batch 의 버퍼가 겹치지 않도록 depth + 2 개의 버퍼 사용
+        self.collator = BatchCollator(device, pin_memory, num_buffers=depth + 2)
+        self.queue = queue.Queue(maxsize=depth)
+
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _put(self, item):
+        # queue 가 가득 찬 상태에서도 close 요청을 확인할 수 있도록 timeout 을 두고 반복
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        try:
+            while not self.stop_event.is_set():
+                self._put(self.collator.sample(self.memory, self.batch_size))
+        except Exception as e:
+            # worker 에서 발생한 에러는 get 을 호출한 쪽에서 다시 발생
+            self._put(e)
+
+    # 미리 준비된 미니 배치 반환
+    def get(self):
+        batch = self.queue.get()
+        if isinstance(batch, Exception):
+            raise batch
+        return batch
+
+    # worker thread 종료
+    def close(self):
+        self.stop_event.set()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.thread.join()
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+# SegmentTree 클래스 -> 배열 기반의 이진 트리 (leaf 는 [capacity, 2*capacity) 에 저장)
+# 여러 index 의 값을 한번에 갱신하며 한번의 갱신은 트리의 높이 (log n) 만큼의 numpy 연산으로 처리
+class SegmentTree():
+    def __init__(self, capacity, operation, neutral_element):
+        # capacity 를 2의 거듭제곱으로 맞춤
+        self.capacity = 1
+        while self.capacity < capacity:
+            self.capacity *= 2
+
+        self.operation = operation
+        self.neutral_element = neutral_element
+        self.tree = np.full(2 * self.capacity, neutral_element, dtype=np.float64)
+
+    # index 위치의 leaf 값을 value 로 바꾸고 부모 노드들을 다시 계산
+    def update(self, index, value):
+        if np.ndim(index) == 0:
+            # 하나의 index 만 갱신할 때는 numpy 배열 연산보다 python 반복문이 빠름
+            i = int(index) + self.capacity
+            self.tree[i] = value
+            while i > 1:
+                i //= 2
+                self.tree[i] = self.operation(self.tree[2*i], self.tree[2*i + 1])
+            return
+
+        i = np.asarray(index, dtype=np.int64) + self.capacity
+        if len(i) == 0:
+            return
+        self.tree[i] = value
+        while i[0] > 1:
+            i = np.unique(i // 2)
+            self.tree[i] = self.operation(self.tree[2*i], self.tree[2*i + 1])
+
+    def __getitem__(self, index):
+        return self.tree[np.asarray(index) + self.capacity]
+
+    # 전체 leaf 에 대한 연산 결과 (root 노드)
+    def reduce(self):
+        return self.tree[1]
+
+
+class SumTree(SegmentTree):
+    def __init__(self, capacity):
+        super(SumTree, self).__init__(capacity, np.add, 0.0)
+
+    def sum(self):
+        return self.reduce()
+
+    # 앞에서부터 누적합이 prefix_sum 을 넘는 첫 leaf 의 index 를 찾음 (prefix_sum 배열에 대해 한번에 계산)
+    def find_prefix_sum_index(self, prefix_sum):
+        prefix_sum = np.array(prefix_sum, dtype=np.float64)
+        i = np.ones(len(prefix_sum), dtype=np.int64)
+        while i[0] < self.capacity:
+            left = 2 * i
+            left_sum = self.tree[left]
+            go_right = prefix_sum > left_sum
+            prefix_sum -= np.where(go_right, left_sum, 0.0)
+            i = left + go_right
+        return i - self.capacity
+
+
+class MinTree(SegmentTree):
+    def __init__(self, capacity):
+        super(MinTree, self).__init__(capacity, np.minimum, np.inf)
+
+    def min(self):
+        return self.reduce()
@@ -0,0 +1,58 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch.utils.tensorboard", exc_type=ImportError)
+
+import config
+import algorithms
+import apex
+
+
+# Windows, macOS 처럼 기본 start method 를 spawn 으로 설정 (테스트 후 원래대로)
+@pytest.fixture
+def spawn_start_method():
+    start_method = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method("spawn", force=True)
+    yield
+    multiprocessing.set_start_method(start_method, force=True)
+
+
+# spawn 으로 시작한 actor 는 config.py 를 다시 import 하므로 main process 에서 바꾼 config 값은 인자로만 전달됨
+def test_actor_process_spawn(tmp_path, monkeypatch, spawn_start_method):
+    settings = {"local_env": True, "num_envs": 1, "state_size": [16, 16, 1], "action_size": 3, "stack_frame": 2,
+                "skip_frame": 2, "run_step": 250, "start_train_step": 100, "apex_send_size": 10, "load_model": False,
+                "prioritized_memory": True, "save_path": str(tmp_path / "apex")}
+    for name, value in settings.items():
+        monkeypatch.setattr(config, name, value)
+
+    algorithm = algorithms.make("DQN")
+    conn_recv, conn_send = multiprocessing.Pipe(duplex=False)
+    episode_queue = multiprocessing.Queue()
+    env_step = multiprocessing.Value('l', 0)
+    stop_event = multiprocessing.Event()
+    weights = apex.SharedWeights([getattr(algorithm.build(config.device), name) for name in algorithm.acting_models])
+
+    process = multiprocessing.Process(target=apex.actor_process, args=(apex.config_settings(), algorithm, 0, 1, 0, conn_send,
+                                                                       episode_queue, weights, env_step, stop_event))
+    process.start()
+    conn_send.close()
+
+    # actor 가 종료될 때까지 전송한 transition 수집
+    actions = []
+    while True:
+        try:
+            message = conn_recv.recv()
+        except EOFError:
+            break
+        assert message[0] == "append"
+        actions.append(message[2])
+    process.join(timeout=60)
+
+    assert process.exitcode == 0
+    assert env_step.value >= config.run_step
+    assert sum(len(action) for action in actions) >= config.run_step
+    # 학습 모드로 에피소드 보상을 기록하고, actor 의 epsilon 으로 탐험
+    assert not episode_queue.empty()
+    assert len(np.unique(np.concatenate(actions))) > 1
@@ -0,0 +1,64 @@
+import numpy as np
+
+import replay_memory
+
+
+stack_frame = 3
+skip_frame = 2
+
+
+# 환경마다 에피소드를 진행하며 (stacked state, 다음 stacked state, 게임 종료 여부) 생성
+# 프레임 값은 env * 1000 + step 이므로 재구성한 stack 의 프레임이 어느 환경의 것인지 알 수 있음
+def env_stream(env, num_steps, episode_len):
+    frames = []
+    for t in range(num_steps):
+        if not frames:
+            frames = [env * 1000 + t]
+        frames.append(env * 1000 + t + 1)
+        done = len(frames) > episode_len
+        stack = lambda k: [frames[max(k - skip_frame * j, 0)] for j in range(stack_frame)]
+        yield np.array(stack(len(frames) - 2))[:, None], np.array(stack(len(frames) - 1))[:, None], done
+        if done:
+            frames = []
+
+
+def fill_interleaved(memory, num_steps):
+    expected = {}
+    streams = [env_stream(0, num_steps, episode_len=7), env_stream(1, num_steps, episode_len=5)]
+    for t in range(num_steps):
+        for env, stream in enumerate(streams):
+            state, next_state, done = next(stream)
+            memory.append(state, t, float(env), next_state, done, env)
+            expected[(env, int(next_state[0, 0]))] = (state, next_state, done)
+    return expected
+
+
+def check_slots(memory, expected, index):
+    state, action, reward, next_state, done = memory.get_batch(index)
+    for i in range(len(index)):
+        env = int(reward[i])
+        expected_state, expected_next_state, expected_done = expected[(env, int(next_state[i, 0, 0]))]
+        assert np.all(state[i] // 1000 == env)
+        assert np.array_equal(state[i], expected_state)
+        assert np.array_equal(next_state[i], expected_next_state)
+        assert done[i] == expected_done
+
+
+def test_frame_memory_interleaved_streams():
+    memory = replay_memory.FrameReplayMemory(200, 1, stack_frame, skip_frame, num_streams=2)
+    expected = fill_interleaved(memory, 40)
+
+    index = np.flatnonzero(memory._is_valid(np.arange(memory.maxlen)))
+    assert len(index) == len(memory) == 80
+    check_slots(memory, expected, index)
+
+
+def test_frame_memory_interleaved_streams_wrap_around():
+    # stream 마다 30 개의 slot 을 여러 번 순환
+    memory = replay_memory.FrameReplayMemory(60, 1, stack_frame, skip_frame, num_streams=2)
+    expected = fill_interleaved(memory, 100)
+
+    index = memory.sample_index(500)
+    assert np.all(memory._is_valid(index))
+    assert set(index // memory.stream_len) == {0, 1}
+    check_slots(memory, expected, index)
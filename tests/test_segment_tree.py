@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+import segment_tree
+import replay_memory
+
+
+def test_sum_min_and_prefix_sum_index():
+    random = np.random.RandomState(0)
+    # capacity 가 2의 거듭제곱이 아닌 경우
+    capacity = 13
+    value = random.rand(capacity)
+    sum_tree = segment_tree.SumTree(capacity)
+    min_tree = segment_tree.MinTree(capacity)
+    sum_tree.update(np.arange(capacity), value)
+    min_tree.update(np.arange(capacity), value)
+
+    assert sum_tree.sum() == pytest.approx(value.sum())
+    assert min_tree.min() == value.min()
+
+    prefix_sum = random.rand(100) * value.sum()
+    expected = np.searchsorted(np.cumsum(value), prefix_sum)
+    assert np.array_equal(sum_tree.find_prefix_sum_index(prefix_sum), expected)
+
+    # 하나씩 갱신해도 같은 결과
+    value[[2, 7]] = [5.0, 0.01]
+    sum_tree.update(2, 5.0)
+    sum_tree.update(7, 0.01)
+    min_tree.update(2, 5.0)
+    min_tree.update(7, 0.01)
+    assert sum_tree.sum() == pytest.approx(value.sum())
+    assert min_tree.min() == 0.01
+    prefix_sum = random.rand(100) * value.sum()
+    assert np.array_equal(sum_tree.find_prefix_sum_index(prefix_sum), np.searchsorted(np.cumsum(value), prefix_sum))
+
+
+def test_update_repeated_index_last_write_wins():
+    sum_tree = segment_tree.SumTree(8)
+    min_tree = segment_tree.MinTree(8)
+    sum_tree.update(np.arange(8), np.ones(8))
+    min_tree.update(np.arange(8), np.ones(8))
+
+    index = np.array([3, 5, 3, 3])
+    sum_tree.update(index, np.array([10.0, 2.0, 0.5, 4.0]))
+    min_tree.update(index, np.array([0.1, 2.0, 0.5, 4.0]))
+
+    assert sum_tree[3] == 4.0
+    assert sum_tree.sum() == 6 + 2.0 + 4.0
+    assert min_tree[3] == 4.0
+    assert min_tree.min() == 1.0
+
+
+def test_prioritized_sampler_weight_at_most_one():
+    sampler = replay_memory.PrioritizedSampler(16, 0.6, 0.4)
+    for i in range(16):
+        sampler.add(i)
+    sampler.update(np.arange(16), np.random.RandomState(0).rand(16) * 10)
+    sampler.remove(4)
+
+    index = sampler.sample(64)
+    assert not np.any(index == 4)
+    weight = sampler.weight(index)
+    assert np.all(weight <= 1.0)
+    assert np.all(weight > 0.0)
+
+
+def test_prioritized_sampler_empty():
+    sampler = replay_memory.PrioritizedSampler(8, 0.6, 0.4)
+    with pytest.raises(ValueError):
+        sampler.sample(4)
+
+    # 추가한 slot 을 모두 remove 한 경우
+    for i in range(3):
+        sampler.add(i)
+    for i in range(3):
+        sampler.remove(i)
+    with pytest.raises(ValueError):
+        sampler.sample(4)
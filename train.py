@@ -0,0 +1,21 @@
+# 알고리즘 이름을 받아 학습 실행 (알고리즘 목록은 algorithms 패키지의 registry)
+# Usage : python train.py DQN
+#         python train.py DQN --num-actors 4 (Ape-X : 4 개의 actor process 로 경험 수집, DQN 계열만 가능)
+import argparse
+
+import config
+import algorithms
+import trainer
+import apex
+
+# Main function
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("algorithm", choices=sorted(algorithms.registry))
+    parser.add_argument("--num-actors", type=int, default=config.num_actors)
+    args = parser.parse_args()
+
+    if args.num_actors > 0:
+        apex.run(args.algorithm, args.num_actors)
+    else:
+        trainer.run(args.algorithm)
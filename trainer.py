@@ -0,0 +1,248 @@
+import copy
+import time
+import threading
+
+import numpy as np
+
+import config
+import vector_env
+import algorithms
+
+
+# Learner 클래스 -> replay ratio (환경 step 당 학습 횟수) 에 맞춰 학습 수행
+# asynchronous 이면 별도의 thread 에서 리플레이 메모리로 학습을 계속하고,
+# actor 는 주기적으로 복사한 네트워크 (actor_agent) 로 행동을 결정하여 환경 step 과 학습이 동시에 진행됨
+class Learner():
+    def __init__(self, algorithm, agent, replay_ratio, asynchronous):
+        self.algorithm = algorithm
+        self.agent = agent
+        self.replay_ratio = replay_ratio
+        self.asynchronous = asynchronous
+
+        self.env_step = config.start_train_step
+        self.last_env_step = config.start_train_step
+        self.learn_step = 0
+        self.synced_step = 0
+        self.busy_time = 0.0
+        self.metric_lists = {name: [] for name in algorithm.metrics}
+
+        # lock : 네트워크 업데이트와 가중치 복사 / 모델 저장이 겹치지 않도록 함
+        # condition : 환경 step / 학습 횟수 변화를 actor 와 learner thread 사이에 알림
+        self.lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.error = None
+
+        # 비동기 학습 시 행동 결정용 네트워크 복사 (리플레이 메모리 등 나머지는 공유)
+        self.actor_agent = agent
+        if asynchronous:
+            self.actor_agent = copy.copy(agent)
+            for name in algorithm.acting_models:
+                setattr(self.actor_agent, name, copy.deepcopy(getattr(agent, name)))
+
+    # 현재 환경 step 까지 수행해야 하는 학습 횟수
+    def target_step(self):
+        return self.replay_ratio * (self.env_step - config.start_train_step)
+
+    # 환경 step 이 진행될 때마다 호출
+    def update(self, step, num_envs):
+        if self.error is not None:
+            raise self.error
+
+        with self.condition:
+            self.env_step = step
+            self.condition.notify_all()
+
+        if not self.asynchronous:
+            while self.learn_step < self.target_step():
+                self.learn()
+            return
+
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+        # learner 가 한 step 분량 이상 뒤처지면 따라올 때까지 대기
+        with self.condition:
+            while self.learn_step < self.target_step() - max(1, self.replay_ratio * num_envs) and self.error is None:
+                self.condition.wait()
+
+        # actor 네트워크 동기화
+        if self.learn_step - self.synced_step >= config.weight_sync_step:
+            self.sync()
+
+    def run(self):
+        try:
+            while True:
+                with self.condition:
+                    while self.running and self.learn_step >= self.target_step():
+                        self.condition.wait()
+                    if not self.running:
+                        return
+                self.learn()
+        except Exception as e:
+            with self.condition:
+                self.error = e
+                self.condition.notify_all()
+
+    # 학습 1회 및 타겟 네트워크 업데이트
+    def learn(self):
+        start = time.perf_counter()
+        env_step = self.env_step
+        with self.lock:
+            values = self.algorithm.learn(self.agent)
+            self.algorithm.update_target(self.agent, env_step, env_step - self.last_env_step)
+        self.last_env_step = env_step
+
+        with self.condition:
+            for name, value in zip(self.algorithm.metrics, values):
+                self.metric_lists[name].append(value)
+            self.learn_step += 1
+            self.busy_time += time.perf_counter() - start
+            self.condition.notify_all()
+
+    # learner 네트워크를 actor 네트워크로 복사
+    def sync(self):
+        if self.actor_agent is self.agent:
+            return
+        with self.lock:
+            for name in self.algorithm.acting_models:
+                getattr(self.actor_agent, name).load_state_dict(getattr(self.agent, name).state_dict())
+            self.synced_step = self.learn_step
+
+    # print_episode 동안 기록된 값들의 평균
+    def pop_metrics(self):
+        with self.condition:
+            metrics = {name: np.mean(values) for name, values in self.metric_lists.items()}
+            self.metric_lists = {name: [] for name in self.algorithm.metrics}
+        return metrics
+
+    def close(self):
+        if self.thread is not None:
+            with self.condition:
+                self.running = False
+                self.condition.notify_all()
+            self.thread.join()
+            self.thread = None
+        self.sync()
+
+
+# Trainer 클래스 -> 모든 알고리즘이 공유하는 환경 / 학습 루프
+# 알고리즘마다 다른 부분은 algorithm 의 hook (build, act, learn, update_target, log) 으로 호출
+class Trainer():
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.learner = None
+        self.actor_time = 0.0
+
+    def run(self, env=None):
+        algorithm = self.algorithm
+
+        # set unity environment path (file_name) and run config.num_envs environments in parallel
+        if env is None:
+            env = vector_env.make_env()
+
+        # setting brain for unity
+        brains = env.external_brains
+        default_brain = list(brains.keys())[0]
+
+        train_mode = config.train_mode
+        agent = algorithm.build(config.device)
+        self.learner = Learner(algorithm, agent, config.replay_ratio, config.async_learner)
+
+        try:
+            self.loop(env, default_brain, agent, train_mode)
+        finally:
+            self.learner.close()
+            agent.stop_prefetch()
+            env.close()
+
+    def loop(self, env, default_brain, agent, train_mode):
+        algorithm = self.algorithm
+        learner = self.learner
+        actor_agent = learner.actor_agent
+
+        step = 0
+        episode = 0
+        reward_list = []
+
+        # 학습 상태 출력을 위한 이전 기록 (actor / learner 사용률, replay ratio)
+        last_time = time.perf_counter()
+        last_actor_time = 0.0
+        last_busy_time = 0.0
+        last_step = 0
+        last_learn_step = 0
+
+        # Reset Unity environment and set the train mode according to the environment setting (env_config)
+        env_info = env.reset(train_mode=train_mode, config=config.env_config)[default_brain]
+
+        # 모든 환경의 상태 초기화
+        actor = vector_env.VectorActor(env, default_brain, actor_agent, visual=algorithm.visual)
+        actor.reset(env_info)
+
+        # Game loop
+        while step < config.run_step + config.test_step:
+            if step >= config.run_step and train_mode:
+                train_mode = False
+                learner.close()
+                agent.stop_prefetch()
+                env_info = env.reset(train_mode=train_mode)[default_brain]
+                actor.reset(env_info)
+
+            # 모든 환경의 행동을 한번에 결정하고 Unity 환경에 적용
+            # 다음 상태, 보상, 게임 종료 정보를 받아오고 train mode 인 경우 리플레이 메모리에 저장
+            start = time.perf_counter()
+            action = algorithm.act(actor_agent, actor.state, step, train_mode)
+            episode_rewards = actor.step(action, train_mode)
+            self.actor_time += time.perf_counter() - start
+
+            # 한번의 step 에서 각 환경의 transition 이 하나씩 쌓임
+            step += actor.num_envs
+
+            if step > config.start_train_step and train_mode:
+                # 다음 미니 배치들을 worker thread 에서 미리 준비
+                if config.prefetch_depth > 0:
+                    agent.start_prefetch(config.prefetch_depth)
+
+                # 학습 수행 및 타겟 네트워크 업데이트 (비동기 학습이면 learner thread 에서 수행)
+                learner.update(step, actor.num_envs)
+
+            # 네트워크 모델 저장
+            if step % config.save_step < actor.num_envs and train_mode:
+                with learner.lock:
+                    agent.save_model(config.load_model, train_mode)
+
+            # 이번 step 에서 끝난 에피소드
+            for episode_reward in episode_rewards:
+                reward_list.append(episode_reward)
+                episode += 1
+
+                # 게임 진행 상황 출력 및 텐서 보드에 보상과 손실함수 값 기록
+                if episode % config.print_episode == 0:
+                    algorithm.log(actor_agent, step, episode, np.mean(reward_list), learner.pop_metrics(), train_mode)
+                    reward_list = []
+
+                    # 같은 step 에서 여러 에피소드가 끝난 경우 한번만 출력
+                    if step == last_step:
+                        continue
+
+                    # actor (행동 결정 + 환경 step) 와 learner (학습) 가 바빴던 시간의 비율
+                    now = time.perf_counter()
+                    actor_utilization = (self.actor_time - last_actor_time) / (now - last_time)
+                    learner_utilization = (learner.busy_time - last_busy_time) / (now - last_time)
+                    replay_ratio = (learner.learn_step - last_learn_step) / max(1, step - last_step)
+                    print("actor utilization: {:.1f}% / learner utilization: {:.1f}% / replay ratio: {:.2f} / env steps/s: {:.1f}".format
+                          (100 * actor_utilization, 100 * learner_utilization, replay_ratio, (step - last_step) / (now - last_time)))
+
+                    last_time, last_actor_time, last_busy_time = now, self.actor_time, learner.busy_time
+                    last_step, last_learn_step = step, learner.learn_step
+
+        with learner.lock:
+            agent.save_model(config.load_model, train_mode)
+
+
+# 이름으로 알고리즘을 선택하여 학습 실행
+def run(name):
+    Trainer(algorithms.make(name)).run()
@@ -0,0 +1,149 @@
+import numpy as np
+
+from mlagents.envs import UnityEnvironment, ThreadPoolImageDecoder
+from mlagents.envs.subprocess_environment import SubprocessUnityEnvironment
+
+import config
+import local_env
+
+
+# 환경 생성 -> num_envs 가 1 보다 크면 각 환경을 별도의 process 에서 실행하고 한번의 step 으로 모두 진행
+# local 이 True 이면 Unity 빌드 대신 LocalEnvironment 사용
+# 환경들은 base_worker_id 부터 연속된 worker_id 를 사용 (None 이면 랜덤하게 선택)
+# shared_memory_env 이면 병렬 환경의 관측은 공유 메모리의 view 로 반환되고 두 번의 step 이후에 덮어쓰임
+def make_env(num_envs=None, local=None, base_worker_id=None):
+    num_envs = config.num_envs if num_envs is None else num_envs
+    local = config.local_env if local is None else local
+    if base_worker_id is None:
+        base_worker_id = np.random.randint(60000 - num_envs)
+    uint8_visual = config.uint8_visual
+    decode_threads = config.decode_threads
+    communicator = config.communicator
+
+    def env_factory(worker_id):
+        if local:
+            return local_env.LocalEnvironment(worker_id=base_worker_id + worker_id, step_latency=config.local_step_latency,
+                                              uint8_visual=uint8_visual)
+        # VectorActor 가 관측을 바로 복사하므로 디코딩 결과 배열은 재사용
+        image_decoder = ThreadPoolImageDecoder(decode_threads, reuse_output=True) if decode_threads > 0 else None
+        return UnityEnvironment(file_name=config.env_name, worker_id=base_worker_id + worker_id, uint8_visual=uint8_visual,
+                                image_decoder=image_decoder, communicator=communicator)
+
+    if num_envs == 1:
+        return env_factory(0)
+    return SubprocessUnityEnvironment(env_factory, num_envs, shared_memory=config.shared_memory_env)
+
+
+# FrameStacker 클래스 -> 모든 환경의 최근 프레임을 미리 할당한 uint8 ring buffer 에 저장하고 skip_frame 마다 stack
+# stack 한 상태는 미리 할당한 두 개의 출력 버퍼에 번갈아 복사하므로 step 마다 새 배열을 만들지 않음
+# (반환한 상태는 다음 push 이후에도 유효하여 이전 상태와 다음 상태를 함께 사용할 수 있고, 그 다음 push 에서 덮어쓰임)
+class FrameStacker():
+    def __init__(self, num_envs, frame_shape, stack_frame, skip_frame):
+        self.stack_frame = stack_frame
+
+        # stack 에 필요한 가장 오래된 프레임은 skip_frame*(stack_frame-1) step 이전의 프레임
+        self.ring_len = skip_frame * (stack_frame - 1) + 1
+        self.ring = np.zeros((num_envs, self.ring_len) + tuple(frame_shape), dtype=np.uint8)
+        self.pos = 0
+
+        # stack 의 j 번째 프레임 (가장 최근부터) 의 ring buffer 위치 = pos - skip_frame*j
+        self.offset = skip_frame * np.arange(stack_frame)
+        self.ring_index = np.empty(stack_frame, dtype=np.int64)
+
+        state_shape = (num_envs, frame_shape[0] * stack_frame) + tuple(frame_shape[1:])
+        self.states = [np.zeros(state_shape, dtype=np.uint8) for _ in range(2)]
+        self.current = 0
+
+    @property
+    def state(self):
+        return self.states[self.current]
+
+    # 모든 환경의 새 프레임을 저장하고 stack 한 상태 반환
+    def push(self, obs):
+        self.pos = (self.pos + 1) % self.ring_len
+        self.ring[:, self.pos] = obs
+
+        np.subtract(self.pos, self.offset, out=self.ring_index)
+        np.remainder(self.ring_index, self.ring_len, out=self.ring_index)
+
+        self.current = 1 - self.current
+        state = self.states[self.current]
+        np.take(self.ring, self.ring_index, axis=1, out=state.reshape(self.ring.shape[:1] + (self.stack_frame,) + self.ring.shape[2:]), mode='clip')
+        return state
+
+    # 에피소드 시작 시 i 번째 환경의 ring buffer 와 현재 상태를 첫 프레임으로 채움
+    def reset(self, i, obs):
+        self.ring[i] = obs
+        self.state[i].reshape((self.stack_frame,) + self.ring.shape[2:])[:] = obs
+
+
+# VectorActor 클래스 -> 여러 환경 (에이전트) 의 상태를 배치로 관리
+# 한번의 step 에서 모든 환경의 행동을 적용하고, 각 환경의 transition 을 리플레이 메모리에 저장
+class VectorActor():
+    def __init__(self, env, brain_name, agent, visual=True):
+        self.env = env
+        self.brain_name = brain_name
+        self.agent = agent
+        self.visual = visual
+
+    # 환경 reset 후 모든 환경의 상태와 에피소드 보상 초기화
+    def reset(self, env_info):
+        self.num_envs = len(env_info.agents)
+        self.episode_rewards = np.zeros(self.num_envs)
+
+        obs = self.get_obs(env_info)
+        self.state = obs
+        if self.visual:
+            self.stacker = FrameStacker(self.num_envs, obs.shape[1:], config.stack_frame, config.skip_frame)
+            for i in range(self.num_envs):
+                self.reset_frame(i, obs[i])
+            self.state = self.stacker.state
+
+    # 모든 환경에 행동을 적용하고 끝난 에피소드들의 보상을 반환
+    def step(self, action, train_mode):
+        env_info = self.env.step({self.brain_name: action})[self.brain_name]
+
+        obs = self.get_obs(env_info)
+        next_state = self.stack_frame(obs)
+        reward = np.array(env_info.rewards)
+        done = np.array(env_info.local_done)
+        self.episode_rewards += reward
+
+        # Save data in replay memory while train mode
+        if train_mode:
+            for i in range(self.num_envs):
+                # 연속 행동은 환경이 하나일 때와 같은 (1, action_size) 형태로 저장
+                env_action = action[i:i+1] if np.ndim(action) > 1 else action[i]
+                self.agent.append_sample(self.state[i], env_action, reward[i], next_state[i], done[i], i)
+
+        episode_rewards = self.episode_rewards[done].tolist()
+        self.episode_rewards[done] = 0
+
+        # 에피소드가 끝난 환경은 다음 에피소드의 첫 관측으로 stack 초기화
+        self.state = next_state
+        for i in np.flatnonzero(done):
+            self.reset_frame(i, obs[i])
+
+        return episode_rewards
+
+    def get_obs(self, env_info):
+        if self.visual:
+            # uint8_visual 인 환경은 uint8 CHW 이미지를 그대로 사용
+            obs = np.asarray(env_info.visual_observations[0])
+            if obs.dtype == np.uint8:
+                return obs
+            return np.transpose(255 * obs, (0, 3, 1, 2))
+        return np.asarray(env_info.vector_observations, dtype=np.float32)
+
+    # 모든 환경의 상태를 배치로 반환 (벡터 관측은 그대로 사용)
+    # 시각적 관측은 FrameStacker 의 출력 버퍼를 반환하므로 두 번의 step 이후에는 덮어쓰임
+    def stack_frame(self, obs):
+        if not self.visual:
+            return obs
+        return self.stacker.push(obs)
+
+    # 에피소드 시작 시 i 번째 환경의 stack 을 첫 관측으로 채움
+    def reset_frame(self, i, obs):
+        if not self.visual:
+            return
+        self.stacker.reset(i, obs)